@@ -1,68 +1,231 @@
-from data.data import load_all
+"""
+Dashboard data, served stale-while-revalidate.
+
+On import the last committed cache generation is opened as-is, so the GUI
+can start at once. start_revalidation() then runs change detection (and a
+rebuild when files changed) in a background thread; when a newer
+generation is ready it is published and every listener registered with
+on_update() is called.
+
+The served data is one read-only Snapshot (frames, indexes, version),
+published by a single assignment to `current`. Take one reference to it
+(`snapshot = cache.current`) and read everything from that, so a swap in
+the middle of a callback can't mix two generations.
+
+The chart frames derived from the assets (treemap_df, bar_df) are built
+on first access, once per snapshot. Histograms and the scatter are sampled
+from the assets by the visualization page (see data.histogram and
+data.density).
+"""
+import datetime
+import threading
+
 import pandas as pd
 
-# Load core data once
-metadata, assets, tree_df, kpis, treemap_data = load_all()
+from data import treemap
+from data.display import format_sizes_mb
+from data.data import (
+    ORDER_CACHE,
+    VARIANT_INDEX_CACHE,
+    VARIANT_SEARCH_CACHE,
+    current_generation,
+    generation_built_at,
+    open_generation,
+    open_index,
+    revalidate,
+)
+
+status = "cached"  # then "checking", and "fresh" or "error"
+error = ""
+
+_listeners = []
+_worker = None
+
 
 # --------------------------------------------------
-# PRECOMPUTED DATAFRAMES FOR VISUALIZATION
+# SNAPSHOTS
 # --------------------------------------------------
 
-# Treemap dataframe
-labels = treemap_data["labels"]
-parents = treemap_data["parents"]
-values = treemap_data["values"]
-
-treemap_df = pd.DataFrame({
-    "labels": labels,
-    "parents": parents,
-    "values": values,
-})
-
-# Base histograms
-hist_tri_df = pd.DataFrame({
-    "variant": assets["variant_name"],
-    "value": assets["triangles"],
-    "hover": assets["variant_name"] + " — " + assets["triangles_fmt"] + " tris",
-    "family": assets["asset_family"].astype(str),
-})
-
-hist_mat_df = pd.DataFrame({
-    "variant": assets["variant_name"],
-    "value": assets["material_count"],
-    "hover": assets["variant_name"] + " — " + assets["material_count_fmt"] + " mats",
-    "family": assets["asset_family"].astype(str),
-})
-
-hist_poly_df = pd.DataFrame({
-    "variant": assets["variant_name"],
-    "value": assets["polycount"],
-    "hover": assets["variant_name"] + " — " + assets["polycount_fmt"] + " polys",
-    "family": assets["asset_family"].astype(str),
-})
-
-# Scatter data
-scatter_poly_df = pd.DataFrame({
-    "polycount": assets["polycount"],
-    "materials": assets["material_count"],
-    "hover": assets["variant_name"]
-             + " — " + assets["polycount_fmt"] + " polys"
-             + " — " + assets["material_count_fmt"] + " mats",
-    "family": assets["asset_family"].astype(str),
-})
-
-# Heaviest families
-heaviest = (
-    assets.groupby("asset_family")
-    .agg({"folder_size_mb": "max"})
-    .sort_values("folder_size_mb", ascending=False)
-    .head(10)
-    .reset_index()
-)
+class Snapshot:
+    """
+    The data of one cache generation: metadata, assets, tree_df, kpis,
+    treemap_data, the asset indexes (asset_orders, variant_index,
+    variant_search; see data.query), its version (the generation's
+    directory) and built_at. Read-only; frames derived from it are built
+    once, on first use, and kept with it.
+    """
+
+    FIELDS = (
+        "version", "built_at", "metadata", "assets", "tree_df", "kpis", "treemap_data",
+        "asset_orders", "variant_index", "variant_search",
+    )
+    __slots__ = FIELDS + ("_derived", "_lock")
+
+    def __init__(self, **fields):
+        for name in self.FIELDS:
+            object.__setattr__(self, name, fields.pop(name, None))
+        if fields:
+            raise TypeError(f"unknown snapshot fields: {', '.join(fields)}")
+        object.__setattr__(self, "_derived", {})
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    def __setattr__(self, name, value):
+        raise AttributeError("cache snapshots are read-only")
+
+    def derived(self, name: str, build):
+        """build(self), computed on first use and kept with the snapshot."""
+        value = self._derived.get(name)
+        if value is None:
+            with self._lock:
+                value = self._derived.get(name)
+                if value is None:
+                    value = self._derived[name] = build(self)
+        return value
+
+    @property
+    def treemap_df(self):
+        return self.derived("treemap_df", _build_treemap_df)
+
+    @property
+    def bar_df(self):
+        return self.derived("bar_df", _build_bar_df)
+
+
+def open_snapshot(generation) -> Snapshot:
+    """Open a committed generation as a Snapshot."""
+    metadata, assets, tree_df, kpis, treemap_data = open_generation(generation)
+    return Snapshot(
+        version=generation,
+        built_at=generation_built_at(generation),
+        metadata=metadata,
+        assets=assets,
+        tree_df=tree_df,
+        kpis=kpis,
+        treemap_data=treemap_data,
+        asset_orders=open_index(generation, ORDER_CACHE),
+        variant_index=open_index(generation, VARIANT_INDEX_CACHE),
+        variant_search=open_index(generation, VARIANT_SEARCH_CACHE),
+    )
+
+
+# --------------------------------------------------
+# DERIVED DATAFRAMES FOR VISUALIZATION (built on first access)
+# --------------------------------------------------
+
+def _build_treemap_df(snapshot: Snapshot):
+    # Generations from before the hierarchical treemap stored a flat one
+    top = snapshot.treemap_data
+    if "ids" not in top:
+        top = treemap.subtree(snapshot.assets)
+    return treemap.frame(top)
+
+
+def _build_bar_df(snapshot: Snapshot):
+    # Heaviest families
+    heaviest = (
+        snapshot.assets[["asset_family", "folder_size_mb"]]
+        .groupby("asset_family", observed=True)
+        .agg({"folder_size_mb": "max"})
+        .sort_values("folder_size_mb", ascending=False)
+        .head(10)
+        .reset_index()
+    )
+
+    family = heaviest["asset_family"].astype(str)
+    return pd.DataFrame({
+        "family": family,
+        "size": heaviest["folder_size_mb"],
+        "hover": family + " — " + format_sizes_mb(heaviest["folder_size_mb"]).to_numpy(),
+    })
+
+
+current = Snapshot()  # the data served; replaced whole by _install
+
+
+def _install(generation):
+    """Open a generation and publish it as the data this module serves."""
+    global current
+    current = open_snapshot(generation)
+
+
+# --------------------------------------------------
+# FRESHNESS
+# --------------------------------------------------
+
+def data_age(snapshot: Snapshot = None) -> str:
+    """Age of the served data (or of `snapshot`), e.g. '5 min ago'."""
+    built_at = (snapshot or current).built_at
+    if built_at is None:
+        return ""
+    seconds = max((datetime.datetime.now() - built_at).total_seconds(), 0)
+    if seconds < 60:
+        return "just now"
+    if seconds < 3600:
+        return f"{int(seconds // 60)} min ago"
+    if seconds < 86400:
+        return f"{int(seconds // 3600)} h ago"
+    return f"{int(seconds // 86400)} days ago"
+
+
+def freshness() -> str:
+    """One-line freshness indicator for the pages."""
+    snapshot = current
+    built_at = snapshot.built_at
+    built = built_at.strftime("%Y-%m-%d %H:%M") if built_at else "?"
+    labels = {
+        "cached": "Cached, not yet checked",
+        "checking": "Checking for changes",
+        "fresh": "Up to date",
+        "error": f"Refresh failed ({error})",
+    }
+    return f"{labels.get(status, status)} · data built {built} ({data_age(snapshot)})"
+
+
+# --------------------------------------------------
+# BACKGROUND REVALIDATION
+# --------------------------------------------------
+
+def on_update(listener):
+    """Call listener() from the worker thread when a background check ends (new data may be in)."""
+    _listeners.append(listener)
+
+
+def _notify():
+    for listener in _listeners:
+        try:
+            listener()
+        except Exception as e:
+            print(f"[cache] Update listener failed: {e}")
+
+
+def _revalidate_worker():
+    global status, error
+    try:
+        generation, _ = revalidate(wait=True)
+        if generation != current.version:
+            _install(generation)
+            print(f"[cache] Swapped in {generation}")
+        status = "fresh"
+    except Exception as e:
+        print(f"[cache] Background refresh failed: {e}")
+        status, error = "error", str(e)
+    _notify()
+
+
+def start_revalidation():
+    """Check the dataset for changes in a background thread (once)."""
+    global _worker, status
+    if status == "fresh" or _worker is not None:
+        return
+    status = "checking"
+    _worker = threading.Thread(target=_revalidate_worker, name="cache-revalidate", daemon=True)
+    _worker.start()
+
 
-bar_df = pd.DataFrame({
-    "family": heaviest["asset_family"],
-    "size": heaviest["folder_size_mb"],
-    "hover": heaviest["asset_family"] + " — " +
-             heaviest["folder_size_mb"].round(2).astype(str) + " MB"
-})
+# Serve the last good cache right away; without one there is nothing to
+# serve yet, so the first build runs in the foreground.
+_generation = current_generation()
+if _generation is None:
+    _generation, _ = revalidate(wait=True)
+    status = "fresh"
+_install(_generation)
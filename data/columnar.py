@@ -0,0 +1,102 @@
+"""
+Memory-mapped columnar frames.
+
+Cached frames are written as uncompressed Arrow IPC (Feather v2) files so
+they can be memory-mapped and read without copying: opening one costs about
+as much as the mmap() call, and the pages are shared through the OS page
+cache by every process that opens the same file. LazyFrame converts a
+column to pandas the first time it is used, so memory grows only with the
+columns a page actually touches.
+"""
+import pandas as pd
+import pyarrow as pa
+
+
+def write_frame(df: pd.DataFrame, path):
+    """
+    Write a frame uncompressed, as one record batch, so it can be
+    memory-mapped later with every column a single contiguous chunk.
+    """
+    df.reset_index(drop=True).to_feather(path, compression="uncompressed", chunksize=max(len(df), 1))
+
+
+class LazyFrame:
+    """
+    Read-only, DataFrame-like view of a memory-mapped Arrow IPC file.
+    Supports the subset of the DataFrame API the pages use:
+    frame["col"], frame[["a", "b"]], len(), .empty, .columns, .shape,
+    plus slice() for row ranges, take() for given rows, arrow() for a
+    column as Arrow and to_pandas() for a full copy.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+        self._columns = {}
+
+    @property
+    def columns(self) -> pd.Index:
+        return pd.Index(self._table.column_names)
+
+    @property
+    def empty(self) -> bool:
+        return self._table.num_rows == 0 or self._table.num_columns == 0
+
+    @property
+    def shape(self) -> tuple:
+        return self._table.num_rows, self._table.num_columns
+
+    def __len__(self):
+        return self._table.num_rows
+
+    def __contains__(self, name):
+        return name in self._table.column_names
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self.column(key)
+        return pd.DataFrame({name: self.column(name) for name in key})
+
+    def column(self, name) -> pd.Series:
+        """Materialize one column (once); primitive columns stay views on the map."""
+        series = self._columns.get(name)
+        if series is not None:
+            return series
+
+        chunked = self._table.column(name)
+        series = None
+        if chunked.num_chunks == 1 and chunked.null_count == 0:
+            try:
+                values = chunked.chunk(0).to_numpy(zero_copy_only=True)
+                series = pd.Series(values, name=name, copy=False)
+            except pa.ArrowInvalid:
+                series = None
+        if series is None:
+            series = chunked.to_pandas().rename(name)
+
+        self._columns[name] = series
+        return series
+
+    def arrow(self, name) -> pa.Array:
+        """One column as an Arrow array on the map (no pandas conversion)."""
+        chunked = self._table.column(name)
+        return chunked.chunk(0) if chunked.num_chunks == 1 else chunked.combine_chunks()
+
+    def slice(self, start: int, stop: int) -> pd.DataFrame:
+        """Rows [start, stop) as a small DataFrame, converted from the map."""
+        return self._table.slice(start, max(stop - start, 0)).to_pandas()
+
+    def take(self, rows) -> pd.DataFrame:
+        """The given rows, in that order, as a small DataFrame."""
+        return self.take_arrow(rows).to_pandas()
+
+    def take_arrow(self, rows, columns=None) -> pa.Table:
+        table = self._table if columns is None else self._table.select(list(columns))
+        return table.take(pa.array(rows))
+
+    def to_pandas(self, columns=None) -> pd.DataFrame:
+        table = self._table if columns is None else self._table.select(list(columns))
+        return table.to_pandas()
+
+    def loaded_columns(self) -> list:
+        return list(self._columns)
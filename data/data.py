@@ -1,8 +1,19 @@
 import os
+import itertools
 import json
+import posixpath
+import re
+from collections import deque
 from pathlib import Path
 import datetime
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from data import columnar, export, geometry, ingest, manifest, treemap
+from data.lock import FileLock, atomic_path
+from data.obj_scan import throughput_mb_s
 
 # Adjust this to your project structure
 MOANA_ROOT = Path("D:/Downloads/island")
@@ -13,48 +24,47 @@ os.makedirs(EXPORTS_DIR, exist_ok=True)
 JSON_ROOT = MOANA_ROOT / "json"
 OBJ_ROOT = MOANA_ROOT / "obj"
 
-def format_number(n: int) -> str:
-    return f"{n:,}"
+def _read_single_metadata(path: str):
+    file = Path(path)
+    try:
+        with file.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+            if not isinstance(data, dict):
+                # Skip non-dict JSON structures for now
+                return None
+            data["__json_file"] = file.as_posix()
+            return data
+    except Exception as e:
+        print(f"[metadata] Error reading {file}: {e}")
+        return None
+
+
+def _read_metadata_batch(batch):
+    results = (_read_single_metadata(path) for path in batch)
+    return [data for data in results if data is not None]
 
-def format_size_mb(size: float) -> str:
-    if size >= 1024:
-        return f"{size/1024:.2f} GB"
-    return f"{size:.2f} MB"
 
-def load_metadata_json() -> pd.DataFrame:
+def load_metadata_json(mode: str | None = None, workers: int | None = None) -> pd.DataFrame:
     """
     Load all JSON metadata files into a single DataFrame.
-    Parallelized over JSON files for faster ingestion.
+    Parallelized over JSON files; `mode` is "processes", "threads" or
+    "serial" (see data.ingest), `workers` the pool size.
     """
     rows = []
 
     if not JSON_ROOT.exists():
         return pd.DataFrame()
 
-    json_files = list(JSON_ROOT.glob("*.json"))
+    json_files = [file.as_posix() for file in JSON_ROOT.glob("*.json")]
     if not json_files:
         return pd.DataFrame()
 
-    def _read_single_metadata(file: Path):
-        try:
-            with file.open("r", encoding="utf-8") as f:
-                data = json.load(f)
-                if not isinstance(data, dict):
-                    # Skip non-dict JSON structures for now
-                    return None
-                data["__json_file"] = file.as_posix()
-                return data
-        except Exception as e:
-            print(f"[metadata] Error reading {file}: {e}")
-            return None
+    sizes = [os.path.getsize(path) for path in json_files]
+    batches = ingest.make_batches(json_files, sizes)
 
     # Parallel JSON parsing
-    from concurrent.futures import ThreadPoolExecutor
-
-    with ThreadPoolExecutor() as pool:
-        for result in pool.map(_read_single_metadata, json_files):
-            if result is not None:
-                rows.append(result)
+    for result in ingest.run_batches(_read_metadata_batch, batches, mode, workers):
+        rows.extend(result)
 
     if not rows:
         return pd.DataFrame()
@@ -88,16 +98,10 @@ def count_materials(mtl_file: Path) -> int:
 
 def compute_polycount_from_obj(obj_path: Path) -> int:
     """
-    Naive polycount proxy: count vertex lines 'v ' in OBJ.
-    Not exact, but good enough for dashboard-level approximation.
+    Polycount: number of face records in the OBJ.
     """
     try:
-        count = 0
-        with obj_path.open("r", encoding="utf-8", errors="ignore") as f:
-            for line in f:
-                if line.startswith("v "):
-                    count += 1
-        return count
+        return geometry.get_obj_stats(obj_path)["face_count"]
     except Exception as e:
         print(f"[polycount] Error reading {obj_path}: {e}")
         return 0
@@ -151,146 +155,405 @@ def compute_folder_size_mb(path: Path) -> float:
     return round(total / (1024 * 1024), 2)
 
 
-def load_obj_families():
+# Column order of the compact per-batch results sent back by OBJ workers.
+# The OBJ path is not stored: it is OBJ_ROOT/<asset_family>/<variant_name>.obj
+# (see data.display.asset_paths).
+ASSET_COLUMNS = [
+    "variant_name",
+    "asset_family",
+    "polycount",
+    "triangles",
+    "vertex_count",
+    "arity_hist",
+    "material_count",
+    "hierarchy_depth",
+    "folder_size_mb",
+    "obj_size_mb",
+    "mtl_size_mb",
+    "hier_size_mb",
+]
+
+# Size of each file of a variant (folder_size_mb is their sum), for the treemap
+FILE_SIZE_COLUMNS = ["obj_size_mb", "mtl_size_mb", "hier_size_mb"]
+
+# Stored as the narrowest unsigned integer type that holds them
+ASSET_COUNT_COLUMNS = ["polycount", "triangles", "vertex_count", "material_count", "hierarchy_depth"]
+
+
+def compact_assets(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Give an assets frame its stored schema: ASSET_COLUMNS only, families
+    categorical, counts downcast, sizes float32. Display strings are made
+    by data.display for the rows shown, never stored.
+    """
+    df = df[[column for column in ASSET_COLUMNS if column in df.columns]]
+    if df.empty:
+        return df.reset_index(drop=True)
+    compact = {"asset_family": df["asset_family"].astype(str).astype("category")}
+    for column in ASSET_COUNT_COLUMNS:
+        if column in df.columns:
+            compact[column] = pd.to_numeric(df[column], downcast="unsigned")
+    for column in ["folder_size_mb", *FILE_SIZE_COLUMNS]:
+        if column in df.columns:
+            compact[column] = df[column].astype(np.float32)
+    return df.assign(**compact).reset_index(drop=True)
+
+
+# Columns the asset table can be sorted by
+SORT_COLUMNS = [
+    "variant_name",
+    "asset_family",
+    "polycount",
+    "triangles",
+    "material_count",
+    "hierarchy_depth",
+    "folder_size_mb",
+]
+
+
+def build_sort_orders(assets: pd.DataFrame) -> pd.DataFrame:
+    """
+    Ascending row order of the assets for every SORT_COLUMNS column (stable,
+    int32 row numbers), so a sorted page is a slice of a stored order.
+    """
+    return pd.DataFrame({
+        column: pc.sort_indices(pa.array(assets[column])).to_numpy().astype(np.int32)
+        for column in SORT_COLUMNS
+        if column in assets.columns
+    })
+
+
+def hash_variant_names(names) -> np.ndarray:
+    """64-bit hashes of variant names (the keys of build_variant_index)."""
+    return pd.util.hash_array(np.asarray(names, dtype=object))
+
+
+def build_variant_index(assets: pd.DataFrame) -> pd.DataFrame:
+    """
+    Hash index from variant name to row: hashes sorted ascending with
+    their row, so a lookup is one binary search (plus a name check on
+    the rare collision).
+    """
+    if assets.empty:
+        return pd.DataFrame({"hash": np.array([], dtype=np.uint64), "row": np.array([], dtype=np.int32)})
+    hashes = hash_variant_names(assets["variant_name"])
+    order = np.argsort(hashes, kind="stable")
+    return pd.DataFrame({"hash": hashes[order], "row": order.astype(np.int32)})
+
+
+# Leading bytes of each search key compared by common_prefix_lengths (the
+# fuzzy search measures at most this much of a key).
+SEARCH_KEY_BYTES = 32
+
+
+def key_bytes(keys, positions, width: int) -> np.ndarray:
+    """
+    The first `width` UTF-8 bytes of the strings at `positions` of an Arrow
+    string array, as a uint8 matrix with one zero-padded row per position.
+    """
+    if isinstance(keys, pa.ChunkedArray):
+        keys = keys.combine_chunks()
+    positions = np.asarray(positions, dtype=np.int64)
+    out = np.zeros((len(positions), width), dtype=np.uint8)
+    _, offsets, data = keys.buffers()
+    if data is None or len(positions) == 0:
+        return out
+    offset_type = np.int64 if pa.types.is_large_string(keys.type) else np.int32
+    offsets = np.frombuffer(offsets, dtype=offset_type)[keys.offset:keys.offset + len(keys) + 1]
+    starts = offsets[positions].astype(np.int64)
+    lengths = offsets[positions + 1] - starts
+    columns = np.arange(width)
+    inside = columns < lengths[:, None]
+    out[inside] = np.frombuffer(data, dtype=np.uint8)[(starts[:, None] + columns)[inside]]
+    return out
+
+
+def common_prefix_lengths(keys, width: int = SEARCH_KEY_BYTES, chunk: int = 1 << 18) -> np.ndarray:
+    """
+    For sorted Arrow strings, the number of leading bytes (up to `width`)
+    each one shares with the one before it (0 for the first).
+    """
+    lengths = np.zeros(len(keys), dtype=np.uint8)
+    for start in range(1, len(keys), chunk):
+        stop = min(start + chunk, len(keys))
+        heads = key_bytes(keys, np.arange(start - 1, stop), width)
+        same = heads[1:] == heads[:-1]
+        lengths[start:stop] = np.where(same.all(axis=1), width, same.argmin(axis=1))
+    return lengths
+
+
+# Where words start inside a variant name: after a lowercase letter or
+# digit (camelCase) and after a separator, e.g. isBayCedarA1_bonsaiA.
+_WORD_START = re.compile(r"(?<=[a-z0-9])[A-Z]|(?<=[_\-. ])[^_\-. ]")
+MAX_WORDS_PER_NAME = 8
+
+
+def build_variant_search(assets: pd.DataFrame) -> pd.DataFrame:
+    """
+    Typeahead index: for every variant, the lowercase name and its
+    suffixes starting at each word, sorted, with the row and the word's
+    position (0 for the whole name). Prefix searches are binary searches
+    and also match from the start of any word ("cedar" -> isBayCedarA1).
+    "lcp" is each key's common prefix with the previous one, in bytes (see
+    common_prefix_lengths); the fuzzy search walks it instead of the keys.
+    """
+    names = assets["variant_name"].astype(str).tolist() if not assets.empty else []
+    word_starts = [
+        ([0] + [m.start() for m in _WORD_START.finditer(name)])[:MAX_WORDS_PER_NAME]
+        for name in names
+    ]
+    rows = np.repeat(np.arange(len(names), dtype=np.int32), [len(w) for w in word_starts])
+    starts = np.fromiter(itertools.chain.from_iterable(word_starts), dtype=np.uint16, count=len(rows))
+    lower = [name.lower() for name in names]
+    keys = [lower[row][start:] for row, start in zip(rows.tolist(), starts.tolist())]
+    keys = pa.array(keys, pa.string())
+    order = pc.sort_indices(keys).to_numpy()
+    keys = keys.take(order)
+    return pd.DataFrame({
+        "key": keys.to_pandas(),
+        "row": rows[order],
+        "start": starts[order],
+        "lcp": common_prefix_lengths(keys),
+    })
+
+
+def _process_single_obj(task):
+    """
+    Build one asset row as a tuple in ASSET_COLUMNS order.
+    Returns (row, new_stats); new_stats is set when the OBJ had to be scanned
+    here, so the parent process can persist it in the geometry store.
+    """
+    asset_family, obj_path, _obj_key, obj_stats = task
+    obj_file = Path(obj_path)
+    try:
+        name = obj_file.stem  # variant name
+
+        mtl_file = obj_file.with_suffix(".mtl")
+        hier_file = obj_file.with_suffix(".hier")
+
+        # Polycount
+        new_stats = None
+        if obj_stats is None:
+            obj_stats = geometry.compute_obj_stats(obj_file)
+            new_stats = obj_stats
+        polycount = obj_stats["face_count"]
+
+        # Triangle count (artist-friendly), exact from face arity
+        triangles = obj_stats["triangle_count"]
+        vertex_count = obj_stats["v"]
+        arity_hist = json.dumps(obj_stats["arity_hist"])
+
+        # Material count
+        material_count = count_materials(mtl_file)
+
+        # Hierarchy depth
+        hierarchy_depth = compute_hierarchy_depth(hier_file)
+
+        # Variant-specific file size
+        obj_size = obj_file.stat().st_size / (1024 * 1024)
+        mtl_size = mtl_file.stat().st_size / (1024 * 1024) if mtl_file.exists() else 0
+        hier_size = hier_file.stat().st_size / (1024 * 1024) if hier_file.exists() else 0
+        variant_size_mb = obj_size + mtl_size + hier_size
+
+        row = (
+            name,
+            asset_family,
+            polycount,
+            triangles,
+            vertex_count,
+            arity_hist,
+            material_count,
+            hierarchy_depth,
+            variant_size_mb,
+            obj_size,
+            mtl_size,
+            hier_size,
+        )
+        return row, new_stats
+    except Exception as e:
+        print(f"[assets] Error processing {obj_file}: {e}")
+        return None, None
+
+
+def _process_obj_batch(batch):
+    """
+    Process a batch of OBJ tasks in a worker.
+    Returns column lists (ASSET_COLUMNS order) rather than per-row dicts,
+    plus [(file_key, stats)] for OBJs scanned in this batch.
+    """
+    columns = [[] for _ in ASSET_COLUMNS]
+    new_stats = []
+    for task in batch:
+        row, stats = _process_single_obj(task)
+        if row is None:
+            continue
+        for column, value in zip(columns, row):
+            column.append(value)
+        if stats is not None:
+            new_stats.append((task[2], stats))
+    return columns, new_stats
+
+
+def load_obj_families(mode: str | None = None, workers: int | None = None, obj_files=None):
     """
     Walk OBJ_ROOT and build a table:
     - asset_family (folder name)
     - variant_name (e.g., isBayCedarA1_bonsaiA)
-    - polycount
+    - polycount (face records)
+    - triangles (fan-triangulated faces)
+    - vertex_count
+    - arity_hist (JSON {vertices per face: count})
     - material_count
     - hierarchy_depth
     - folder_size_mb (per variant: obj + mtl + hier)
-    - asset_path
+    - obj_size_mb, mtl_size_mb, hier_size_mb
 
-    Parallelized over OBJ files for faster ingestion.
+    in the compact schema of compact_assets().
+    Parallelized over OBJ files in batches, largest files first.
+    `mode` is "processes", "threads" or "serial" (see data.ingest),
+    `workers` the pool size. `obj_files` restricts the run to the given
+    OBJ paths (used by incremental rebuilds).
     """
-    from concurrent.futures import ThreadPoolExecutor
-
     if not OBJ_ROOT.exists():
         return pd.DataFrame()
 
     # Collect all OBJ files and their families first (cheap)
+    if obj_files is None:
+        obj_files = [
+            obj_file
+            for family_dir in OBJ_ROOT.iterdir()
+            if family_dir.is_dir()
+            for obj_file in family_dir.glob("*.obj")
+        ]
+
+    # Stats already in the geometry store travel with the task so workers
+    # skip the scan.
     obj_tasks = []
-    for family_dir in OBJ_ROOT.iterdir():
-        if not family_dir.is_dir():
+    for obj_file in obj_files:
+        obj_file = Path(obj_file)
+        asset_family = obj_file.parent.name
+        try:
+            key = geometry.file_key(obj_file)
+        except OSError as e:
+            print(f"[assets] Error processing {obj_file}: {e}")
             continue
-        asset_family = family_dir.name
-        for obj_file in family_dir.glob("*.obj"):
-            obj_tasks.append((asset_family, obj_file))
+        obj_tasks.append((asset_family, obj_file.as_posix(), key, geometry.lookup(key)))
 
     if not obj_tasks:
         return pd.DataFrame()
 
-    def _process_single_obj(task):
-        asset_family, obj_file = task
-        obj_file = Path(obj_file)
-        try:
-            name = obj_file.stem  # variant name
-
-            mtl_file = obj_file.with_suffix(".mtl")
-            hier_file = obj_file.with_suffix(".hier")
-
-            # Polycount
-            polycount = compute_polycount_from_obj(obj_file)
-
-            # Triangle count (artist-friendly)
-            triangles = polycount * 2
-
-            # Material count
-            material_count = count_materials(mtl_file)
-
-            # Hierarchy depth
-            hierarchy_depth = compute_hierarchy_depth(hier_file)
-
-            # Variant-specific file size
-            obj_size = obj_file.stat().st_size / (1024 * 1024)
-            mtl_size = mtl_file.stat().st_size / (1024 * 1024) if mtl_file.exists() else 0
-            hier_size = hier_file.stat().st_size / (1024 * 1024) if hier_file.exists() else 0
-            variant_size_mb = obj_size + mtl_size + hier_size
-
-            return {
-                "variant_name": name,
-                "asset_family": asset_family,
-                "polycount": polycount,
-                "triangles": triangles,
-                "material_count": material_count,
-                "hierarchy_depth": hierarchy_depth,
-                "folder_size_mb": variant_size_mb,
-                "asset_path": obj_file.as_posix(),
-
-                # Formatted versions for UI
-                "polycount_fmt": format_number(polycount),
-                "triangles_fmt": format_number(triangles),
-                "material_count_fmt": format_number(material_count),
-                "hierarchy_depth_fmt": format_number(hierarchy_depth),
-                "folder_size_fmt": format_size_mb(variant_size_mb),
-            }
-        except Exception as e:
-            print(f"[assets] Error processing {obj_file}: {e}")
-            return None
+    sizes = [task[2][1] for task in obj_tasks]
+    batches = ingest.make_batches(obj_tasks, sizes)
 
-    rows = []
+    columns = [[] for _ in ASSET_COLUMNS]
+    scanned_bytes = 0
+    start = time.perf_counter()
     # Parallel OBJ/MTL/HIER processing
-    with ThreadPoolExecutor() as pool:
-        for result in pool.map(_process_single_obj, obj_tasks):
-            if result is not None:
-                rows.append(result)
+    for batch_columns, new_stats in ingest.run_batches(_process_obj_batch, batches, mode, workers):
+        for column, values in zip(columns, batch_columns):
+            column.extend(values)
+        for key, stats in new_stats:
+            geometry.remember(key, stats)
+            scanned_bytes += stats["bytes"]
+
+    geometry.flush()
+    elapsed = time.perf_counter() - start
+    print(
+        f"[assets] Processed {len(obj_tasks)} OBJ files "
+        f"({sum(sizes) / (1024 * 1024):.1f} MB, "
+        f"{scanned_bytes / (1024 * 1024):.1f} MB scanned) in {elapsed:.1f}s, "
+        f"{throughput_mb_s(scanned_bytes, elapsed):.1f} MB/s"
+    )
 
-    if not rows:
+    if not columns[0]:
         return pd.DataFrame()
 
-    return pd.DataFrame(rows)
+    return compact_assets(pd.DataFrame(dict(zip(ASSET_COLUMNS, columns))))
 
-def build_tree_structure() -> pd.DataFrame:
+def build_tree_structure(files: dict | None = None) -> pd.DataFrame:
     """
-    Build a tree-like structure from the MOANA_ROOT for visualization.
-    We'll return a DataFrame with columns: id, parent, label, type, size_mb.
-    This works well with tree/treemap-style views.
+    Build a compact tree of MOANA_ROOT for visualization.
+    One row per file or folder, the row number being the node id:
+    parent (int32, -1 for the root), name (categorical path component),
+    is_dir, size_mb and depth. Labels and formatted sizes are produced by
+    the Tree page only for the rows it shows.
+
+    `files` is the {dir: {name: (size, mtime_ns)}} mapping produced by
+    manifest.scan_tree, so load_all can reuse its change-detection walk;
+    the root is walked here when it is not given. Folder sizes are summed
+    bottom-up from their children, so every file is counted exactly once.
     """
-    nodes = []
-    node_id = 0
-
-    def add_node(path: Path, parent_id: int | None, depth: int):
-        nonlocal node_id
-        current_id = node_id
-        node_id += 1
-
-        # relative label logic
-        rel = path.relative_to(MOANA_ROOT)
-        base_label = str(rel) if rel != Path(".") else "moana"
-
-        # indentation
-        label = ("— " * depth) + base_label
-
-        # type + size logic
-        if path.is_dir():
-            size_mb = compute_folder_size_mb(path)
-            node_type = "folder"
-        else:
-            size_mb = round(path.stat().st_size / (1024 * 1024), 4)
-            node_type = "file"
-
-        nodes.append(
-            {
-                "id": current_id,
-                "parent": parent_id,
-                "label": label,
-                "type": node_type,
-                "size_mb": size_mb,
-                "depth": depth,
-            }
-        )
-
-        # recursion for directories
-        if path.is_dir():
-            for child in path.iterdir():
-                add_node(child, current_id, depth + 1)
+    if files is None:
+        if not MOANA_ROOT.exists():
+            return pd.DataFrame()
+        files, _, _ = manifest.scan_tree([MOANA_ROOT])
 
-    # pass depth=0
-    if MOANA_ROOT.exists():
-        add_node(MOANA_ROOT, None, 0)
+    root = MOANA_ROOT.as_posix()
+    if root not in files:
+        return pd.DataFrame()
 
-    return pd.DataFrame(nodes)
+    subdirs = {}
+    for d in files:
+        if d != root:
+            subdirs.setdefault(posixpath.dirname(d), []).append(d)
+
+    # Bottom-up folder totals: deepest directories first.
+    totals = {}
+    for d in sorted(files, key=lambda p: p.count("/"), reverse=True):
+        own = sum(size for size, _ in files[d].values())
+        totals[d] = own + sum(totals[child] for child in subdirs.get(d, ()))
+
+    # Breadth-first, children appended together when their folder is
+    # visited: every node's children are one contiguous id range and the
+    # parent column is non-decreasing, so children are found by binary search.
+    parents, names, is_dir, sizes, depths = [-1], ["moana"], [True], [totals[root]], [0]
+    queue = deque([(root, 0)])
+    while queue:
+        d, folder_id = queue.popleft()
+        depth = depths[folder_id] + 1
+
+        for child in sorted(subdirs.get(d, ())):
+            queue.append((child, len(parents)))
+            parents.append(folder_id)
+            names.append(posixpath.basename(child))
+            is_dir.append(True)
+            sizes.append(totals[child])
+            depths.append(depth)
+
+        for name in sorted(files[d]):
+            parents.append(folder_id)
+            names.append(name)
+            is_dir.append(False)
+            sizes.append(files[d][name][0])
+            depths.append(depth)
+
+    return pd.DataFrame({
+        "parent": np.array(parents, dtype=np.int32),
+        # Path components are interned: int32 codes into one table of names.
+        "name": pd.Categorical(names),
+        "is_dir": np.array(is_dir, dtype=bool),
+        "size_mb": np.array(sizes, dtype=np.float64) / (1024 * 1024),
+        "depth": np.array(depths, dtype=np.int16),
+    })
+
+
+def tree_children(tree_df: pd.DataFrame, node_id: int) -> range:
+    """Ids of the direct children of a node in a build_tree_structure frame."""
+    parent = tree_df["parent"].to_numpy()
+    lo = int(np.searchsorted(parent, node_id, side="left"))
+    hi = int(np.searchsorted(parent, node_id, side="right"))
+    return range(lo, hi)
+
+
+def tree_node_path(tree_df: pd.DataFrame, node_id: int) -> str:
+    """Path of a node relative to MOANA_ROOT ("moana" for the root)."""
+    parent = tree_df["parent"].to_numpy()
+    names = tree_df["name"]
+    parts = []
+    while node_id > 0:
+        parts.append(str(names.iat[node_id]))
+        node_id = int(parent[node_id])
+    return "/".join(reversed(parts)) or "moana"
 
 
 def compute_kpis(assets_df: pd.DataFrame, metadata_df: pd.DataFrame) -> dict:
@@ -339,39 +602,54 @@ def compute_kpis(assets_df: pd.DataFrame, metadata_df: pd.DataFrame) -> dict:
 
 def prepare_treemap_data(assets_df: pd.DataFrame) -> dict:
     """
-    Prepare data for a folder-size or asset-size treemap.
-    Simple example: treemap by asset_family using folder_size_mb.
+    Top of the asset size treemap (root -> families -> variants), summed
+    and pruned to the largest children by data.treemap. Deeper levels are
+    computed when the page drills into a node.
     """
     if assets_df is None or assets_df.empty:
-        return {"labels": [], "parents": [], "values": []}
-
-    grouped = (
-        assets_df.groupby("asset_family")
-        .agg({"folder_size_mb": "max"})
-        .reset_index()
-    )
-
-    labels = list(grouped["asset_family"])
-    parents = ["Moana"] * len(labels)
-    values = list(grouped["folder_size_mb"])
-
-    return {"labels": labels, "parents": parents, "values": values}
+        return {"ids": [], "labels": [], "parents": [], "values": []}
+    return treemap.subtree(assets_df)
 
 import time
 import json
-import hashlib
-from concurrent.futures import ThreadPoolExecutor
+import shutil
 
 # Paths for caching
 CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "_cache")
 os.makedirs(CACHE_DIR, exist_ok=True)
 
-META_CACHE = os.path.join(CACHE_DIR, "metadata.feather")
-ASSET_CACHE = os.path.join(CACHE_DIR, "assets.feather")
-TREE_CACHE = os.path.join(CACHE_DIR, "tree.feather")
-TREEMAP_CACHE = os.path.join(CACHE_DIR, "treemap.json")
-KPI_CACHE = os.path.join(CACHE_DIR, "kpis.json")
-MANIFEST_CACHE = os.path.join(CACHE_DIR, "manifest.json")  # for change detection
+# Every build writes a complete generation directory (gen-*) and then
+# atomically points CURRENT at it. A build killed halfway leaves a
+# generation nothing points to, and processes still reading the previous
+# generation are never disturbed: a build removes only the generations
+# older than the one it replaces. Only the holder of LOCK_FILE builds.
+CURRENT_FILE = "CURRENT"
+LOCK_FILE = "build.lock"
+GENERATION_PREFIX = "gen-"
+
+META_CACHE = "metadata.feather"
+ASSET_CACHE = "assets.feather"
+ORDER_CACHE = "asset_orders.feather"  # row order of assets for each sort key
+VARIANT_INDEX_CACHE = "variant_index.feather"  # variant name hash -> row
+VARIANT_SEARCH_CACHE = "variant_search.feather"  # word prefixes of variant names -> row
+TREE_CACHE = "tree.feather"
+TREEMAP_CACHE = "treemap.json"
+KPI_CACHE = "kpis.json"
+MANIFEST_CACHE = "manifest.feather"  # per-file, for change detection
+DIR_HASH_CACHE = "dir_hashes.feather"  # per-directory Merkle hashes
+
+CACHE_FILES = [
+    META_CACHE,
+    ASSET_CACHE,
+    ORDER_CACHE,
+    VARIANT_INDEX_CACHE,
+    VARIANT_SEARCH_CACHE,
+    TREE_CACHE,
+    TREEMAP_CACHE,
+    KPI_CACHE,
+    MANIFEST_CACHE,
+    DIR_HASH_CACHE,
+]
 
 
 def _load_feather(path):
@@ -379,7 +657,8 @@ def _load_feather(path):
 
 
 def _save_feather(df, path):
-    df.reset_index(drop=True).to_feather(path)
+    with atomic_path(path) as tmp:
+        columnar.write_frame(df, tmp)
 
 
 def _load_json(path):
@@ -388,277 +667,421 @@ def _load_json(path):
 
 
 def _save_json(obj, path):
-    with open(path, "w") as f:
-        json.dump(obj, f)
+    with atomic_path(path) as tmp:
+        with open(tmp, "w") as f:
+            json.dump(obj, f)
 
 
-def _compute_dir_hash(path: Path) -> str:
-    """
-    Compute a simple hash based on file paths + mtimes under a directory.
-    This is coarse but safe: if anything changes, the hash changes.
-    """
-    if not path.exists():
-        return ""
-
-    hasher = hashlib.sha1()
-    for p in sorted(path.rglob("*")):
-        if p.is_file():
-            rel = p.relative_to(path).as_posix().encode("utf-8")
-            mtime = str(p.stat().st_mtime).encode("utf-8")
-            hasher.update(rel + b"|" + mtime)
-    return hasher.hexdigest()
+def current_generation():
+    """Directory of the last complete build, or None."""
+    try:
+        with open(os.path.join(CACHE_DIR, CURRENT_FILE), "r") as f:
+            name = f.read().strip()
+    except OSError:
+        return None
+    path = os.path.join(CACHE_DIR, name)
+    return path if name and os.path.isdir(path) else None
 
 
-def _load_manifest():
-    if not os.path.exists(MANIFEST_CACHE):
-        return {}
-    try:
-        with open(MANIFEST_CACHE, "r") as f:
-            return json.load(f)
-    except Exception:
-        return {}
+def _new_generation():
+    path = os.path.join(CACHE_DIR, f"{GENERATION_PREFIX}{time.time_ns()}-{os.getpid()}")
+    os.makedirs(path)
+    return path
 
 
-def _save_manifest(manifest: dict):
-    with open(MANIFEST_CACHE, "w") as f:
-        json.dump(manifest, f)
+def _commit_generation(generation):
+    """Point CURRENT at a fully written generation (a single rename)."""
+    with atomic_path(os.path.join(CACHE_DIR, CURRENT_FILE)) as tmp:
+        with open(tmp, "w") as f:
+            f.write(os.path.basename(generation))
+            f.flush()
+            os.fsync(f.fileno())
 
 
-def clear_cache():
+def _prune_generations(keep=()):
     """
-    Remove all cached artifacts.
-    Safe to call when the dataset has changed or you want a full rebuild.
+    Remove every generation not in `keep`, plus cache files left by the
+    single-directory layout. Call with the build lock held. Files still
+    mapped by another process may refuse to go (Windows); they are retried
+    on the next build.
     """
-    for path in [
-        META_CACHE,
-        ASSET_CACHE,
-        TREE_CACHE,
-        TREEMAP_CACHE,
-        KPI_CACHE,
-        MANIFEST_CACHE,
-    ]:
-        if os.path.exists(path):
+    keep = {os.path.normcase(os.path.abspath(path)) for path in keep if path}
+    for name in os.listdir(CACHE_DIR):
+        path = os.path.join(CACHE_DIR, name)
+        if name.startswith(GENERATION_PREFIX) and os.path.isdir(path):
+            if os.path.normcase(os.path.abspath(path)) not in keep:
+                shutil.rmtree(path, ignore_errors=True)
+        elif name in CACHE_FILES:
             try:
                 os.remove(path)
             except OSError:
-                # Non-fatal: if something can't be removed, we just leave it.
                 pass
 
-def _write_export_json(obj, filename):
-    """Write a JSON file into the exports directory."""
-    path = os.path.join(EXPORTS_DIR, filename)
-    with open(path, "w") as f:
-        json.dump(obj, f, indent=2)
+
+def clear_cache():
+    """
+    Remove all cached artifacts.
+    Safe to call when the dataset has changed or you want a full rebuild.
+    """
+    with FileLock(os.path.join(CACHE_DIR, LOCK_FILE)):
+        try:
+            os.remove(os.path.join(CACHE_DIR, CURRENT_FILE))
+        except OSError:
+            # Non-fatal: if something can't be removed, we just leave it.
+            pass
+        _prune_generations()
 
 def export_maya_metadata(assets_df, metadata_df):
     """
     Create a unified metadata export for Maya and PBRT/Maya pipeline tools.
-    Produces:
-        - exports/maya_metadata.json (consolidated)
+    Produces (streamed, compact JSON; see data.export):
+        - exports/maya_metadata.json (consolidated, elements by reference)
         - exports/assets.json
         - exports/metadata.json
-        - exports/elements.json
-        - exports/primitives.json
+        - exports/blobs/ (one content-addressed blob per element, rewritten
+          only when its source JSON changed) + exports/export_manifest.json
+        - exports/elements.json, exports/primitives.json (blob references)
         - exports/cameras.json
         - exports/lights.json
+        - exports/maya_metadata.index.json (byte offsets of every entry)
     """
+    export.write_exports(
+        EXPORTS_DIR,
+        assets_df,
+        metadata_df,
+        MOANA_ROOT,
+        JSON_ROOT,
+        OBJ_ROOT,
+    )
+    print("[export] Maya metadata export complete.")
 
-    # ------------------------------------------------------------
-    # 1. ASSETS (from OBJ/MTL/HIER)
-    # ------------------------------------------------------------
-    assets = assets_df.to_dict(orient="records") if assets_df is not None else []
-
-    _write_export_json(assets, "assets.json")
-
-    # ------------------------------------------------------------
-    # 2. METADATA (from JSON_ROOT)
-    # ------------------------------------------------------------
-    metadata = metadata_df.to_dict(orient="records") if metadata_df is not None else []
-    _write_export_json(metadata, "metadata.json")
-
-    # ------------------------------------------------------------
-    # 3. PBRT ELEMENT JSON (json/<element>/<element>.json)
-    # ------------------------------------------------------------
-    elements = {}
-    if JSON_ROOT.exists():
-        for element_dir in JSON_ROOT.iterdir():
-            if element_dir.is_dir():
-                element_json = element_dir / f"{element_dir.name}.json"
-                if element_json.exists():
-                    try:
-                        with open(element_json, "r") as f:
-                            elements[element_dir.name] = json.load(f)
-                    except Exception as e:
-                        print(f"[export] Error reading element JSON {element_json}: {e}")
-
-    _write_export_json(elements, "elements.json")
-
-    # ------------------------------------------------------------
-    # 4. PBRT PRIMITIVE JSON (nested inside element JSON)
-    # ------------------------------------------------------------
-    primitives = {}
-    for elem_name, elem_dict in elements.items():
-        if "instancedPrimitiveJsonFiles" in elem_dict:
-            for prim_name, prim_info in elem_dict["instancedPrimitiveJsonFiles"].items():
-                prim_file = prim_info.get("jsonFile")
-                if prim_file:
-                    try:
-                        with open(os.path.join(JSON_ROOT, prim_file), "r") as f:
-                            primitives[f"{elem_name}/{prim_name}"] = json.load(f)
-                    except Exception:
-                        pass
-
-    _write_export_json(primitives, "primitives.json")
-
-    # ------------------------------------------------------------
-    # 5. CAMERAS
-    # ------------------------------------------------------------
-    cameras = {}
-    cam_dir = JSON_ROOT / "cameras"
-    if cam_dir.exists():
-        for cam_file in cam_dir.glob("*.json"):
-            try:
-                with open(cam_file, "r") as f:
-                    cameras[cam_file.stem] = json.load(f)
-            except Exception:
-                pass
+def _is_under(path: str, root: Path, depth: int) -> bool:
+    """True if a posix path sits exactly `depth` directories below root."""
+    parent = path
+    for _ in range(depth):
+        parent = os.path.dirname(parent)
+    return parent == root.as_posix()
+
+
+def _patch_metadata(metadata: pd.DataFrame, changed: set, removed: set) -> pd.DataFrame:
+    """Replace the rows of top-level JSON files that were added, modified or removed."""
+    def is_metadata_file(path):
+        return path.lower().endswith(".json") and _is_under(path, JSON_ROOT, 1)
+
+    touched = {p for p in changed | removed if is_metadata_file(p)}
+    if not touched:
+        return metadata
+
+    if "__json_file" in metadata.columns:
+        metadata = metadata[~metadata["__json_file"].isin(touched)]
+
+    fresh = _read_metadata_batch(sorted(p for p in changed if is_metadata_file(p)))
+    print(f"[metadata] Incremental update: {len(touched)} JSON files touched")
+    if not fresh:
+        return metadata.reset_index(drop=True)
+    return pd.concat([metadata, pd.DataFrame(fresh)], ignore_index=True)
+
+
+def _patch_assets(assets: pd.DataFrame, changed: set, removed: set) -> pd.DataFrame:
+    """Recompute the rows of variants whose OBJ, MTL or HIER changed."""
+    affected = set()
+    for path in changed | removed:
+        stem, ext = os.path.splitext(path)
+        if ext.lower() in (".obj", ".mtl", ".hier") and _is_under(path, OBJ_ROOT, 2):
+            affected.add(stem + ".obj")
+    if not affected:
+        return assets
+
+    # Rows are keyed by "<family>/<variant>", the OBJ path below OBJ_ROOT.
+    if not assets.empty:
+        keys = assets["asset_family"].astype(str) + "/" + assets["variant_name"].astype(str)
+        touched = {posixpath.relpath(p, OBJ_ROOT.as_posix())[:-len(".obj")] for p in affected}
+        assets = assets[~keys.isin(touched)]
+
+    present = sorted(p for p in affected if os.path.isfile(p))
+    print(f"[assets] Incremental update: {len(affected)} variants touched")
+    fresh = load_obj_families(obj_files=present) if present else pd.DataFrame()
+    if fresh.empty:
+        return compact_assets(assets)
+    return compact_assets(pd.concat([assets, fresh], ignore_index=True))
+
+
+def _is_up_to_date(generation, current_hashes: dict, roots) -> bool:
+    """True if a generation was built from exactly the files on disk now."""
+    if generation is None:
+        return False
+    old_hashes = manifest.load_hashes(os.path.join(generation, DIR_HASH_CACHE))
+    return old_hashes is not None and not manifest.changed_dirs(old_hashes, current_hashes, roots)
+
+
+def open_generation(generation):
+    """Open a committed generation: frames memory-mapped, small artifacts parsed."""
+    metadata = columnar.LazyFrame(os.path.join(generation, META_CACHE))
+    assets = columnar.LazyFrame(os.path.join(generation, ASSET_CACHE))
+    tree_df = columnar.LazyFrame(os.path.join(generation, TREE_CACHE))
+    kpis = _load_json(os.path.join(generation, KPI_CACHE))
+    treemap_data = _load_json(os.path.join(generation, TREEMAP_CACHE))
+    return metadata, assets, tree_df, kpis, treemap_data
 
-    _write_export_json(cameras, "cameras.json")
 
-    # ------------------------------------------------------------
-    # 6. LIGHTS
-    # ------------------------------------------------------------
-    lights = {}
-    lights_file = JSON_ROOT / "lights" / "lights.json"
-    if lights_file.exists():
-        try:
-            with open(lights_file, "r") as f:
-                lights = json.load(f)
-        except Exception:
-            pass
+def _reuse_file(previous, generation, name) -> bool:
+    """Hard-link (or copy) an unchanged file from the previous generation."""
+    source = os.path.join(previous, name)
+    if not os.path.exists(source):
+        return False
+    try:
+        os.link(source, os.path.join(generation, name))
+    except OSError:
+        shutil.copy2(source, os.path.join(generation, name))
+    return True
 
-    _write_export_json(lights, "lights.json")
-
-    # ------------------------------------------------------------
-    # 7. CONSOLIDATED EXPORT
-    # ------------------------------------------------------------
-    consolidated = {
-        "timestamp": datetime.datetime.now().isoformat(),
-        "paths": {
-            "MOANA_ROOT": MOANA_ROOT.as_posix(),
-            "JSON_ROOT": JSON_ROOT.as_posix(),
-            "OBJ_ROOT": OBJ_ROOT.as_posix(),
-        },
-        "assets": assets,
-        "metadata": metadata,
-        "elements": elements,
-        "primitives": primitives,
-        "cameras": cameras,
-        "lights": lights,
-    }
 
-    _write_export_json(consolidated, "maya_metadata.json")
+def open_index(generation, name):
+    """An index frame of a generation, memory-mapped (None for generations built without it)."""
+    path = os.path.join(generation, name)
+    return columnar.LazyFrame(path) if os.path.exists(path) else None
 
-    print("[export] Maya metadata export complete.")
 
-def load_all(force: bool = False):
+def _build_generation(previous, current_files, current_hashes, current_mtimes, roots, force):
+    """
+    Write a new generation from `previous` (patched incrementally) or from
+    scratch, commit it and return its directory. Call with the build lock held.
     """
-    Advanced, production-grade loader with caching and simple change detection.
+    old_hashes = None
+    if previous is not None and not force:
+        old_hashes = manifest.load_hashes(os.path.join(previous, DIR_HASH_CACHE))
 
-    - Uses cached results if available and the dataset hash hasn't changed.
-    - Recomputes only missing or invalidated pieces.
-    - `force=True` forces a full rebuild and cache overwrite.
+    generation = _new_generation()
+    try:
+        # --------------------------------------------------
+        # 1. METADATA + 2. ASSETS
+        # --------------------------------------------------
+        if old_hashes is None:
+            metadata = load_metadata_json()
+            if metadata is None:
+                metadata = pd.DataFrame()
+            assets = load_obj_families()
+            if assets is None:
+                assets = pd.DataFrame()
+            previous_assets = None
+        else:
+            # Only directories whose hash changed are diffed file by file.
+            dirty = manifest.changed_dirs(old_hashes, current_hashes, roots)
+            old_files = manifest.load_files(os.path.join(previous, MANIFEST_CACHE), dirty)
+            added, modified, removed = manifest.diff(old_files, current_files, dirty)
+            changed = added | modified
+            print(
+                f"[cache] {len(added)} added, {len(modified)} modified, "
+                f"{len(removed)} removed files since last build"
+            )
+            metadata = _patch_metadata(
+                _load_feather(os.path.join(previous, META_CACHE)), changed, removed
+            )
+            previous_assets = _load_feather(os.path.join(previous, ASSET_CACHE))
+            assets = _patch_assets(previous_assets, changed, removed)
+
+        _save_feather(metadata, os.path.join(generation, META_CACHE))
+        _save_feather(assets, os.path.join(generation, ASSET_CACHE))
+
+        # Asset indexes; carried over from the previous generation when
+        # no asset changed (the search index is the slow one to build).
+        for name, build in (
+            (ORDER_CACHE, build_sort_orders),
+            (VARIANT_INDEX_CACHE, build_variant_index),
+            (VARIANT_SEARCH_CACHE, build_variant_search),
+        ):
+            if assets is not previous_assets or not _reuse_file(previous, generation, name):
+                _save_feather(build(assets), os.path.join(generation, name))
+
+        # --------------------------------------------------
+        # 3. TREE STRUCTURE
+        # --------------------------------------------------
+        tree_df = build_tree_structure(current_files)
+        if tree_df is None:
+            tree_df = pd.DataFrame()
+        _save_feather(tree_df, os.path.join(generation, TREE_CACHE))
 
-    Returns:
-        metadata (DataFrame),
-        assets (DataFrame),
-        tree_df (DataFrame),
-        kpis (dict),
-        treemap_data (dict).
+        # --------------------------------------------------
+        # 4. TREEMAP DATA + 5. KPIs
+        # --------------------------------------------------
+        _save_json(prepare_treemap_data(assets), os.path.join(generation, TREEMAP_CACHE))
+        _save_json(compute_kpis(assets, metadata), os.path.join(generation, KPI_CACHE))
+
+        # --------------------------------------------------
+        # 6. EXPORT MAYA METADATA
+        # --------------------------------------------------
+        export_maya_metadata(assets, metadata)
+
+        # --------------------------------------------------
+        # 7. MANIFEST, then COMMIT
+        # --------------------------------------------------
+        manifest.save(
+            current_files,
+            current_hashes,
+            os.path.join(generation, MANIFEST_CACHE),
+            os.path.join(generation, DIR_HASH_CACHE),
+            current_mtimes,
+        )
+        _commit_generation(generation)
+    except BaseException:
+        shutil.rmtree(generation, ignore_errors=True)
+        raise
+
+    # The generation it replaces stays until the next build: processes
+    # that opened it before the commit keep reading (and mapping) it.
+    _prune_generations(keep=(generation, previous))
+    return generation
+
+
+def generation_built_at(generation) -> datetime.datetime:
+    """When a generation was built (its manifest is the last file written)."""
+    mtime = os.path.getmtime(os.path.join(generation, DIR_HASH_CACHE))
+    return datetime.datetime.fromtimestamp(mtime)
+
+
+def revalidate(force: bool = False, wait: bool = False):
+    """
+    Bring the cache up to date with the dataset and return
+    (generation, fresh). Only one process rebuilds at a time; while another
+    one does, the previous generation is returned with fresh=False, unless
+    `wait` is set or there is none yet, in which case we wait for it.
+    `force=True` forces a full rebuild.
     """
 
     # --------------------------------------------------
-    # 0. CHANGE DETECTION (JSON_ROOT + OBJ_ROOT)
+    # 0. CHANGE DETECTION (Merkle manifest of MOANA_ROOT)
     # --------------------------------------------------
-    json_hash = _compute_dir_hash(JSON_ROOT)
-    obj_hash = _compute_dir_hash(OBJ_ROOT)
+    # One walk of MOANA_ROOT feeds both change detection and the tree. It
+    # is split at the family level, and directories unchanged since the
+    # current generation's walk reuse its file entries.
+    roots = [MOANA_ROOT]
+    generation = current_generation()
+    previous = None
+    if generation is not None and not force and manifest.TRUST_DIR_MTIME:
+        previous = manifest.load_previous(
+            os.path.join(generation, MANIFEST_CACHE), os.path.join(generation, DIR_HASH_CACHE)
+        )
+    current_files, current_hashes, current_mtimes = manifest.scan_tree(roots, previous=previous)
 
-    current_manifest = {
-        "json_hash": json_hash,
-        "obj_hash": obj_hash,
-    }
+    if not force and _is_up_to_date(generation, current_hashes, roots):
+        return generation, True
 
-    old_manifest = _load_manifest()
-    dataset_changed = (
-        old_manifest.get("json_hash") != json_hash
-        or old_manifest.get("obj_hash") != obj_hash
-    )
+    build_lock = FileLock(os.path.join(CACHE_DIR, LOCK_FILE))
+    if not build_lock.acquire(blocking=False):
+        if generation is not None and not force and not wait:
+            print("[cache] Another process is rebuilding; serving the previous build")
+            return generation, False
+        print("[cache] Waiting for the rebuild in another process...")
+        build_lock.acquire()
 
-    # If forced or dataset changed, we clear all caches
-    if force or dataset_changed:
-        clear_cache()
-        # Recreate cache dir because clear_cache may remove it
-        os.makedirs(CACHE_DIR, exist_ok=True)
-        # We'll recompute everything and then save a new manifest.
+    try:
+        # A build may have finished while we were scanning or waiting.
+        generation = current_generation()
+        if force or not _is_up_to_date(generation, current_hashes, roots):
+            generation = _build_generation(
+                generation, current_files, current_hashes, current_mtimes, roots, force
+            )
+    finally:
+        build_lock.release()
 
-    # --------------------------------------------------
-    # 1. METADATA
-    # --------------------------------------------------
-    if os.path.exists(META_CACHE):
-        metadata = _load_feather(META_CACHE)
-    else:
-        metadata = load_metadata_json()
-        if metadata is None:
-            metadata = pd.DataFrame()
-        _save_feather(metadata, META_CACHE)
+    return generation, True
 
-    # --------------------------------------------------
-    # 2. ASSETS
-    # --------------------------------------------------
-    if os.path.exists(ASSET_CACHE):
-        assets = _load_feather(ASSET_CACHE)
-    else:
-        assets = load_obj_families()
-        if assets is None:
-            assets = pd.DataFrame()
-        _save_feather(assets, ASSET_CACHE)
 
-    # --------------------------------------------------
-    # 3. TREE STRUCTURE
-    # --------------------------------------------------
-    if os.path.exists(TREE_CACHE):
-        tree_df = _load_feather(TREE_CACHE)
-    else:
-        tree_df = build_tree_structure()
-        if tree_df is None:
-            tree_df = pd.DataFrame()
-        _save_feather(tree_df, TREE_CACHE)
+def load_all(force: bool = False):
+    """
+    Advanced, production-grade loader with caching and per-file change detection.
 
-    # --------------------------------------------------
-    # 4. TREEMAP DATA
-    # --------------------------------------------------
-    if os.path.exists(TREEMAP_CACHE):
-        treemap_data = _load_json(TREEMAP_CACHE)
-    else:
-        treemap_data = prepare_treemap_data(assets)
-        _save_json(treemap_data, TREEMAP_CACHE)
+    - Uses cached results if available and no tracked file changed.
+    - When files change, only the affected metadata/asset rows are
+      recomputed and patched into a new cache generation; derived
+      artifacts (tree, treemap, KPIs) are rebuilt from them.
+    - Only one process rebuilds at a time. The others serve the previous
+      generation, or wait for the rebuild when there is none yet.
+    - `force=True` forces a full rebuild.
 
-    # --------------------------------------------------
-    # 5. KPIs
-    # --------------------------------------------------
-    if os.path.exists(KPI_CACHE):
-        kpis = _load_json(KPI_CACHE)
-    else:
-        kpis = compute_kpis(assets, metadata)
-        _save_json(kpis, KPI_CACHE)
+    Returns:
+        metadata (LazyFrame),
+        assets (LazyFrame),
+        tree_df (LazyFrame),
+        kpis (dict),
+        treemap_data (dict).
+    """
+    generation, _ = revalidate(force)
+
+    # Frames are served memory-mapped from the committed generation, and
+    # columns are materialized only when something reads them.
+    return open_generation(generation)
+
+
+# --------------------------------------------------
+# MEMORY BENCHMARK
+# --------------------------------------------------
+
+def _synthetic_assets(rows: int, families: int = 200) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    family_ids = rng.integers(0, families, rows)
+    family = [f"isFamily{f:03d}" for f in family_ids]
+    polycount = rng.lognormal(9, 2, rows).astype(np.int64)
+    obj_size = rng.lognormal(1, 2, rows)
+    mtl_size = rng.lognormal(-5, 1, rows)
+    hier_size = rng.lognormal(-6, 1, rows)
+    return pd.DataFrame({
+        "variant_name": [f"{f}_variant{i}" for i, f in enumerate(family)],
+        "asset_family": family,
+        "polycount": polycount,
+        "triangles": polycount * 2,
+        "vertex_count": polycount + rng.integers(0, 1000, rows),
+        "arity_hist": [json.dumps({"4": int(p)}) for p in polycount],
+        "material_count": rng.integers(1, 40, rows),
+        "hierarchy_depth": rng.integers(0, 8, rows),
+        "folder_size_mb": obj_size + mtl_size + hier_size,
+        "obj_size_mb": obj_size,
+        "mtl_size_mb": mtl_size,
+        "hier_size_mb": hier_size,
+    })
+
+
+def _legacy_assets(assets: pd.DataFrame) -> pd.DataFrame:
+    """The assets frame as it used to be stored: plain columns, display strings and paths."""
+    columns = [column for column in ASSET_COLUMNS if column not in FILE_SIZE_COLUMNS]
+    df = pd.DataFrame({column: assets[column].tolist() for column in columns})
+    df["asset_path"] = [
+        (OBJ_ROOT / family / f"{variant}.obj").as_posix()
+        for family, variant in zip(df["asset_family"], df["variant_name"])
+    ]
+    for column in ("polycount", "triangles", "material_count", "hierarchy_depth"):
+        df[f"{column}_fmt"] = df[column].map(lambda n: f"{n:,}")
+    df["folder_size_fmt"] = df["folder_size_mb"].map(
+        lambda mb: f"{mb / 1024:.2f} GB" if mb >= 1024 else f"{mb:.2f} MB"
+    )
+    return df
 
-    # --------------------------------------------------
-    # 6. SAVE MANIFEST (for future change detection)
-    # --------------------------------------------------
-    _save_manifest(current_manifest)
 
-    # 7. EXPORT MAYA METADATA (only when rebuild happens)
-    if force or dataset_changed:
-        export_maya_metadata(assets, metadata)
+def benchmark_asset_memory(rows: int | None = None):
+    """
+    Print bytes per asset of the old and the compact assets frame, for the
+    current cache generation or, with `rows`, a synthetic dataset.
+    """
+    generation = current_generation()
+    if rows is None and generation is not None:
+        assets = _load_feather(os.path.join(generation, ASSET_CACHE))
+        source = os.path.basename(generation)
+    else:
+        assets = _synthetic_assets(rows or 100_000)
+        source = "synthetic"
+    if assets.empty:
+        print("[assets] No assets to measure")
+        return
+
+    before = _legacy_assets(assets).memory_usage(deep=True).sum() / len(assets)
+    after = compact_assets(assets).memory_usage(deep=True).sum() / len(assets)
+    print(
+        f"[assets] {len(assets)} assets ({source}) | "
+        f"before {before:.0f} bytes/asset | after {after:.0f} bytes/asset | "
+        f"{before / after:.1f}x smaller"
+    )
 
-    return metadata, assets, tree_df, kpis, treemap_data
+
+if __name__ == "__main__":
+    import sys
+    benchmark_asset_memory(int(sys.argv[1]) if len(sys.argv) > 1 else None)
@@ -0,0 +1,87 @@
+"""
+Density-aware sampling of scatter plots.
+
+Up to max_points the points are drawn as they are. Above it the plane is
+cut into a grid in log space (log10(1 + value) on both axes). The points
+of the sparsest cells stay individual markers (the outliers), whole cells
+at a time while they fit in max_points; the points of the denser cells are
+aggregated into one marker per cell with its count, mean position and
+value ranges. What goes to the browser is then bounded by max_points plus
+the number of grid cells. Sampling works on whatever points it is given,
+so a zoomed-in view re-samples only the points of the visible range.
+"""
+import os
+
+import numpy as np
+
+# Defaults, overridable per call or through the environment.
+SCATTER_MAX_POINTS = int(os.environ.get("MOANA_SCATTER_MAX_POINTS", "20000"))
+GRID = (96, 64)  # cells along x, y
+
+CELL_FIELDS = ("x", "y", "count", "x_min", "x_max", "y_min", "y_max")
+
+
+def log_scale(values) -> np.ndarray:
+    return np.log10(1 + np.clip(np.asarray(values, dtype=np.float64), 0, None))
+
+
+def in_range(x, y, x_range=None, y_range=None) -> np.ndarray:
+    """Mask of the points inside the (low, high) ranges; None is unbounded."""
+    mask = np.ones(len(x), dtype=bool)
+    for values, bounds in ((x, x_range), (y, y_range)):
+        if bounds is not None:
+            low, high = bounds
+            mask &= (values >= low) & (values <= high)
+    return mask
+
+
+def _cells(scaled: np.ndarray, count: int) -> np.ndarray:
+    low, high = scaled.min(), scaled.max()
+    if high <= low:
+        return np.zeros(len(scaled), dtype=np.int64)
+    return np.clip(((scaled - low) / (high - low) * count).astype(np.int64), 0, count - 1)
+
+
+def _empty_cells() -> dict:
+    return {field: np.zeros(0) for field in CELL_FIELDS}
+
+
+def sample(x, y, max_points: int = SCATTER_MAX_POINTS, grid=GRID):
+    """
+    Split a scatter into individual points and aggregated grid cells.
+    Returns (points, cells): the positions drawn as they are (ascending),
+    and a dict of per-cell arrays (CELL_FIELDS) for all the other points.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if len(x) <= max_points:
+        return np.arange(len(x)), _empty_cells()
+
+    lx, ly = log_scale(x), log_scale(y)
+    cell = _cells(lx, grid[0]) * grid[1] + _cells(ly, grid[1])
+    counts = np.bincount(cell, minlength=grid[0] * grid[1])
+
+    # Outliers: the points of the sparsest cells, whole cells at a time,
+    # as many as fit in max_points
+    occupied = np.flatnonzero(counts)
+    by_count = occupied[np.argsort(counts[occupied], kind="stable")]
+    kept = by_count[np.cumsum(counts[by_count]) <= max_points]
+    drawn = np.zeros(len(counts), dtype=bool)
+    drawn[kept] = True
+    points = np.flatnonzero(drawn[cell])
+
+    rest = np.flatnonzero(~drawn[cell])
+    rest = rest[np.argsort(cell[rest], kind="stable")]
+    rest_cells = cell[rest]
+    starts = np.flatnonzero(np.r_[True, rest_cells[1:] != rest_cells[:-1]])
+    counts = np.diff(np.r_[starts, len(rest)])
+    cells = {
+        "x": 10 ** (np.add.reduceat(lx[rest], starts) / counts) - 1,
+        "y": 10 ** (np.add.reduceat(ly[rest], starts) / counts) - 1,
+        "count": counts,
+        "x_min": np.minimum.reduceat(x[rest], starts),
+        "x_max": np.maximum.reduceat(x[rest], starts),
+        "y_min": np.minimum.reduceat(y[rest], starts),
+        "y_max": np.maximum.reduceat(y[rest], starts),
+    }
+    return points, cells
@@ -0,0 +1,113 @@
+"""
+Display formatting for asset rows.
+
+The cached assets frame holds numbers only; the strings the pages show
+(thousands separators, MB/GB sizes, OBJ paths) are produced here, a whole
+column at a time with Arrow compute kernels, for the rows being rendered.
+Results are Arrow-backed string Series.
+"""
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Count columns shown with thousands separators
+COUNT_COLUMNS = ["polycount", "triangles", "material_count", "hierarchy_depth"]
+
+# Columns of format_assets(), in display order
+DISPLAY_COLUMNS = [
+    "variant_name",
+    "asset_family",
+    *COUNT_COLUMNS,
+    "folder_size",
+    "asset_path",
+]
+
+
+def _series(array) -> pd.Series:
+    return pd.Series(array.to_pandas(types_mapper=pd.ArrowDtype), copy=False)
+
+
+def _strings(values) -> pa.Array:
+    if isinstance(values, (pa.Array, pa.ChunkedArray)):
+        return pc.cast(values, pa.string())
+    return pa.array(pd.Series(values, copy=False).astype(str), pa.string())
+
+
+def _digits(values, separators: bool) -> pa.Array:
+    """Non-negative integers as strings, optionally with thousands separators."""
+    rest = np.asarray(values, dtype=np.int64)
+    if not separators:
+        return pc.cast(pa.array(rest), pa.string())
+    text = pc.cast(pa.array(rest % 1000), pa.string())
+
+    # Append one 3-digit group per pass, from the right: `tail` is the
+    # zero-padded lower groups, `text` the result for values that end here.
+    tail = pc.utf8_lpad(text, width=3, padding="0")
+    rest = rest // 1000
+    while rest.any():
+        group = pc.cast(pa.array(rest % 1000), pa.string())
+        text = pc.if_else(pa.array(rest > 0), pc.binary_join_element_wise(group, tail, ","), text)
+        tail = pc.binary_join_element_wise(pc.utf8_lpad(group, width=3, padding="0"), tail, ",")
+        rest = rest // 1000
+    return text
+
+
+def _sizes(values) -> pa.Array:
+    mb = np.asarray(values, dtype=np.float64)
+    in_gb = mb >= 1024
+    hundredths = np.rint(np.where(in_gb, mb / 1024, mb) * 100).astype(np.int64)
+    whole = _digits(hundredths // 100, separators=False)
+    fraction = pc.utf8_lpad(_digits(hundredths % 100, separators=False), width=2, padding="0")
+    unit = pc.if_else(pa.array(in_gb), " GB", " MB")
+    return pc.binary_join_element_wise(pc.binary_join_element_wise(whole, fraction, "."), unit, "")
+
+
+def _paths(families, variants, obj_root: Path) -> pa.Array:
+    root = Path(obj_root).as_posix()
+    stems = pc.binary_join_element_wise(root, _strings(families), _strings(variants), "/")
+    return pc.binary_join_element_wise(stems, ".obj", "")
+
+
+def format_numbers(values) -> pd.Series:
+    """Counts with thousands separators: 1234567 -> '1,234,567'."""
+    return _series(_digits(values, separators=True))
+
+
+def format_sizes_mb(values) -> pd.Series:
+    """Sizes in MB with two decimals, in GB from 1024 MB: '12.50 MB', '1.25 GB'."""
+    return _series(_sizes(values))
+
+
+def asset_paths(families, variants, obj_root: Path) -> pd.Series:
+    """OBJ path of each variant, obj_root/<family>/<variant>.obj."""
+    return _series(_paths(families, variants, obj_root))
+
+
+def _display_table(rows, obj_root: Path) -> pa.Table:
+    """DISPLAY_COLUMNS for the rows of a DataFrame or an Arrow table."""
+    shown = {
+        "variant_name": _strings(rows["variant_name"]),
+        "asset_family": _strings(rows["asset_family"]),
+    }
+    for column in COUNT_COLUMNS:
+        shown[column] = _digits(rows[column], separators=True)
+    shown["folder_size"] = _sizes(rows["folder_size_mb"])
+    shown["asset_path"] = _paths(rows["asset_family"], rows["variant_name"], obj_root)
+    return pa.table(shown)
+
+
+def format_assets(rows: pd.DataFrame, obj_root: Path) -> pd.DataFrame:
+    """Display strings (DISPLAY_COLUMNS) for a few rows of the assets frame."""
+    if rows is None or rows.empty:
+        return pd.DataFrame(columns=DISPLAY_COLUMNS)
+    return _display_table(rows, obj_root).to_pandas()
+
+
+def format_records(rows: pa.Table, obj_root: Path) -> list:
+    """Display strings for rows of an Arrow table, as one dict per row (no pandas)."""
+    if rows.num_rows == 0:
+        return []
+    return _display_table(rows, obj_root).to_pylist()
@@ -0,0 +1,465 @@
+"""
+Streaming, incremental metadata export for Maya and PBRT pipeline tools.
+
+Sections are written to disk as they are produced: asset and metadata rows
+in chunks of records, and element, primitive, camera and light JSON copied
+byte for byte from the dataset rather than parsed and re-serialized (after
+a validity check; malformed files are skipped). Output is compact JSON.
+
+Each element and its primitives are stored as one content-addressed blob
+(blobs/<sha1[:2]>/<sha1>.json). EXPORT_MANIFEST maps every element to its
+blob and to the size and mtime of the source files it was built from (and
+the referenced primitive files that were missing), so a rebuild re-reads
+and re-emits only the elements whose sources changed or appeared. The
+consolidated views (maya_metadata.json, elements.json, primitives.json)
+refer to blobs instead of inlining them, and blobs nothing refers to are
+removed.
+
+INDEX_FILE records the byte offset and length of each top-level section
+of maya_metadata.json and of each value inside the blobs, so tools can seek
+to one element's or primitive's data and parse only that.
+"""
+import datetime
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+
+from data import display
+from data.json_scan import scan_json_counts
+from data.lock import atomic_path
+
+INDEX_FILE = "maya_metadata.index.json"
+EXPORT_MANIFEST = "export_manifest.json"
+BLOB_DIR = "blobs"
+
+RECORDS_CHUNK = 10_000
+COPY_BUFFER = 8 * 1024 * 1024
+PARSE_CHECK_BYTES = 64 * 1024 * 1024  # copied JSON up to this size is parsed first
+
+_SEPARATORS = (",", ":")
+
+
+class _JsonStream:
+    """Compact JSON object writer over a binary file that tracks byte offsets."""
+
+    def __init__(self, f):
+        self.f = f
+        self._first = []
+
+    def _write(self, text: str):
+        self.f.write(text.encode("utf-8"))
+
+    def begin_object(self):
+        self._write("{")
+        self._first.append(True)
+
+    def end_object(self):
+        self._write("}")
+        self._first.pop()
+
+    def key(self, key: str) -> int:
+        """Write a member name; returns the offset where its value starts."""
+        if not self._first[-1]:
+            self._write(",")
+        self._first[-1] = False
+        self._write(json.dumps(key) + ":")
+        return self.f.tell()
+
+    def value(self, obj) -> list:
+        start = self.f.tell()
+        self._write(json.dumps(obj, separators=_SEPARATORS))
+        return [start, self.f.tell() - start]
+
+    def raw(self, source) -> list:
+        """Copy an open binary file (already JSON) as the value."""
+        start = self.f.tell()
+        shutil.copyfileobj(source, self.f, COPY_BUFFER)
+        return [start, self.f.tell() - start]
+
+    def records(self, df, prepare=None) -> list:
+        """A DataFrame as a list of records, converted in chunks (each passed through `prepare`)."""
+        start = self.f.tell()
+        self._write("[")
+        if df is not None:
+            for i in range(0, len(df), RECORDS_CHUNK):
+                rows = df.iloc[i:i + RECORDS_CHUNK]
+                if prepare is not None:
+                    rows = prepare(rows)
+                chunk = rows.to_json(orient="records")[1:-1]
+                if chunk:
+                    if i:
+                        self._write(",")
+                    self._write(chunk)
+        self._write("]")
+        return [start, self.f.tell() - start]
+
+
+class _ExportFile:
+    """One export file, written to a temporary path and renamed on close."""
+
+    def __init__(self, path):
+        self.path = os.fspath(path)
+        self.tmp = f"{self.path}.tmp-{os.getpid()}"
+        self.f = open(self.tmp, "wb")
+        self.stream = _JsonStream(self.f)
+
+    def close(self, failed=False):
+        self.f.close()
+        if failed:
+            os.remove(self.tmp)
+        else:
+            os.replace(self.tmp, self.path)
+
+
+class _HashingWriter:
+    """File wrapper that hashes everything written through it."""
+
+    def __init__(self, f):
+        self.f = f
+        self.hasher = hashlib.sha1()
+
+    def write(self, data):
+        self.hasher.update(data)
+        return self.f.write(data)
+
+    def tell(self):
+        return self.f.tell()
+
+
+def _open_source(path):
+    try:
+        return open(path, "rb")
+    except OSError:
+        return None
+
+
+def _open_json_source(path):
+    """
+    Open a dataset JSON file to be copied as is, or return None if it is
+    missing or malformed. Files up to PARSE_CHECK_BYTES are parsed; larger
+    ones (primitive instance lists) are only checked by a json_scan pass
+    for an object or array that is closed, i.e. not truncated.
+    """
+    source = _open_source(path)
+    if source is None:
+        return None
+    try:
+        if os.fstat(source.fileno()).st_size <= PARSE_CHECK_BYTES:
+            json.loads(source.read())
+        else:
+            scan = scan_json_counts(path)
+            if scan["type"] == "scalar" or not scan["complete"]:
+                raise ValueError("truncated, or not an object or array")
+        source.seek(0)
+        return source
+    except (OSError, ValueError) as e:
+        source.close()
+        print(f"[export] Skipping malformed JSON {path}: {e}")
+        return None
+
+
+def _stat(path) -> list:
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def _stat_or_none(path):
+    """_stat of a file, or None if there is none."""
+    try:
+        return _stat(path)
+    except FileNotFoundError:
+        return None
+
+
+def _list_elements(json_root: Path):
+    """Yield (element name, element JSON path) for json/<element>/<element>.json."""
+    if not json_root.exists():
+        return
+    for element_dir in sorted(p for p in json_root.iterdir() if p.is_dir()):
+        element_json = element_dir / f"{element_dir.name}.json"
+        if element_json.exists():
+            yield element_dir.name, element_json
+
+
+def _primitive_sources(element_json: Path, json_root: Path, moana_root: Path):
+    """
+    ({primitive name: JSON path}, [missing paths]) of an element, or None
+    if its JSON can't be read. The missing paths are the places a primitive
+    file was looked for before it was found (or not at all), so that one
+    appearing there changes the element. The element JSON is parsed only
+    for this.
+    """
+    try:
+        with open(element_json, "r") as f:
+            elem_dict = json.load(f)
+    except Exception as e:
+        print(f"[export] Error reading element JSON {element_json}: {e}")
+        return None
+
+    primitives = {}
+    missing = []
+    for prim_name, prim_info in elem_dict.get("instancedPrimitiveJsonFiles", {}).items():
+        prim_file = prim_info.get("jsonFile")
+        if not prim_file:
+            continue
+        # jsonFile is relative to the dataset root ("json/<element>/...")
+        for base in (moana_root, json_root):
+            path = base / prim_file
+            if path.is_file():
+                primitives[prim_name] = path
+                break
+            missing.append(path)
+    return primitives, missing
+
+
+def _sources_unchanged(record: dict) -> bool:
+    """
+    True if every source file of a manifest record still has the recorded
+    size and mtime, and the ones recorded as missing still don't exist.
+    """
+    try:
+        return all(_stat_or_none(path) == stat for path, stat in record["sources"].items())
+    except OSError:
+        return False
+
+
+def _write_blob(exports_dir: Path, element_json: Path, primitives: dict, missing=()) -> dict:
+    """
+    Write {"element": ..., "primitives": {...}} as a content-addressed blob
+    and return its manifest record (blob path, sources, offsets). Sources
+    are {path: [size, mtime]}, with None for the `missing` primitive paths.
+    """
+    sources = {path.as_posix(): None for path in missing}
+    sources[element_json.as_posix()] = _stat(element_json)
+    entries = {"sections": {}, "primitives": {}}
+
+    blob_root = exports_dir / BLOB_DIR
+    blob_root.mkdir(parents=True, exist_ok=True)
+    tmp = blob_root / f"tmp-{os.getpid()}.json"
+    try:
+        with open(tmp, "wb") as f:
+            writer = _HashingWriter(f)
+            s = _JsonStream(writer)
+            s.begin_object()
+            _copy_member(s, "element", element_json, entries["sections"])
+            s.key("primitives")
+            s.begin_object()
+            for prim_name, prim_path in primitives.items():
+                sources[prim_path.as_posix()] = _stat(prim_path)
+                _copy_member(s, prim_name, prim_path, entries["primitives"])
+            s.end_object()
+            s.end_object()
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+    digest = writer.hasher.hexdigest()
+    blob = f"{BLOB_DIR}/{digest[:2]}/{digest}.json"
+    target = exports_dir / blob
+    if target.exists():
+        os.remove(tmp)
+    else:
+        target.parent.mkdir(exist_ok=True)
+        os.replace(tmp, target)
+    return {"blob": blob, "sources": sources, "entries": entries}
+
+
+def _load_manifest(exports_dir: Path) -> dict:
+    try:
+        with open(exports_dir / EXPORT_MANIFEST, "r") as f:
+            return json.load(f).get("elements", {})
+    except (OSError, ValueError):
+        return {}
+
+
+def _remove_unreferenced_blobs(exports_dir: Path, referenced: set):
+    blob_root = exports_dir / BLOB_DIR
+    if not blob_root.is_dir():
+        return
+    for path in blob_root.glob("*/*.json"):
+        if path.relative_to(exports_dir).as_posix() not in referenced:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def _copy_member(stream: _JsonStream, key: str, path, entries: dict):
+    source = _open_json_source(path)
+    if source is None:
+        return
+    with source:
+        stream.key(key)
+        entries[key] = stream.raw(source)
+
+
+def _copy_section(stream: _JsonStream, key: str, path, file_index: dict, section_index: dict = None):
+    """Copy a finished export file in as a section, shifting its offsets."""
+    stream.key(key)
+    with open(path, "rb") as source:
+        span = stream.raw(source)
+    file_index.setdefault("sections", {})[key] = span
+    for group, entries in (section_index or {}).items():
+        shifted = file_index.setdefault(group, {})
+        for name, (offset, length) in entries.items():
+            shifted[name] = [offset + span[0], length]
+
+
+def update_elements(exports_dir, json_root: Path, moana_root: Path) -> dict:
+    """
+    Bring the element blobs up to date with the dataset: only elements
+    whose element or primitive JSON changed (by size/mtime) are read and
+    re-emitted. Returns the manifest records {element: record}.
+    """
+    exports_dir = Path(exports_dir)
+    previous = _load_manifest(exports_dir)
+    records = {}
+    emitted = 0
+    for elem_name, element_json in _list_elements(json_root):
+        record = previous.get(elem_name)
+        if record is not None and _sources_unchanged(record) and (exports_dir / record["blob"]).exists():
+            records[elem_name] = record
+            continue
+        found = _primitive_sources(element_json, json_root, moana_root)
+        if found is None:
+            continue
+        records[elem_name] = _write_blob(exports_dir, element_json, *found)
+        emitted += 1
+
+    print(f"[export] {emitted} element blobs written, {len(records) - emitted} unchanged")
+    return records
+
+
+def _asset_records(rows, obj_root: Path):
+    """
+    Asset rows as exported: with their OBJ path, sizes widened back from
+    float32. The per-file sizes kept for the treemap are not exported.
+    """
+    if rows.empty:
+        return rows
+    rows = rows.drop(columns=["obj_size_mb", "mtl_size_mb", "hier_size_mb"], errors="ignore")
+    return rows.assign(
+        folder_size_mb=rows["folder_size_mb"].astype("float64").round(4),
+        asset_path=display.asset_paths(rows["asset_family"], rows["variant_name"], obj_root).to_numpy(),
+    )
+
+
+def write_exports(
+    exports_dir,
+    assets_df,
+    metadata_df,
+    moana_root: Path,
+    json_root: Path,
+    obj_root: Path,
+) -> dict:
+    """
+    Write assets.json, metadata.json, cameras.json, lights.json, the
+    element blobs (incrementally) with EXPORT_MANIFEST, the reference views
+    elements.json and primitives.json, and maya_metadata.json, then
+    INDEX_FILE. Returns the index: {file: {"sections" | "primitives" |
+    "cameras": {key: [offset, length]}}}.
+    """
+    exports_dir = Path(exports_dir)
+    index = {}
+
+    def export_file(name, write):
+        out = _ExportFile(exports_dir / name)
+        try:
+            entries = write(out.stream)
+        except BaseException:
+            out.close(failed=True)
+            raise
+        out.close()
+        if isinstance(entries, dict):
+            index[name] = entries
+
+    # ------------------------------------------------------------
+    # 1. ASSETS (from OBJ/MTL/HIER) + 2. METADATA (from JSON_ROOT)
+    # ------------------------------------------------------------
+    export_file("assets.json", lambda s: s.records(assets_df, lambda rows: _asset_records(rows, obj_root)))
+    export_file("metadata.json", lambda s: s.records(metadata_df))
+
+    # ------------------------------------------------------------
+    # 3. ELEMENTS + 4. PRIMITIVES (json/<element>/...), as blobs
+    # ------------------------------------------------------------
+    records = update_elements(exports_dir, json_root, moana_root)
+    for record in records.values():
+        index[record["blob"]] = record["entries"]
+
+    element_refs = {name: record["blob"] for name, record in records.items()}
+    primitive_refs = {
+        f"{name}/{prim_name}": {"blob": record["blob"], "offset": offset, "length": length}
+        for name, record in records.items()
+        for prim_name, (offset, length) in record["entries"]["primitives"].items()
+    }
+    export_file("elements.json", lambda s: s.value(element_refs))
+    export_file("primitives.json", lambda s: s.value(primitive_refs))
+
+    # ------------------------------------------------------------
+    # 5. CAMERAS + 6. LIGHTS
+    # ------------------------------------------------------------
+    def write_cameras(s):
+        entries = {}
+        s.begin_object()
+        cam_dir = json_root / "cameras"
+        if cam_dir.exists():
+            for cam_file in sorted(cam_dir.glob("*.json")):
+                _copy_member(s, cam_file.stem, cam_file, entries)
+        s.end_object()
+        return {"cameras": entries}
+
+    def write_lights(s):
+        source = _open_json_source(json_root / "lights" / "lights.json")
+        if source is None:
+            s.value({})
+            return
+        with source:
+            s.raw(source)
+
+    export_file("cameras.json", write_cameras)
+    export_file("lights.json", write_lights)
+
+    # ------------------------------------------------------------
+    # 7. CONSOLIDATED EXPORT (small sections copied, elements referenced)
+    # ------------------------------------------------------------
+    def write_consolidated(s):
+        entries = {}
+        s.begin_object()
+        s.key("timestamp")
+        s.value(datetime.datetime.now().isoformat())
+        s.key("paths")
+        s.value({
+            "MOANA_ROOT": moana_root.as_posix(),
+            "JSON_ROOT": json_root.as_posix(),
+            "OBJ_ROOT": obj_root.as_posix(),
+        })
+        _copy_section(s, "assets", exports_dir / "assets.json", entries)
+        _copy_section(s, "metadata", exports_dir / "metadata.json", entries)
+        _copy_section(s, "elements", exports_dir / "elements.json", entries)
+        _copy_section(s, "primitives", exports_dir / "primitives.json", entries)
+        _copy_section(s, "cameras", exports_dir / "cameras.json", entries, index["cameras.json"])
+        _copy_section(s, "lights", exports_dir / "lights.json", entries)
+        s.end_object()
+        return entries
+
+    export_file("maya_metadata.json", write_consolidated)
+
+    # The manifest goes last: it only ever names blobs that exist.
+    with atomic_path(exports_dir / EXPORT_MANIFEST) as tmp:
+        with open(tmp, "w") as f:
+            json.dump({"format": 1, "elements": records}, f)
+    with atomic_path(exports_dir / INDEX_FILE) as tmp:
+        with open(tmp, "w") as f:
+            json.dump({"format": 1, "files": index}, f)
+    _remove_unreferenced_blobs(exports_dir, set(element_refs.values()))
+    return index
+
+
+def read_entry(exports_dir, index: dict, file_name: str, group: str, key: str):
+    """Parse one indexed value (e.g. an element) without reading the rest of the file."""
+    offset, length = index["files"][file_name][group][key]
+    with open(Path(exports_dir) / file_name, "rb") as f:
+        f.seek(offset)
+        return json.loads(f.read(length))
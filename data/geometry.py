@@ -0,0 +1,141 @@
+"""
+Shared geometry-stats store.
+
+OBJ statistics are keyed by resolved path + size + mtime_ns. Results are
+memoized for the current process and persisted to a small SQLite database,
+so the dashboard loader and metadata_extractor both reuse them across runs
+and each OBJ is parsed at most once per change.
+"""
+import atexit
+import json
+import os
+import sqlite3
+import threading
+
+from data.obj_scan import scan_obj_stats
+
+STORE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "_cache", "geometry.sqlite")
+
+# Bump whenever the scanner starts producing different stats, so older
+# stored entries are treated as misses and rescanned.
+STATS_VERSION = 2
+
+# Number of new entries buffered before they are committed to disk.
+FLUSH_EVERY = 500
+
+_lock = threading.Lock()
+_memo = {}
+_pending = []
+_conn = None
+_counters = {"memo_hits": 0, "store_hits": 0, "scanned": 0}
+
+
+def _connect():
+    global _conn
+    if _conn is None:
+        os.makedirs(os.path.dirname(STORE_PATH), exist_ok=True)
+        _conn = sqlite3.connect(STORE_PATH, timeout=60, check_same_thread=False)
+        _conn.execute(
+            "CREATE TABLE IF NOT EXISTS obj_stats ("
+            " path TEXT PRIMARY KEY,"
+            " size INTEGER NOT NULL,"
+            " mtime_ns INTEGER NOT NULL,"
+            " version INTEGER NOT NULL,"
+            " stats TEXT NOT NULL)"
+        )
+        _conn.commit()
+    return _conn
+
+
+def file_key(path) -> tuple:
+    """Return (resolved_path, size, mtime_ns). Raises OSError if missing."""
+    resolved = os.path.realpath(path)
+    st = os.stat(resolved)
+    return resolved, st.st_size, st.st_mtime_ns
+
+
+def _read_stored(key):
+    resolved, size, mtime_ns = key
+    with _lock:
+        row = _connect().execute(
+            "SELECT size, mtime_ns, version, stats FROM obj_stats WHERE path = ?",
+            (resolved,),
+        ).fetchone()
+    if row is None or tuple(row[:3]) != (size, mtime_ns, STATS_VERSION):
+        return None
+    return json.loads(row[3])
+
+
+def remember(key, stats: dict):
+    """Record stats computed elsewhere (e.g. in a worker) for a file key."""
+    with _lock:
+        _memo[key] = stats
+        _pending.append((key[0], key[1], key[2], STATS_VERSION, json.dumps(stats)))
+        should_flush = len(_pending) >= FLUSH_EVERY
+    if should_flush:
+        flush()
+
+
+def flush():
+    """Commit buffered entries to the persistent store."""
+    with _lock:
+        if not _pending:
+            return
+        conn = _connect()
+        conn.executemany("INSERT OR REPLACE INTO obj_stats VALUES (?, ?, ?, ?, ?)", _pending)
+        conn.commit()
+        _pending.clear()
+
+
+def lookup(key):
+    """Return cached stats for a file key without scanning, or None."""
+    with _lock:
+        stats = _memo.get(key)
+        if stats is not None:
+            _counters["memo_hits"] += 1
+            return stats
+
+    stats = _read_stored(key)
+    if stats is not None:
+        with _lock:
+            _counters["store_hits"] += 1
+            _memo[key] = stats
+    return stats
+
+
+def compute_obj_stats(path) -> dict:
+    """Scan an OBJ and return its stats (no caching, safe in any process)."""
+    stats = scan_obj_stats(path)
+    stats.pop("seconds", None)
+    return stats
+
+
+def get_obj_stats(obj_path) -> dict:
+    """
+    Return stats for an OBJ, scanning it only when the file is new or has
+    changed since it was last seen. Raises OSError if the file is missing.
+    """
+    key = file_key(obj_path)
+    stats = lookup(key)
+    if stats is None:
+        stats = compute_obj_stats(key[0])
+        with _lock:
+            _counters["scanned"] += 1
+        remember(key, stats)
+    return stats
+
+
+def summary() -> dict:
+    """Counters for this process: memo hits, store hits and fresh scans."""
+    with _lock:
+        return dict(_counters)
+
+
+def add_counts(counts: dict):
+    """Add counters reported by a worker process (see summary) to this one's."""
+    with _lock:
+        for name, count in counts.items():
+            _counters[name] += count
+
+
+atexit.register(flush)
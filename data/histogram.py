@@ -0,0 +1,69 @@
+"""
+Server-side histograms of asset columns.
+
+Values are binned with NumPy into log-spaced bins (on log10(1 + value), so
+zeros have a bin) or quantile bins, and counted per bin and group (asset
+family) in one bincount. For hover text the largest members of every
+non-empty (group, bin) cell are picked from one sort. What goes to the
+browser is groups x bins counts, whatever the number of variants.
+"""
+import numpy as np
+
+LOG = "log"
+QUANTILE = "quantile"
+
+
+def bin_edges(values, mode: str = LOG, bins: int = 30) -> np.ndarray:
+    """Ascending bin edges covering `values` (at least one bin)."""
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) == 0:
+        return np.array([0.0, 1.0])
+    if mode == QUANTILE:
+        edges = np.unique(np.quantile(values, np.linspace(0, 1, bins + 1)))
+    elif mode == LOG:
+        top = np.log10(max(values.max(), 0) + 1)
+        edges = 10 ** np.linspace(0, top, bins + 1) - 1
+        # The round trip through log10 can land just below the maximum
+        edges[-1] = max(values.max(), 0)
+        edges = np.unique(edges)
+    else:
+        raise ValueError(f"Unknown bin mode {mode!r}")
+    if len(edges) < 2:
+        edges = np.array([edges[0], edges[0] + 1])
+    return edges
+
+
+def assign_bins(values, edges: np.ndarray) -> np.ndarray:
+    """Bin of every value; the last bin includes its upper edge."""
+    bins = np.searchsorted(edges, np.asarray(values, dtype=np.float64), side="right") - 1
+    return np.clip(bins, 0, len(edges) - 2)
+
+
+def histogram(values, groups, group_count: int, edges: np.ndarray, top: int = 3):
+    """
+    Count `values` per (group, bin).
+    Returns (counts, tops): counts is a group_count x bins array, tops maps
+    (group, bin) to the positions of its `top` largest values, largest first.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    bin_count = len(edges) - 1
+    cells = np.asarray(groups, dtype=np.int64) * bin_count + assign_bins(values, edges)
+    counts = np.bincount(cells, minlength=group_count * bin_count).reshape(group_count, bin_count)
+
+    # Cells ascending, largest value first within a cell
+    order = np.lexsort((-values, cells))
+    sorted_cells = cells[order]
+    starts = np.flatnonzero(np.r_[True, sorted_cells[1:] != sorted_cells[:-1]])
+    tops = {}
+    for start in starts.tolist():
+        cell = int(sorted_cells[start])
+        group, bin_ = divmod(cell, bin_count)
+        tops[(group, bin_)] = order[start:start + min(top, counts[group, bin_])]
+    return counts, tops
+
+
+def bin_members(values, edges: np.ndarray, bin_: int) -> np.ndarray:
+    """Positions of the values in one bin, largest value first."""
+    values = np.asarray(values, dtype=np.float64)
+    members = np.flatnonzero(assign_bins(values, edges) == bin_)
+    return members[np.argsort(-values[members], kind="stable")]
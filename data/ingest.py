@@ -0,0 +1,99 @@
+"""
+Execution helpers for dataset ingestion.
+
+Files are grouped into batches scheduled largest-first, then handed to a
+thread pool, a process pool or a plain loop. Parsing OBJ/MTL/HIER/JSON text
+is CPU-bound Python, so "processes" is the mode that actually uses all cores;
+"threads" and "serial" are kept for I/O-bound roots and for debugging.
+
+Forking a process that runs other threads (the GUI server, the cache's
+background revalidation) can copy locks held by those threads into the
+children, which then hang. Process pools are therefore started with
+"spawn" whenever more than one thread is running; the single-threaded
+command-line extractor keeps the platform default.
+"""
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+INGEST_MODES = ("processes", "threads", "serial")
+
+# Defaults, overridable per call or through the environment.
+INGEST_MODE = os.environ.get("MOANA_INGEST_MODE", "processes")
+INGEST_WORKERS = int(os.environ.get("MOANA_INGEST_WORKERS", "0")) or None
+
+# Small files are packed together until a batch holds about this many bytes,
+# so per-task overhead stays low without starving the pool.
+BATCH_TARGET_BYTES = 64 * 1024 * 1024
+BATCH_MAX_ITEMS = 256
+
+
+def resolve_mode(mode=None) -> str:
+    mode = mode or INGEST_MODE
+    if mode not in INGEST_MODES:
+        raise ValueError(f"Unknown ingest mode {mode!r}, expected one of {INGEST_MODES}")
+    return mode
+
+
+def resolve_workers(workers=None):
+    workers = workers or INGEST_WORKERS
+    if workers and sys.platform == "win32":
+        # ProcessPoolExecutor refuses more than 61 workers on Windows.
+        workers = min(workers, 61)
+    return workers
+
+
+def pool_context():
+    """Start method context for process pools: "spawn" when other threads run (see above)."""
+    if threading.active_count() > 1:
+        return multiprocessing.get_context("spawn")
+    return None
+
+
+def make_batches(items, sizes, target_bytes=BATCH_TARGET_BYTES, max_items=BATCH_MAX_ITEMS):
+    """
+    Group items into batches, largest first.
+    Items at or above target_bytes get a batch of their own so the biggest
+    files start immediately instead of becoming the tail of the run.
+    """
+    order = sorted(range(len(items)), key=lambda i: sizes[i], reverse=True)
+
+    batches = []
+    current = []
+    current_bytes = 0
+    for i in order:
+        current.append(items[i])
+        current_bytes += sizes[i]
+        if current_bytes >= target_bytes or len(current) >= max_items:
+            batches.append(current)
+            current = []
+            current_bytes = 0
+    if current:
+        batches.append(current)
+    return batches
+
+
+def run_batches(fn, batches, mode=None, workers=None):
+    """
+    Apply fn to every batch and yield its results as they complete.
+    fn must be a module-level function when mode is "processes".
+    """
+    mode = resolve_mode(mode)
+    workers = resolve_workers(workers)
+
+    if mode == "serial" or len(batches) <= 1:
+        for batch in batches:
+            yield fn(batch)
+        return
+
+    if mode == "processes":
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=pool_context())
+    else:
+        pool = ThreadPoolExecutor(max_workers=workers)
+    with pool:
+        # Submission order is largest-first, which is the order workers pick up.
+        futures = [pool.submit(fn, batch) for batch in batches]
+        for future in as_completed(futures):
+            yield future.result()
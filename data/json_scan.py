@@ -0,0 +1,273 @@
+"""
+Streaming count-only JSON scanner.
+
+Instanced-primitive JSON files can hold millions of transform matrices, yet
+the extractor only needs their top-level keys and how many entries each
+value holds. This scanner reads the file in blocks and tracks structure with
+NumPy (quotes, brackets, commas and colons outside strings, and the depth of
+each), so memory stays at one block no matter how large the file is.
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+CHUNK_SIZE = 8 * 1024 * 1024
+
+_QUOTE = ord('"')
+_BACKSLASH = ord("\\")
+_COLON = ord(":")
+_COMMA = ord(",")
+_OPENERS = b"{["
+_CLOSERS = b"}]"
+_WHITESPACE = b" \t\r\n"
+
+_STRUCTURAL = np.zeros(256, dtype=bool)
+_STRUCTURAL[list(b"{}[],:")] = True
+_DELTA = np.zeros(256, dtype=np.int64)
+_DELTA[list(_OPENERS)] = 1
+_DELTA[list(_CLOSERS)] = -1
+
+
+def _real_quotes(chunk: bytes, buf: np.ndarray, carried_backslashes: int) -> np.ndarray:
+    """Positions of quotes that are not escaped by an odd run of backslashes."""
+    quotes = np.flatnonzero(buf == _QUOTE)
+    if not len(quotes) or (carried_backslashes == 0 and b"\\" not in chunk):
+        return quotes
+
+    keep = np.ones(len(quotes), dtype=bool)
+    preceded = np.flatnonzero(buf[np.maximum(quotes - 1, 0)] == _BACKSLASH)
+    candidates = [i for i in preceded if quotes[i] > 0]
+    if quotes[0] == 0 and carried_backslashes:
+        candidates.insert(0, 0)
+
+    for i in candidates:
+        j = int(quotes[i]) - 1
+        run = 0
+        while j >= 0 and chunk[j] == _BACKSLASH:
+            run += 1
+            j -= 1
+        if j < 0:
+            run += carried_backslashes
+        if run % 2:
+            keep[i] = False
+    return quotes[keep]
+
+
+def _first_non_ws(chunk: bytes, start: int):
+    """First non-whitespace byte at or after start, or None at chunk end."""
+    while start < len(chunk):
+        rest = chunk[start:start + 256].lstrip(_WHITESPACE)
+        if rest:
+            return rest[0]
+        start += 256
+    return None
+
+
+def scan_json_counts(path, chunk_size: int = CHUNK_SIZE) -> dict:
+    """
+    Scan a JSON file without building its values. Returns:
+    - type:   "object", "array" or "scalar" (the top-level value)
+    - length: number of top-level keys or array elements
+    - keys:   for objects, {key: entries in its value} where the entry count
+              is the length of an array or object value and None for scalars
+    - complete: whether every bracket and string opened was closed, i.e. the
+              file is not truncated (the values themselves are not checked)
+    """
+    top = None
+    depth = 0
+    in_string = False
+    carried_backslashes = 0
+
+    # Top-level object state: one slot per key, in file order.
+    keys = []
+    commas = []
+    is_container = []
+    non_empty = []
+    key_open = False
+    key_partial = b""
+    last_string = b""
+
+    # Top-level array state.
+    top_commas = 0
+    top_non_empty = False
+
+    # Slot (key index, or "top") whose container opened at a chunk end and
+    # still needs its first byte checked for emptiness.
+    pending_empty = None
+
+    def mark_non_empty(slot, byte):
+        nonlocal top_non_empty
+        value = byte not in _CLOSERS
+        if slot == "top":
+            top_non_empty = value
+        else:
+            non_empty[slot] = value
+
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            buf = np.frombuffer(chunk, dtype=np.uint8)
+
+            if top is None:
+                top = _first_non_ws(chunk, 0)
+            if pending_empty is not None:
+                byte = _first_non_ws(chunk, 0)
+                if byte is not None:
+                    mark_non_empty(pending_empty, byte)
+                    pending_empty = None
+
+            # Quotes toggle string state; structural bytes count only outside strings.
+            quotes = _real_quotes(chunk, buf, carried_backslashes)
+            start_state = int(in_string)
+            structural = np.flatnonzero(_STRUCTURAL[buf])
+            quotes_before = np.searchsorted(quotes, structural)
+            structural = structural[(quotes_before + start_state) % 2 == 0]
+
+            kinds = buf[structural]
+            delta = _DELTA[kinds]
+            depth_after = depth + np.cumsum(delta)
+            depth_before = depth_after - delta
+
+            if top == _OPENERS[0]:
+                # Depth-1 strings are keys (or scalar values); keys are the
+                # last string closed before each depth-1 colon.
+                cum = np.concatenate(([depth], depth_after))
+                quote_depth = cum[np.searchsorted(structural, quotes)]
+                opening = (np.arange(len(quotes)) + start_state) % 2 == 0
+                colon_pos = structural[(kinds == _COLON) & (depth_before == 1)]
+
+                events = [(int(p), 0 if o else 1) for p, o in zip(quotes[quote_depth == 1], opening[quote_depth == 1])]
+                events += [(int(p), 2) for p in colon_pos]
+                events.sort()
+
+                string_start = 0
+                for pos, kind in events:
+                    if kind == 0:
+                        key_open, key_partial, string_start = True, b"", pos + 1
+                    elif kind == 1:
+                        last_string = key_partial + chunk[string_start:pos]
+                        key_open, key_partial = False, b""
+                    else:
+                        keys.append(json.loads(b'"' + last_string + b'"'))
+                        commas.append(0)
+                        is_container.append(False)
+                        non_empty.append(False)
+                if key_open:
+                    key_partial += chunk[string_start:]
+
+                first_key = len(keys) - len(colon_pos)
+
+                def slot_of(positions):
+                    return first_key + np.searchsorted(colon_pos, positions, side="right") - 1
+
+                # Entries of each key's value are separated by depth-2 commas.
+                comma_pos = structural[(kinds == _COMMA) & (depth_before == 2)]
+                if len(comma_pos):
+                    slots = slot_of(comma_pos)
+                    for slot, n in zip(*np.unique(slots[slots >= 0], return_counts=True)):
+                        commas[slot] += int(n)
+
+                # Values that are arrays/objects open at depth 1.
+                opens = structural[(delta == 1) & (depth_before == 1)]
+                for pos, slot in zip(opens, slot_of(opens)):
+                    if slot < 0:
+                        continue
+                    is_container[slot] = True
+                    byte = _first_non_ws(chunk, int(pos) + 1)
+                    if byte is None:
+                        pending_empty = int(slot)
+                    else:
+                        mark_non_empty(int(slot), byte)
+
+            elif top == _OPENERS[1]:
+                top_commas += int(((kinds == _COMMA) & (depth_before == 1)).sum())
+                opens = structural[(delta == 1) & (depth_before == 0)]
+                if len(opens):
+                    byte = _first_non_ws(chunk, int(opens[0]) + 1)
+                    if byte is None:
+                        pending_empty = "top"
+                    else:
+                        mark_non_empty("top", byte)
+
+            if len(depth_after):
+                depth = int(depth_after[-1])
+            in_string = (start_state + len(quotes)) % 2 == 1
+
+            trailing = len(chunk) - len(chunk.rstrip(b"\\"))
+            carried_backslashes = trailing + carried_backslashes if trailing == len(chunk) else trailing
+
+    complete = depth == 0 and not in_string
+    if top == _OPENERS[0]:
+        counts = {
+            key: (n + int(ne) if container else None)
+            for key, n, container, ne in zip(keys, commas, is_container, non_empty)
+        }
+        return {"type": "object", "length": len(keys), "keys": counts, "complete": complete}
+    if top == _OPENERS[1]:
+        return {"type": "array", "length": top_commas + int(top_non_empty), "keys": {}, "complete": complete}
+    return {"type": "scalar", "length": 0, "keys": {}, "complete": complete}
+
+
+# ---------------------------------------------------------
+# Benchmark against json.load on a synthetic primitive file
+# ---------------------------------------------------------
+
+def write_synthetic_primitive(path, archives=8, instances=100_000):
+    """Write an archive-style primitive file: {obj_path: {instance: [16 floats]}}."""
+    rng = np.random.default_rng(0)
+    with open(path, "w") as f:
+        f.write("{")
+        for a in range(archives):
+            if a:
+                f.write(",")
+            f.write(f'"obj/isSynthetic/archive{a}.obj": {{')
+            for i in range(instances):
+                matrix = ",".join(f"{v:.6f}" for v in rng.random(16))
+                f.write(f'{"," if i else ""}"inst_{i}": [{matrix}]')
+            f.write("}")
+        f.write("}")
+
+
+def _measure(fn, path):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn(path)
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, seconds, peak
+
+
+def _json_load_counts(path):
+    with open(path, "r") as f:
+        data = json.load(f)
+    return {key: len(value) for key, value in data.items()}
+
+
+def benchmark(path=None, archives=8, instances=100_000):
+    """Compare scan_json_counts with json.load (time and peak Python memory)."""
+    if path is None:
+        path = os.path.join(tempfile.gettempdir(), "moana_synthetic_primitive.json")
+        write_synthetic_primitive(path, archives, instances)
+
+    size_mb = os.path.getsize(path) / (1024 * 1024)
+    reference, load_seconds, load_peak = _measure(_json_load_counts, path)
+    scanned, scan_seconds, scan_peak = _measure(scan_json_counts, path)
+
+    print(
+        f"[json_scan] {os.path.basename(path)}: {size_mb:.1f} MB | "
+        f"json.load {load_seconds:.2f}s, peak {load_peak / (1024 * 1024):.1f} MB | "
+        f"scan {scan_seconds:.2f}s, peak {scan_peak / (1024 * 1024):.1f} MB | "
+        f"counts match: {scanned['keys'] == reference}"
+    )
+
+
+if __name__ == "__main__":
+    benchmark(sys.argv[1] if len(sys.argv) > 1 else None)
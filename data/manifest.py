@@ -0,0 +1,255 @@
+"""
+Merkle manifest for incremental rebuilds.
+
+The dataset is walked with os.scandir, reusing the stat results carried by
+each DirEntry. The top SPLIT_DEPTH levels (the root, json/obj, then the
+families) are listed by the caller and every subtree below them is walked
+in parallel. Every directory gets a hash of its files' (name, size,
+mtime_ns) and of its subdirectories' hashes. The per-directory hashes and
+mtimes and the per-file entries are persisted, so the next start compares
+hashes top-down, skips unchanged subtrees and diffs files only inside the
+directories that changed.
+
+Every file is stat'ed on every walk by default. With
+MOANA_TRUST_DIR_MTIME=1 a directory whose mtime is the recorded one reuses
+its recorded file entries instead: adding, removing or renaming a file
+changes the directory's mtime, but rewriting or touching a file in place
+does not, so only turn it on for datasets whose files are never edited in
+place (or rebuild with force=True after such edits).
+
+The stats computed from each file live in the cached frames (assets rows
+keyed by "<family>/<variant>", metadata rows keyed by __json_file) and in
+the geometry store.
+"""
+import hashlib
+import os
+import posixpath
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from data.lock import atomic_path
+
+# Threads for walking subtrees; scandir/stat release the GIL.
+WALK_WORKERS = int(os.environ.get("MOANA_WALK_WORKERS", "16"))
+# Levels listed before subtrees go to the pool (root -> json/obj -> families).
+SPLIT_DEPTH = 2
+# Reuse a directory's recorded file entries while its mtime is unchanged.
+# Opt-in: in-place edits do not change the directory mtime (see above).
+TRUST_DIR_MTIME = os.environ.get("MOANA_TRUST_DIR_MTIME", "0") == "1"
+# Directories modified this close to a walk are not trusted on the next one:
+# a change within the same mtime tick would not show.
+RACY_NS = 2_000_000_000
+
+
+class _Walk:
+    """State of one scan_tree call, shared by the walking threads."""
+
+    def __init__(self, previous):
+        self.previous = previous or {}
+        self.started_ns = time.time_ns()
+        self.files = {}
+        self.hashes = {}
+        self.mtimes = {}
+        self.reused = set()
+
+    def list_dir(self, path):
+        """(own files {name: (size, mtime_ns)}, subdirectory entries) of one directory."""
+        key = Path(path).as_posix()
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            mtime_ns = None
+        recorded = self.previous.get(key)
+        reuse = mtime_ns is not None and recorded is not None and recorded[0] == mtime_ns
+        if mtime_ns is not None and mtime_ns < self.started_ns - RACY_NS:
+            self.mtimes[key] = mtime_ns
+
+        own_files = {}
+        subdirs = []
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry)
+                    elif reuse and entry.name in recorded[1]:
+                        own_files[entry.name] = recorded[1][entry.name]
+                    else:
+                        st = entry.stat(follow_symlinks=False)
+                        own_files[entry.name] = (st.st_size, st.st_mtime_ns)
+        except OSError as e:
+            print(f"[manifest] Error scanning {path}: {e}")
+        if reuse:
+            self.reused.add(key)
+        return own_files, subdirs
+
+    def finish_dir(self, path, own_files, child_hashes: dict) -> str:
+        """Record a directory and return its hash."""
+        hasher = hashlib.sha1()
+        for name in sorted(own_files):
+            size, mtime_ns = own_files[name]
+            hasher.update(f"f|{name}|{size}|{mtime_ns}\n".encode("utf-8"))
+        for name in sorted(child_hashes):
+            hasher.update(f"d|{name}|{child_hashes[name]}\n".encode("utf-8"))
+        digest = hasher.hexdigest()
+
+        key = Path(path).as_posix()
+        self.files[key] = own_files
+        self.hashes[key] = digest
+        return digest
+
+
+def _walk_dir(walk: _Walk, path) -> str:
+    """Walk one directory and its subtree in this thread and return its hash."""
+    own_files, subdirs = walk.list_dir(path)
+    child_hashes = {entry.name: _walk_dir(walk, entry.path) for entry in subdirs}
+    return walk.finish_dir(path, own_files, child_hashes)
+
+
+def _walk_split(walk: _Walk, path, pool, depth: int):
+    """
+    List the top `depth` levels under `path` here and submit the subtrees
+    below them to `pool`. Returns a function that waits for them and returns
+    the hash of `path`; pool threads never wait on each other.
+    """
+    own_files, subdirs = walk.list_dir(path)
+    if depth <= 1:
+        pending = {entry.name: pool.submit(_walk_dir, walk, entry.path).result for entry in subdirs}
+    else:
+        pending = {entry.name: _walk_split(walk, entry.path, pool, depth - 1) for entry in subdirs}
+    return lambda: walk.finish_dir(path, own_files, {name: result() for name, result in pending.items()})
+
+
+def scan_tree(roots, workers: int = WALK_WORKERS, previous: dict = None):
+    """
+    Walk the given roots and return (files, hashes, mtimes):
+    - files:  {dir_posix: {name: (size, mtime_ns)}}
+    - hashes: {dir_posix: hexdigest}
+    - mtimes: {dir_posix: mtime_ns}, for the directories trusted next time
+    `previous` is load_previous() of the last walk; with TRUST_DIR_MTIME its
+    entries are reused for directories whose mtime is unchanged.
+    """
+    walk = _Walk(previous if TRUST_DIR_MTIME else None)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        finish = [_walk_split(walk, os.fspath(root), pool, SPLIT_DEPTH) for root in roots if Path(root).exists()]
+        for done in finish:
+            done()
+    if walk.previous:
+        print(f"[manifest] {len(walk.reused)} of {len(walk.files)} directories unchanged (by mtime)")
+    return walk.files, walk.hashes, walk.mtimes
+
+
+def changed_dirs(old_hashes: dict, new_hashes: dict, roots) -> set:
+    """
+    Compare directory hashes top-down from the roots and return every
+    directory (present before, now, or both) whose hash differs.
+    Unchanged subtrees are never descended into.
+    """
+    children = {}
+    for d in set(old_hashes) | set(new_hashes):
+        children.setdefault(posixpath.dirname(d), []).append(d)
+
+    dirty = set()
+    stack = [Path(root).as_posix() for root in roots]
+    while stack:
+        d = stack.pop()
+        if old_hashes.get(d) == new_hashes.get(d):
+            continue
+        dirty.add(d)
+        stack.extend(children.get(d, ()))
+    return dirty
+
+
+def diff(old_files: dict, new_files: dict, dirs) -> tuple:
+    """Return (added, modified, removed) file paths inside the given directories."""
+    added, modified, removed = set(), set(), set()
+    for d in dirs:
+        old = old_files.get(d, {})
+        new = new_files.get(d, {})
+        added.update(f"{d}/{name}" for name in new.keys() - old.keys())
+        removed.update(f"{d}/{name}" for name in old.keys() - new.keys())
+        modified.update(
+            f"{d}/{name}" for name in new.keys() & old.keys() if new[name] != old[name]
+        )
+    return added, modified, removed
+
+
+def iter_paths(files: dict):
+    """Yield the full posix path of every file in a files mapping."""
+    for d, entries in files.items():
+        for name in entries:
+            yield f"{d}/{name}"
+
+
+# ---------------------------------------------------------
+# Persistence
+# ---------------------------------------------------------
+
+def load_hashes(path):
+    """Load saved directory hashes, or None if there are none."""
+    if not os.path.exists(path):
+        return None
+    try:
+        df = pd.read_feather(path)
+    except Exception as e:
+        print(f"[manifest] Error reading {path}: {e}")
+        return None
+    return dict(zip(df["dir"], df["hash"]))
+
+
+def load_previous(files_path, hashes_path) -> dict:
+    """
+    {dir: (mtime_ns, {name: (size, mtime_ns)})} of the saved directories
+    with a recorded mtime, for scan_tree(previous=...); {} if there are none.
+    """
+    if not os.path.exists(files_path) or not os.path.exists(hashes_path):
+        return {}
+    try:
+        dirs = pd.read_feather(hashes_path)
+        if "mtime_ns" not in dirs.columns:
+            return {}
+        dirs = dirs.dropna(subset=["mtime_ns"])
+        files = load_files(files_path, None)
+    except Exception as e:
+        print(f"[manifest] Error reading {files_path}: {e}")
+        return {}
+    return {
+        d: (mtime_ns, files.get(d, {}))
+        for d, mtime_ns in zip(dirs["dir"], dirs["mtime_ns"].astype("int64").tolist())
+    }
+
+
+def load_files(path, dirs) -> dict:
+    """Load saved file entries, restricted to the given directories (None: all)."""
+    if (dirs is not None and not dirs) or not os.path.exists(path):
+        return {}
+    df = pd.read_feather(path)
+    if dirs is not None:
+        df = df[df["dir"].isin(dirs)]
+    files = {}
+    for d, name, size, mtime_ns in zip(
+        df["dir"], df["name"], df["size"].tolist(), df["mtime_ns"].tolist()
+    ):
+        files.setdefault(d, {})[name] = (size, mtime_ns)
+    return files
+
+
+def save(files: dict, hashes: dict, files_path, hashes_path, dir_mtimes: dict = None):
+    dirs, names, sizes, mtimes = [], [], [], []
+    for d, entries in files.items():
+        for name, (size, mtime_ns) in entries.items():
+            dirs.append(d)
+            names.append(name)
+            sizes.append(size)
+            mtimes.append(mtime_ns)
+    with atomic_path(files_path) as tmp:
+        pd.DataFrame({"dir": dirs, "name": names, "size": sizes, "mtime_ns": mtimes}).to_feather(tmp)
+    with atomic_path(hashes_path) as tmp:
+        dir_mtimes = dir_mtimes or {}
+        pd.DataFrame({
+            "dir": list(hashes),
+            "hash": list(hashes.values()),
+            "mtime_ns": pd.array([dir_mtimes.get(d) for d in hashes], dtype="Int64"),
+        }).to_feather(tmp)
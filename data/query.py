@@ -0,0 +1,543 @@
+"""
+Paged, sorted and filtered reads of the assets served by data.cache.
+
+A query is a sort key, a direction and a filter set (family, text in the
+variant name). Without filters a page is a slice of the sort order stored
+with the cache generation, so it costs the same whatever the dataset size.
+With filters the matching rows are selected once, in sort order, and kept
+in a small LRU shared by every client; later pages are slices of it. Only
+the rows of the page are then read from the memory-mapped frame and
+formatted.
+
+Every function reads one data.cache snapshot: the one passed in, or the
+one served when it is called. Row numbers are only meaningful within a
+snapshot, so a caller chaining calls (find_variant, then asset_detail)
+passes them the same one.
+
+Variants are found by name through a hash index (name hash -> row) and
+searched as you type through a sorted index of the lowercase names and of
+their suffixes from every word start; both are binary searches over
+indexes stored with the generation. A search with no prefix match falls
+back to the index entries starting within a few edits of the text, ranked
+by edit distance, so typos still find their variant.
+"""
+import bisect
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from data import cache
+from data.data import (
+    OBJ_ROOT,
+    SORT_COLUMNS,
+    SEARCH_KEY_BYTES,
+    build_variant_index,
+    build_variant_search,
+    common_prefix_lengths,
+    hash_variant_names,
+    key_bytes,
+)
+from data.display import COUNT_COLUMNS, format_assets, format_records
+
+ALL_FAMILIES = "All"
+
+# Memory bound of the filtered row selections kept (int32 row numbers)
+RESULT_CACHE_BYTES = 64 * 1024 * 1024
+
+_results = OrderedDict()  # (version, sort, family, text) -> row numbers in sort order
+_result_bytes = 0
+_orders = {}  # (version, column) -> order computed here, for generations built without them
+_lock = threading.Lock()
+
+# Typeahead: index entries examined per search, and matches returned
+SEARCH_SCAN = 256
+SEARCH_LIMIT = 10
+# Fuzzy fallback: edits allowed per FUZZY_CHARS_PER_EDIT characters typed,
+# up to FUZZY_MAX_EDITS (shorter texts get no fuzzy matches)
+FUZZY_CHARS_PER_EDIT = 4
+FUZZY_MAX_EDITS = 2
+FUZZY_WINDOW = 1 << 12  # key starts read on each side of the text
+FUZZY_SCAN = 128  # key starts measured per fuzzy search
+FUZZY_RESULTS = 64  # closest entries ranked
+KEY_START_WIDTHS = (8, 12, 16, 24, SEARCH_KEY_BYTES)  # widths of the key start tables
+
+DETAIL_CACHE_SIZE = 1024
+DETAIL_SOURCE_COLUMNS = ["variant_name", "asset_family", *COUNT_COLUMNS, "folder_size_mb"]
+_details = OrderedDict()  # (version, row) -> display record
+_indexes = {}  # (version, name) -> index built here, for generations built without them
+
+
+def _forget_other_versions(memo: dict, version):
+    for key in [key for key in memo if key[0] != version]:
+        del memo[key]
+
+
+def _has_assets(snapshot) -> bool:
+    return snapshot.assets is not None and not snapshot.assets.empty
+
+
+def sort_order(column: str, snapshot=None) -> np.ndarray:
+    """Ascending row order of the assets by `column`."""
+    if column not in SORT_COLUMNS:
+        raise ValueError(f"Cannot sort assets by {column!r}")
+    snapshot = snapshot or cache.current
+    orders = snapshot.asset_orders
+    if orders is not None and column in orders:
+        return orders[column].to_numpy()
+
+    key = (snapshot.version, column)
+    order = _orders.get(key)
+    if order is None:
+        order = pc.sort_indices(pa.array(snapshot.assets[column])).to_numpy().astype(np.int32)
+        with _lock:
+            _forget_other_versions(_orders, snapshot.version)
+            _orders[key] = order
+    return order
+
+
+def families(snapshot=None) -> list:
+    snapshot = snapshot or cache.current
+    if not _has_assets(snapshot):
+        return []
+    return [str(family) for family in snapshot.assets["asset_family"].cat.categories]
+
+
+def _matching_mask(assets, family: str, text: str) -> np.ndarray:
+    mask = np.ones(len(assets), dtype=bool)
+    if family and family != ALL_FAMILIES:
+        codes = assets["asset_family"].cat.codes.to_numpy()
+        categories = assets["asset_family"].cat.categories
+        mask &= codes == (categories.get_loc(family) if family in categories else -2)
+    if text:
+        names = pa.array(assets["variant_name"])
+        mask &= pc.match_substring(names, text, ignore_case=True).to_numpy(zero_copy_only=False)
+    return mask
+
+
+def _cached_rows(key):
+    with _lock:
+        rows = _results.get(key)
+        if rows is not None:
+            _results.move_to_end(key)
+        return rows
+
+
+def _remember_rows(key, rows):
+    global _result_bytes
+    with _lock:
+        if key in _results:
+            return
+        _results[key] = rows
+        _result_bytes += rows.nbytes
+        while _result_bytes > RESULT_CACHE_BYTES and len(_results) > 1:
+            _, dropped = _results.popitem(last=False)
+            _result_bytes -= dropped.nbytes
+
+
+def matching_rows(sort: str, family: str = ALL_FAMILIES, text: str = "", snapshot=None) -> np.ndarray:
+    """Row numbers of the assets matching the filters, ascending by `sort`."""
+    snapshot = snapshot or cache.current
+    order = sort_order(sort, snapshot)
+    text = text.strip()
+    if (not family or family == ALL_FAMILIES) and not text:
+        return order
+
+    key = (snapshot.version, sort, family, text.lower())
+    rows = _cached_rows(key)
+    if rows is None:
+        rows = order[_matching_mask(snapshot.assets, family, text)[order]]
+        _remember_rows(key, rows)
+    return rows
+
+
+def query_page(
+    sort: str,
+    descending: bool = False,
+    family: str = ALL_FAMILIES,
+    text: str = "",
+    page: int = 0,
+    page_size: int = 20,
+    snapshot=None,
+):
+    """
+    One page of assets, formatted for display (data.display.DISPLAY_COLUMNS).
+    Returns (rows, page, total matches); `page` is clamped to the last page.
+    """
+    snapshot = snapshot or cache.current
+    if not _has_assets(snapshot):
+        return format_assets(None, OBJ_ROOT), 0, 0
+
+    rows = matching_rows(sort, family, text, snapshot)
+    total = len(rows)
+    page = min(max(page, 0), max((total - 1) // page_size, 0))
+    start = page * page_size
+    if descending:
+        # Mirror the slice instead of reversing the whole selection
+        ids = rows[max(total - start - page_size, 0):total - start][::-1]
+    else:
+        ids = rows[start:start + page_size]
+    return format_assets(snapshot.assets.take(ids), OBJ_ROOT), page, total
+
+
+# --------------------------------------------------
+# VARIANT LOOKUP AND SEARCH
+# --------------------------------------------------
+
+def _index(snapshot, name: str, build):
+    """An index of a snapshot, built in memory if it was not stored."""
+    stored = getattr(snapshot, name)
+    if stored is not None:
+        return stored
+    key = (snapshot.version, name)
+    index = _indexes.get(key)
+    if index is None:
+        index = build(snapshot.assets[["variant_name"]])
+        with _lock:
+            _forget_other_versions(_indexes, snapshot.version)
+            _indexes[key] = index
+    return index
+
+
+def _column(index, name):
+    return index.arrow(name) if hasattr(index, "arrow") else pa.array(index[name])
+
+
+def find_variant(name: str, snapshot=None):
+    """Row of the variant called `name`, or None."""
+    snapshot = snapshot or cache.current
+    if not _has_assets(snapshot) or not name:
+        return None
+    index = _index(snapshot, "variant_index", build_variant_index)
+    hashes = index["hash"].to_numpy()
+    h = hash_variant_names([name])[0]
+    lo = int(np.searchsorted(hashes, h, side="left"))
+    hi = int(np.searchsorted(hashes, h, side="right"))
+    names = snapshot.assets["variant_name"]
+    rows = index["row"].to_numpy()
+    for i in range(lo, hi):
+        if names.iat[int(rows[i])] == name:
+            return int(rows[i])
+    return None
+
+
+class _Keys:
+    """Sequence view of an Arrow string array, for bisect."""
+
+    def __init__(self, array):
+        self.array = array
+
+    def __len__(self):
+        return len(self.array)
+
+    def __getitem__(self, i):
+        return self.array[i].as_py()
+
+
+def _prefix_distances(text: bytes, heads: np.ndarray, limit: int = None, shared: int = 0) -> np.ndarray:
+    """
+    Edit distance from `text` to the closest prefix of each row of `heads`
+    (key_bytes rows; Levenshtein over UTF-8 bytes: insertions, deletions
+    and substitutions, a swap of two letters counting as two). One row of
+    the table per byte of `text`, computed for all heads at once; rows for
+    the first `shared` bytes, which every head starts with, are skipped.
+    Given a `limit`, heads past it are dropped as soon as they are (and
+    get limit + 1).
+    """
+    width = heads.shape[1]
+    result = np.full(len(heads), width + 1 if limit is None else limit + 1, dtype=np.int16)
+    alive = np.arange(len(heads))
+    columns = np.arange(width + 1, dtype=np.int16)[:, None]
+    chars = np.ascontiguousarray(heads.T)  # one row per byte position
+
+    # distances[j, k]: text[:i] against heads[k][:j]; for i <= shared
+    # that is |i - j|
+    distances = np.repeat(np.abs(columns - shared), len(heads), axis=1)
+    row = np.empty_like(distances)
+    text = np.frombuffer(text[shared:], dtype=np.uint8)
+    mismatches = chars != text[:, None, None]  # [i, j, k]: heads[k][j] != text[i]
+    for i in range(shared + 1, shared + len(text) + 1):
+        row[0] = i
+        np.add(distances[:-1], mismatches[i - shared - 1], out=row[1:])
+        np.minimum(row[1:], distances[1:] + 1, out=row[1:])
+        # Insertions: row[j] = min over k <= j of row[k] + (j - k)
+        row -= columns
+        np.minimum.accumulate(row, axis=0, out=distances)
+        distances += columns
+        if limit is not None and i % 2 == 0:
+            keep = distances.min(axis=0) <= limit
+            if not keep.all():
+                alive, chars, distances = alive[keep], chars[:, keep], distances[:, keep]
+                mismatches = mismatches[:, :, keep]
+                row = np.empty_like(distances)
+    distances[1:][chars == 0] = width + 1
+    result[alive] = distances.min(axis=0)
+    if limit is not None:
+        np.minimum(result, limit + 1, out=result)
+    return result
+
+
+def _key_starts(snapshot, index, keys, width: int):
+    """
+    (positions, lcp) of the search index entries opening a new start of at
+    least `width` bytes, rounded up to one of KEY_START_WIDTHS, with each
+    one's common prefix with the previous start. Built on first use.
+    """
+    width = next(w for w in KEY_START_WIDTHS if w >= width)
+
+    def build(snapshot):
+        if "lcp" in index:
+            lcp = index["lcp"].to_numpy()
+        else:
+            lcp = snapshot.derived("search_lcp", lambda _: common_prefix_lengths(keys))
+        positions = np.flatnonzero(lcp < width).astype(np.int32)
+        return positions, lcp[positions]
+
+    return snapshot.derived(f"search_starts_{width}", build)
+
+
+def _closest_key(keys, text: str, position: int):
+    """
+    (position, characters shared) of the key sharing the longest prefix
+    with `text`: one of the two around `position`, where the text would be
+    inserted in the sorted keys.
+    """
+    neighbours = [p for p in (position - 1, position) if 0 <= p < len(keys)]
+    shared = [len(os.path.commonprefix([keys[p].as_py(), text])) for p in neighbours]
+    if not shared:
+        return position, 0
+    best = int(np.argmax(shared))
+    return neighbours[best], shared[best]
+
+
+def _fuzzy_entries(keys, starts, text: str, closest: int, shared: int):
+    """
+    (positions in the search index, edit distances) of the entries whose
+    start is within the edit budget of `text`. `starts` is _key_starts(),
+    `closest` and `shared` are _closest_key().
+
+    A key within budget starts with the text up to its first edit, so the
+    keys sharing the longest prefix with the text are the likeliest. They
+    sit around the closest one: of the FUZZY_WINDOW key starts on each
+    side, the FUZZY_SCAN sharing the most with the text are measured.
+    A typo in the first letters of a common prefix can therefore go
+    unfound on large datasets; the search stays within its time budget
+    instead.
+    """
+    max_edits = min(FUZZY_MAX_EDITS, len(text) // FUZZY_CHARS_PER_EDIT)
+    if max_edits == 0 or len(keys) == 0:
+        return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp)
+    full = text.encode("utf-8")
+    probe = full[:SEARCH_KEY_BYTES - max_edits]
+    width = len(probe) + max_edits
+    heads, lcp = starts
+
+    matched = min(len(text[:shared].encode("utf-8")), len(probe))
+    reference = int(np.searchsorted(heads, heads.dtype.type(closest), side="right")) - 1
+
+    # Window of key starts around the reference; common[i]: bytes start
+    # i shares with the text. Starts sharing `width` bytes are one group.
+    lo = max(reference - FUZZY_WINDOW, 0)
+    hi = min(reference + FUZZY_WINDOW + 1, len(heads))
+    at = reference - lo
+    common = np.empty(hi - lo, dtype=np.uint8)
+    common[at] = matched
+    if at:
+        common[:at] = np.minimum.accumulate(lcp[lo + 1:reference + 1][::-1])[::-1]
+    common[at + 1:] = np.minimum.accumulate(lcp[reference + 1:hi])
+    np.minimum(common, matched, out=common)
+    opens = lcp[lo:hi] < width
+    opens[0] = True
+    groups = np.flatnonzero(opens)
+    bounds = np.append(heads[lo:hi], heads[hi] if hi < len(heads) else len(keys))
+    group_ends = np.append(groups[1:], hi - lo)
+
+    # The FUZZY_SCAN groups sharing the most with the text, then nearest
+    rank = (matched - common[groups]).astype(np.int64) * len(common) + np.abs(groups - at)
+    chosen = np.arange(len(groups))
+    if len(groups) > FUZZY_SCAN:
+        chosen = np.argpartition(rank, FUZZY_SCAN)[:FUZZY_SCAN]
+    prefixes = key_bytes(keys, bounds[groups[chosen]], width)
+
+    # Within the edit budget, all but max_edits bytes of the text are in
+    # the key at most max_edits places from their own: only measure those
+    text_bytes = np.frombuffer(probe, dtype=np.uint8)
+    found = prefixes[:, :len(probe)] == text_bytes
+    for shift in range(1, max_edits + 1):
+        found[:, shift:] |= prefixes[:, :len(probe) - shift] == text_bytes[shift:]
+        found |= prefixes[:, shift:len(probe) + shift] == text_bytes
+    near = found.sum(axis=1) >= len(probe) - max_edits
+    chosen, prefixes = chosen[near], prefixes[near]
+    if len(chosen) == 0:
+        return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp)
+    shared_by_all = int(common[groups[chosen]].min())
+    distances = _prefix_distances(probe, prefixes, max_edits, shared_by_all)
+    close = distances <= max_edits
+    chosen = chosen[close][np.argsort(distances[close], kind="stable")]
+    distances = np.sort(distances[close], kind="stable")
+    if len(chosen) == 0:
+        return chosen, distances
+
+    # Their entries, fewest edits first
+    first = bounds[groups[chosen]]
+    counts = np.minimum(bounds[group_ends[chosen]] - first, FUZZY_RESULTS)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    positions = (np.repeat(first, counts) + offsets)[:FUZZY_RESULTS]
+    distances = np.repeat(distances, counts)[:FUZZY_RESULTS]
+
+    if len(probe) < len(full):
+        # Measured on the start of the text only: measure the whole of it
+        distances = _prefix_distances(full, key_bytes(keys, positions, len(full) + max_edits), max_edits)
+        close = distances <= max_edits
+        positions, distances = positions[close], distances[close]
+    return positions, distances
+
+
+def _ranked_names(snapshot, index, positions, distances, text: str, limit: int) -> list:
+    """Names of the index entries at `positions`, best first, one per variant."""
+    rows = index["row"].to_numpy()[positions]
+    starts = index["start"].to_numpy()[positions].tolist()
+    names = snapshot.assets.arrow("variant_name").take(pa.array(rows)).to_pylist()
+    ranked = {}
+    for row, start, distance, name in zip(rows.tolist(), starts, distances, names):
+        rank = (distance, name.lower() != text, start > 0, len(name), name)
+        if row not in ranked or rank < ranked[row]:
+            ranked[row] = rank
+    return [rank[-1] for rank in sorted(ranked.values())[:limit]]
+
+
+def search_variants(text: str, limit: int = SEARCH_LIMIT, snapshot=None) -> list:
+    """
+    Variant names matching `text` as you type: names starting with it
+    first, then names with a word starting with it (shortest first). With
+    no such match, names with a word starting within a few edits of it
+    (fewest edits first); failing that, the text is shortened from the
+    end until something matches.
+    """
+    snapshot = snapshot or cache.current
+    text = text.strip().lower()
+    if not _has_assets(snapshot) or not text:
+        return []
+    index = _index(snapshot, "variant_search", build_variant_search)
+    column = _column(index, "key")
+    keys = _Keys(column)
+
+    lo = bisect.bisect_left(keys, text)
+    hi = bisect.bisect_left(keys, text + "\U0010ffff", lo)
+    if hi == lo:
+        closest, shared = _closest_key(column, text, lo)
+        width = len(text.encode("utf-8")) + FUZZY_MAX_EDITS
+        starts = _key_starts(snapshot, index, column, min(width, SEARCH_KEY_BYTES))
+        positions, distances = _fuzzy_entries(column, starts, text, closest, shared)
+        if len(positions):
+            return _ranked_names(snapshot, index, positions, distances.tolist(), text, limit)
+
+        # The longest start of the text some key has
+        text = text[:max(shared, 1)]
+        lo = bisect.bisect_left(keys, text)
+        hi = bisect.bisect_left(keys, text + "\U0010ffff", lo)
+    positions = np.arange(lo, min(hi, lo + SEARCH_SCAN))
+    return _ranked_names(snapshot, index, positions, [0] * len(positions), text, limit)
+
+
+def asset_detail(row: int, snapshot=None) -> dict:
+    """Display record of one asset row (data.display.DISPLAY_COLUMNS), memoized."""
+    snapshot = snapshot or cache.current
+    key = (snapshot.version, row)
+    with _lock:
+        record = _details.get(key)
+        if record is not None:
+            _details.move_to_end(key)
+            return record
+    record = format_records(snapshot.assets.take_arrow([row], DETAIL_SOURCE_COLUMNS), OBJ_ROOT)[0]
+    with _lock:
+        _details[key] = record
+        while len(_details) > DETAIL_CACHE_SIZE:
+            _details.popitem(last=False)
+    return record
+
+
+# ---------------------------------------------------------
+# Benchmark on synthetic variant names
+# ---------------------------------------------------------
+
+_SYNTHETIC_FAMILIES = [
+    "isBayCedar", "isBeach", "isCoral", "isDunes", "isGardenia", "isHibiscus", "isIronwood",
+    "isKava", "isLavaRocks", "isMountain", "isNaupaka", "isPalm", "isPandanus", "osOcean",
+]
+_SYNTHETIC_ELEMENTS = ["Cabbage", "Fern", "Flowers", "Leaf", "Moss", "Rock", "Shell", "Trunk"]
+
+
+def synthetic_variant_names(count: int) -> list:
+    """Moana-like variant names, e.g. isCoralB1_xgFern_000042."""
+    families = [f"{family}{letter}{digit}" for family in _SYNTHETIC_FAMILIES for letter in "ABCD" for digit in "1234"]
+    return [
+        f"{families[i % len(families)]}_xg{_SYNTHETIC_ELEMENTS[i // len(families) % 8]}_{i:07d}"
+        for i in range(count)
+    ]
+
+
+def _reference_matches(keys, text: str) -> set:
+    """Positions of every key within the edit budget of `text` (full scan)."""
+    max_edits = min(FUZZY_MAX_EDITS, len(text) // FUZZY_CHARS_PER_EDIT)
+    found = set()
+    for start in range(0, len(keys), 1 << 16):
+        positions = np.arange(start, min(start + (1 << 16), len(keys)))
+        heads = key_bytes(keys, positions, len(text.encode("utf-8")) + max_edits)
+        found.update(positions[_prefix_distances(text.encode("utf-8"), heads, max_edits) <= max_edits].tolist())
+    return found
+
+
+def benchmark(count: int = 1_000_000, texts=("isCoral", "isCroalB1", "isPlamA3_xg", "fren_00012", "zzqqxxkk")):
+    """Time search_variants on `count` synthetic variants and check fuzzy recall against a full scan."""
+    import tempfile
+
+    from data.columnar import LazyFrame, write_frame
+
+    names = synthetic_variant_names(count)
+    start = time.perf_counter()
+    index = build_variant_search(pd.DataFrame({"variant_name": names}))
+    build_seconds = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = [os.path.join(directory, name) for name in ("assets.feather", "search.feather")]
+        write_frame(pd.DataFrame({"variant_name": names}), paths[0])
+        write_frame(index, paths[1])
+        snapshot = cache.Snapshot(
+            version="benchmark", assets=LazyFrame(paths[0]), variant_search=LazyFrame(paths[1])
+        )
+        print(f"[query] {count:,} variants, {len(index):,} search entries, index built in {build_seconds:.1f}s")
+        keys = snapshot.variant_search.arrow("key")
+        for text in texts:
+            search_variants(text, snapshot=snapshot)
+            times = []
+            for _ in range(20):
+                start = time.perf_counter()
+                found = search_variants(text, snapshot=snapshot)
+                times.append(time.perf_counter() - start)
+
+            lowered = text.lower()
+            position = bisect.bisect_left(_Keys(keys), lowered)
+            closest, shared = _closest_key(keys, lowered, position)
+            if position < len(keys) and keys[position].as_py().startswith(lowered):
+                recall = "prefix match"
+            else:
+                starts = _key_starts(snapshot, snapshot.variant_search, keys, len(lowered) + FUZZY_MAX_EDITS)
+                positions, _ = _fuzzy_entries(keys, starts, lowered, closest, shared)
+                reference = _reference_matches(keys, lowered)
+                recall = f"{len(reference & set(positions.tolist()))} of {len(reference)}" if reference else "none"
+            print(
+                f"[query] {text!r}: median {np.median(times) * 1000:.2f} ms, "
+                f"max {max(times) * 1000:.2f} ms | first match {found[:1]} | "
+                f"fuzzy entries found {recall}"
+            )
+
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,144 @@
+"""
+Asset size treemap: root -> family -> variant -> OBJ/MTL/HIER file.
+
+Sizes are sums: a family is the total of its variants (one bincount over
+the family codes), a variant the total of its files. Every level is pruned
+to its TOP_K largest children plus one "other" node holding the rest, so a
+view of `depth` levels below a node has at most (TOP_K + 1) ** depth nodes,
+whatever the dataset size. The top of the tree is stored with the cache
+generation; the views below a family or a variant are computed when the
+page drills into them.
+
+Node ids are paths from the root ("Moana/<family>/<variant>/<FILE>"), so
+labels may repeat. "Other" nodes and files are leaves.
+"""
+import numpy as np
+import pandas as pd
+
+ROOT = "Moana"
+TOP_K = 20
+DEPTH = 2  # levels below the node shown in one view
+OTHER = "~other"
+
+# File level: label suffix -> assets column
+FILE_COLUMNS = {"obj": "obj_size_mb", "mtl": "mtl_size_mb", "hier": "hier_size_mb"}
+
+# Parents get this much more than the sum of their children so that
+# Plotly's own sum (branchvalues="total") never exceeds them by rounding.
+_SUM_SLACK = 1 + 1e-12
+
+
+def node_depth(node: str) -> int:
+    """0 for the root, 1 for a family, 2 for a variant, 3 for a file."""
+    return node.count("/")
+
+
+def is_drillable(node: str) -> bool:
+    return node_depth(node) < 3 and not node.endswith("/" + OTHER)
+
+
+def _top(values: np.ndarray, top: int) -> np.ndarray:
+    """Positions of the `top` largest values, largest first."""
+    if len(values) > top:
+        part = np.argpartition(-values, top - 1)[:top]
+    else:
+        part = np.arange(len(values))
+    return part[np.argsort(-values[part], kind="stable")]
+
+
+def _prune(node: str, labels: list, values: np.ndarray, top: int, noun: str) -> list:
+    """[(id, label, value)] of the `top` largest children and an "other" node."""
+    keep = _top(values, top)
+    children = [(f"{node}/{labels[i]}", labels[i], float(values[i])) for i in keep.tolist()]
+    rest = len(values) - len(keep)
+    if rest:
+        other = float(values.sum() - values[keep].sum())
+        children.append((f"{node}/{OTHER}", f"Other ({rest:,} {noun})", max(other, 0.0)))
+    return children
+
+
+def _sizes(assets) -> np.ndarray:
+    return np.nan_to_num(assets["folder_size_mb"].to_numpy(dtype=np.float64))
+
+
+def _family_rows(assets, family: str) -> np.ndarray:
+    column = assets["asset_family"]
+    categories = column.cat.categories
+    if family not in categories:
+        return np.zeros(0, dtype=np.intp)
+    return np.flatnonzero(column.cat.codes.to_numpy() == categories.get_loc(family))
+
+
+def children(assets, node: str, top: int = TOP_K) -> list:
+    """[(id, label, value in MB)] of a node, largest first, pruned to `top` + other."""
+    if assets is None or assets.empty or not is_drillable(node):
+        return []
+    parts = node.split("/")
+
+    if len(parts) == 1:
+        column = assets["asset_family"]
+        codes = column.cat.codes.to_numpy()
+        families = [str(family) for family in column.cat.categories]
+        totals = np.bincount(codes, weights=_sizes(assets), minlength=len(families))
+        present = np.flatnonzero(np.bincount(codes, minlength=len(families)))
+        return _prune(node, [families[i] for i in present.tolist()], totals[present], top, "families")
+
+    rows = _family_rows(assets, parts[1])
+    names = assets["variant_name"].take(rows)
+    if len(parts) == 2:
+        return _prune(node, names.tolist(), _sizes(assets)[rows], top, "variants")
+
+    matches = rows[(names == parts[2]).to_numpy()]
+    if len(matches) == 0:
+        return []
+    row = int(matches[0])
+    files = []
+    for suffix, column in FILE_COLUMNS.items():
+        if column in assets.columns:
+            size = float(assets[column].iat[row])
+            if size > 0:
+                files.append((f"{node}/{suffix.upper()}", f"{parts[2]}.{suffix}", size))
+    return sorted(files, key=lambda child: -child[2])
+
+
+def subtree(assets, node: str = ROOT, depth: int = DEPTH, top: int = TOP_K) -> dict:
+    """
+    The node and `depth` levels below it, as Plotly treemap columns
+    {"ids", "labels", "parents", "values"} with values in MB.
+    """
+    tree = {"ids": [node], "labels": [node.rsplit("/", 1)[-1]], "parents": [""], "values": [0.0]}
+
+    frontier = [node]
+    for _ in range(depth):
+        below = []
+        for parent in frontier:
+            for child, label, value in children(assets, parent, top):
+                tree["ids"].append(child)
+                tree["labels"].append(label)
+                tree["parents"].append(parent)
+                tree["values"].append(value)
+                if is_drillable(child):
+                    below.append(child)
+        frontier = below
+
+    # Expanded nodes take the sum of their children; descendants come
+    # after their ancestors, so walking backwards sees every node complete.
+    totals = {}
+    for i in range(len(tree["ids"]) - 1, 0, -1):
+        if tree["ids"][i] in totals:
+            tree["values"][i] = totals[tree["ids"][i]] * _SUM_SLACK
+        parent = tree["parents"][i]
+        totals[parent] = totals.get(parent, 0.0) + tree["values"][i]
+    if node in totals:
+        tree["values"][0] = totals[node] * _SUM_SLACK
+    return tree
+
+
+def frame(tree: dict) -> pd.DataFrame:
+    """A subtree as the page's treemap frame (id, label, parent, value)."""
+    return pd.DataFrame({
+        "id": tree["ids"],
+        "label": tree["labels"],
+        "parent": tree["parents"],
+        "value": tree["values"],
+    })
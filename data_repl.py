@@ -14,4 +14,4 @@ print(filtered.head())
 
 print(get_heaviest(df, 5))
 
-print(compute_suggestions(filtered))
+print(compute_suggestions(df, asset_type="main", poly_range=(0, 1_000_000)))
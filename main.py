@@ -1,10 +1,9 @@
-from taipy.gui import Gui
+import time
 
-from pages.home.home import home_md
-from pages.table.table import table_md
-from pages.tree.tree import tree_md
-from pages.visualization.visualization import visualization_md
-from pages.detail.detail import detail_md
+import startup
+from taipy.gui import Gui, State
+
+startup.mark("taipy.gui")
 
 stylekit = {
     "color_primary": "rgb(60, 120, 200)",
@@ -12,15 +11,83 @@ stylekit = {
     "font_family": "'Segoe UI', sans-serif",
 }
 
-pages = {
-    "/": home_md,
-    "Table": table_md,
-    "Tree": tree_md,
-    "Visualization": visualization_md,
-    "Detail": detail_md,
-}
+# Page name -> load(state, visited_only=False) of its module, filled in
+# when the pages are imported. Pages build their data on first view.
+page_loaders = {}
+
+
+def refresh_data(state: State):
+    """Bring the pages this client has seen up to the data the cache serves."""
+    for load in page_loaders.values():
+        load(state, visited_only=True)
+    state.data_freshness = cache.freshness()
+
+
+def on_init(state: State):
+    state.data_freshness = cache.freshness()
+
+
+def on_page_load(state: State, page_name: str):
+    start = time.perf_counter()
+    load = page_loaders.get(page_name)
+    if load is not None:
+        load(state)
+    state.data_freshness = cache.freshness()
+    startup.record_first_page(page_name, time.perf_counter() - start)
+    state.startup_summary = startup.summary()
 
-gui = Gui(pages=pages, css_file="styles.css")
 
 if __name__ == "__main__":
+    # The cache opens the dataset on import. It and the page modules are
+    # imported here rather than at module level because ingestion worker
+    # processes re-import this module on platforms that spawn (Windows),
+    # and must not load it again.
+    startup.install()
+    for name in ("numpy", "pandas", "pyarrow"):
+        startup.timed_import(name)
+    startup.mark("libraries")
+
+    from data import cache
+    startup.mark("cache opened")
+
+    from pages.home import home
+    from pages.table import table
+    from pages.tree import tree
+    from pages.visualization import visualization
+    from pages.detail import detail
+    startup.mark("pages")
+
+    page_loaders.update({
+        "/": home.load,
+        "Table": table.load,
+        "Tree": tree.load,
+        "Visualization": visualization.load,
+        "Detail": detail.load,
+    })
+
+    # Shown on every page
+    data_freshness = cache.freshness()
+
+    pages = {
+        "/": home.home_md,
+        "Table": table.table_md,
+        "Tree": tree.tree_md,
+        "Visualization": visualization.visualization_md,
+        "Detail": detail.detail_md,
+    }
+
+    gui = Gui(pages=pages, css_file="styles.css")
+
+    # Serve the last good cache now; check the dataset in the background
+    # and push the new version to every connected client once it is ready.
+    cache.on_update(lambda: gui.broadcast_callback(refresh_data))
+    cache.start_revalidation()
+
+    # Startup timing, shown on the home page
+    startup.mark_ready()
+    print(f"[startup] {startup.summary()}")
+    startup_summary = startup.summary()
+    startup_imports = startup.import_rows()
+    startup_phases = startup.phase_rows()
+
     gui.run(title="Moana Project Profiler", stylekit=stylekit)
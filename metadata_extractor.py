@@ -2,6 +2,15 @@ import os
 import json
 import csv
 
+from data import geometry, ingest
+from data.json_scan import scan_json_counts
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet output is skipped without pyarrow
+    pa = pq = None
+
 # ---------------------------------------------------------
 # Utility functions
 # ---------------------------------------------------------
@@ -12,16 +21,15 @@ def read_json(path):
 
 
 def count_obj_faces(obj_path):
-    """Count faces in an OBJ file by scanning for 'f ' lines."""
-    face_count = 0
+    """
+    Count faces in an OBJ file ('f ' records).
+    Served from the shared geometry store, so an OBJ referenced by several
+    primitives or elements is only scanned once.
+    """
     try:
-        with open(obj_path, "r", errors="ignore") as f:
-            for line in f:
-                if line.startswith("f "):
-                    face_count += 1
+        return geometry.get_obj_stats(obj_path)["f"]
     except FileNotFoundError:
         return None
-    return face_count
 
 
 def get_file_size_mb(path):
@@ -117,16 +125,20 @@ def extract_primitives(element_name, elem_dict, dataset_root, json_root, obj_roo
         if not os.path.isfile(prim_json):
             continue
 
-        prim_dict = read_json(prim_json)
+        # Only entry counts are needed, so the (possibly multi-GB) file is
+        # scanned for its structure instead of being parsed into objects.
+        prim_counts = scan_json_counts(prim_json)
+        if not prim_counts["complete"]:
+            # json.load would fail here; partial counts must not pass as data
+            raise ValueError(f"Truncated primitive JSON: {prim_json}")
         prim_type = pinfo.get("type")
 
         # Archive primitives contain OBJ references
         if prim_type == "archive":
-            for archive_path, instances in prim_dict.items():
+            for archive_path, instance_count in prim_counts["keys"].items():
                 obj_path = resolve_obj_path(archive_path, dataset_root, obj_root, element_name)
                 poly_count = count_obj_faces(obj_path)
                 file_size = get_file_size_mb(obj_path)
-                instance_count = len(instances)
 
                 rows.append({
                     "asset_name": f"{element_name}_{prim_name}",
@@ -145,20 +157,20 @@ def extract_primitives(element_name, elem_dict, dataset_root, json_root, obj_roo
                 "asset_type": "curve_primitive",
                 "poly_count": None,
                 "file_size_mb": None,
-                "instance_count": len(prim_dict),
+                "instance_count": prim_counts["length"],
                 "scene_name": element_name,
                 "location": None
             })
 
         # Element primitives reference variants or nested elements
         elif prim_type == "element":
-            for variant_name, instances in prim_dict.items():
+            for variant_name, instance_count in prim_counts["keys"].items():
                 rows.append({
                     "asset_name": f"{element_name}_{prim_name}_{variant_name}",
                     "asset_type": "element_primitive",
                     "poly_count": None,
                     "file_size_mb": None,
-                    "instance_count": len(instances),
+                    "instance_count": instance_count,
                     "scene_name": element_name,
                     "location": None
                 })
@@ -170,12 +182,9 @@ def extract_primitives(element_name, elem_dict, dataset_root, json_root, obj_roo
 # Main dataset walker
 # ---------------------------------------------------------
 
-def walk_dataset(dataset_root):
-    json_root = os.path.join(dataset_root, "json")
-    obj_root = os.path.join(dataset_root, "obj")
-
-    all_rows = []
-
+def list_elements(json_root):
+    """Return [(element_name, bytes_of_json)] for every element folder with an element JSON."""
+    elements = []
     for element_name in os.listdir(json_root):
         element_folder = os.path.join(json_root, element_name)
         if not os.path.isdir(element_folder):
@@ -185,12 +194,65 @@ def walk_dataset(dataset_root):
         if not os.path.isfile(element_json):
             continue
 
-        elem_dict = read_json(element_json)
+        size = sum(e.stat().st_size for e in os.scandir(element_folder) if e.is_file())
+        elements.append((element_name, size))
+    return elements
+
 
-        # Extract all metadata
-        all_rows.extend(extract_main_geometry(element_name, elem_dict, dataset_root, obj_root))
-        all_rows.extend(extract_variants(element_name, elem_dict, dataset_root, obj_root))
-        all_rows.extend(extract_primitives(element_name, elem_dict, dataset_root, json_root, obj_root))
+def extract_element(element_name, dataset_root):
+    """Extract all metadata rows of one element."""
+    json_root = os.path.join(dataset_root, "json")
+    obj_root = os.path.join(dataset_root, "obj")
+    element_json = os.path.join(json_root, element_name, f"{element_name}.json")
+
+    elem_dict = read_json(element_json)
+
+    # Extract all metadata
+    rows = []
+    rows.extend(extract_main_geometry(element_name, elem_dict, dataset_root, obj_root))
+    rows.extend(extract_variants(element_name, elem_dict, dataset_root, obj_root))
+    rows.extend(extract_primitives(element_name, elem_dict, dataset_root, json_root, obj_root))
+
+    # Worker processes exit without running atexit hooks.
+    geometry.flush()
+    return rows
+
+
+def _extract_element_batch(batch):
+    """(pid, geometry counters added by the batch, [(element_name, rows)])."""
+    before = geometry.summary()
+    results = [(element_name, extract_element(element_name, dataset_root)) for element_name, dataset_root in batch]
+    after = geometry.summary()
+    return os.getpid(), {name: after[name] - before[name] for name in after}, results
+
+
+def stream_dataset(dataset_root, skip=(), mode=None, workers=None):
+    """
+    Yield (element_name, rows) for each element as soon as it is extracted.
+    Elements run in parallel, largest first; names in `skip` are not read.
+    `mode` and `workers` select the executor (see data.ingest).
+    """
+    json_root = os.path.join(dataset_root, "json")
+
+    elements = [(name, size) for name, size in list_elements(json_root) if name not in skip]
+    tasks = [(name, dataset_root) for name, _ in elements]
+    sizes = [size for _, size in elements]
+
+    # One element per batch so every element can be flushed as it completes.
+    batches = ingest.make_batches(tasks, sizes, max_items=1)
+    for pid, counts, results in ingest.run_batches(_extract_element_batch, batches, mode, workers):
+        if pid != os.getpid():
+            # Worker processes count in their own copy of the store
+            geometry.add_counts(counts)
+        yield from results
+
+
+def walk_dataset(dataset_root, mode=None, workers=None):
+    all_rows = []
+    for _, rows in stream_dataset(dataset_root, mode=mode, workers=workers):
+        all_rows.extend(rows)
+
+    print(f"[geometry] {geometry.summary()}")
 
     return all_rows
 
@@ -214,6 +276,117 @@ def write_csv(rows, output_path):
     print(f"Metadata written to {output_path}")
 
 
+# ---------------------------------------------------------
+# Streaming writer (CSV + Parquet), resumable
+# ---------------------------------------------------------
+
+FIELDNAMES = [
+    "asset_name",
+    "asset_type",
+    "poly_count",
+    "file_size_mb",
+    "instance_count",
+    "scene_name",
+    "location",
+]
+
+if pa is not None:
+    PARQUET_SCHEMA = pa.schema([
+        ("asset_name", pa.string()),
+        ("asset_type", pa.string()),
+        ("poly_count", pa.int64()),
+        ("file_size_mb", pa.float64()),
+        ("instance_count", pa.int64()),
+        ("scene_name", pa.string()),
+        ("location", pa.string()),
+    ])
+
+
+class MetadataWriter:
+    """
+    Append rows element by element to:
+    - <output>.csv
+    - <output>.parquet/<element>.parquet (one typed part per element,
+      readable as a dataset with pandas.read_parquet)
+    - <output>.csv.progress, one "element<TAB>csv_offset" line per element
+
+    Each element is flushed before it is recorded as done. On resume the CSV
+    is truncated back to the last recorded offset, so rows of an element
+    interrupted halfway are written once, not twice.
+    """
+
+    def __init__(self, output_path, resume=True):
+        self.output_path = output_path
+        self.progress_path = output_path + ".progress"
+        self.parquet_dir = os.path.splitext(output_path)[0] + ".parquet"
+        self.done = set()
+
+        offset = 0
+        if resume and os.path.exists(self.progress_path) and os.path.exists(self.output_path):
+            with open(self.progress_path, "r") as f:
+                for line in f:
+                    name, _, end = line.rstrip("\n").rpartition("\t")
+                    if name:
+                        self.done.add(name)
+                        offset = int(end)
+        else:
+            for path in (self.output_path, self.progress_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            if os.path.isdir(self.parquet_dir):
+                for part in os.listdir(self.parquet_dir):
+                    os.remove(os.path.join(self.parquet_dir, part))
+
+        if pa is not None:
+            os.makedirs(self.parquet_dir, exist_ok=True)
+
+        self._csv = open(self.output_path, "a+", newline="")
+        self._csv.truncate(offset)
+        self._csv.seek(offset)
+        self._writer = csv.DictWriter(self._csv, fieldnames=FIELDNAMES)
+        if offset == 0:
+            self._writer.writeheader()
+        self._progress = open(self.progress_path, "a")
+
+    def write_element(self, element_name, rows):
+        if rows:
+            self._writer.writerows(rows)
+        self._csv.flush()
+        os.fsync(self._csv.fileno())
+
+        if rows and pa is not None:
+            part = os.path.join(self.parquet_dir, f"{element_name}.parquet")
+            table = pa.Table.from_pylist(rows, schema=PARQUET_SCHEMA)
+            pq.write_table(table, part + ".tmp")
+            os.replace(part + ".tmp", part)
+
+        self._progress.write(f"{element_name}\t{self._csv.tell()}\n")
+        self._progress.flush()
+        os.fsync(self._progress.fileno())
+        self.done.add(element_name)
+
+    def close(self):
+        self._csv.close()
+        self._progress.close()
+
+
+def extract(dataset_root, output_path, resume=True, mode=None, workers=None):
+    """Stream every element's rows to disk as it completes."""
+    writer = MetadataWriter(output_path, resume=resume)
+    if writer.done:
+        print(f"Resuming: {len(writer.done)} elements already written.")
+
+    try:
+        for element_name, rows in stream_dataset(dataset_root, skip=writer.done, mode=mode, workers=workers):
+            writer.write_element(element_name, rows)
+            print(f"[extract] {element_name}: {len(rows)} rows")
+    finally:
+        writer.close()
+
+    print(f"[geometry] {geometry.summary()}")
+    print(f"Metadata written to {output_path}")
+
+
 # ---------------------------------------------------------
 # Entry point
 # ---------------------------------------------------------
@@ -222,5 +395,4 @@ if __name__ == "__main__":
     dataset_root = "D:/Downloads/island/"   # <-- update this path
     output_path = "../data/moana_metadata.csv"
 
-    rows = walk_dataset(dataset_root)
-    write_csv(rows, output_path)
+    extract(dataset_root, output_path)
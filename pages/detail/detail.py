@@ -1,53 +1,67 @@
 from taipy.gui import Markdown, State
-from data.cache import metadata, assets, tree_df, kpis, treemap_data
+from data import cache, query
+
+# Variants are picked through a server-side typeahead (data.query): only
+# the top matches of what was typed are sent to the browser.
+
+# Filled in by load() when the page is first shown
+variant_query = ""
+variant_matches = []
+selected_variant = ""
+loaded_version = None
+
+EMPTY_DETAIL = {
+    "asset_family": "",
+    "polycount": 0,
+    "triangles": 0,
+    "material_count": 0,
+    "hierarchy_depth": 0,
+    "folder_size_mb": 0.0,
+    "asset_path": "",
+}
 
-# Build the list of variants for the selector
-if assets is not None and not assets.empty:
-    variants = list(assets["variant_name"])
-    selected_variant = variants[0]
-else:
-    variants = []
-    selected_variant = ""
 
 # Derived detail fields
-def get_asset_detail(variant_name: str):
-    if assets is None or assets.empty or not variant_name:
-        return {
-            "asset_family": "",
-            "polycount": 0,
-            "triangles": 0,
-            "material_count": 0,
-            "hierarchy_depth": 0,
-            "folder_size_mb": 0.0,
-            "asset_path": "",
-        }
-
-    row = assets.loc[assets["variant_name"] == variant_name]
-    if row.empty:
-        return {
-            "asset_family": "",
-            "polycount": 0,
-            "triangles": 0,
-            "material_count": 0,
-            "hierarchy_depth": 0,
-            "folder_size_mb": 0.0,
-            "asset_path": "",
-        }
-
-    row = row.iloc[0]
+def get_asset_detail(variant_name: str, snapshot=None):
+    snapshot = snapshot or cache.current
+    row = query.find_variant(variant_name, snapshot)
+    if row is None:
+        return dict(EMPTY_DETAIL)
+
+    record = query.asset_detail(row, snapshot)
     return {
-        "asset_family": row["asset_family"],
-        "polycount": row["polycount_fmt"],
-        "triangles": row["triangles_fmt"],
-        "material_count": row["material_count_fmt"],
-        "hierarchy_depth": row["hierarchy_depth_fmt"],
-        "folder_size_mb": row["folder_size_fmt"],
-        "asset_path": row["asset_path"],
+        "asset_family": record["asset_family"],
+        "polycount": record["polycount"],
+        "triangles": record["triangles"],
+        "material_count": record["material_count"],
+        "hierarchy_depth": record["hierarchy_depth"],
+        "folder_size_mb": record["folder_size"],
+        "asset_path": record["asset_path"],
     }
 
 detail_state = get_asset_detail(selected_variant)
 
+def on_search_variant(state: State):
+    state.variant_matches = query.search_variants(state.variant_query)
+
 def on_change_variant(state: State):
     state.detail_state = get_asset_detail(state.selected_variant)
 
+def load(state: State, visited_only: bool = False):
+    """
+    Show the data currently served by the cache, if not shown already,
+    keeping the selection if it still exists.
+    """
+    snapshot = cache.current
+    if state.loaded_version == snapshot.version or (visited_only and state.loaded_version is None):
+        return
+    if query.find_variant(state.selected_variant, snapshot) is None:
+        assets = snapshot.assets
+        state.selected_variant = "" if assets is None or assets.empty else assets["variant_name"].iat[0]
+    state.variant_matches = query.search_variants(state.variant_query, snapshot=snapshot) or (
+        [state.selected_variant] if state.selected_variant else []
+    )
+    state.detail_state = get_asset_detail(state.selected_variant, snapshot)
+    state.loaded_version = snapshot.version
+
 detail_md = Markdown("pages/detail/detail.md")
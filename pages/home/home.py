@@ -1,11 +1,48 @@
-from taipy.gui import Markdown
-from data.cache import metadata, assets, tree_df, kpis, treemap_data
+import pyarrow.compute as pc
+from taipy.gui import Markdown, State
+from data import cache
 from pages.navbar import navbar
 
-total_assets = kpis["total_assets"]
-total_variants = kpis["total_variants"]
-total_props = sum(1 for fam in assets["asset_family"] if fam not in ["character", "environment"])
-total_cameras = kpis["total_cameras"]
-total_materials = kpis["total_materials"]
+# Families whose variants are not counted as props
+NOT_PROPS = ("character", "environment")
+
+
+def count_props(assets) -> int:
+    """Variants outside NOT_PROPS, from one count per family."""
+    if assets is None or assets.empty:
+        return 0
+    counts = pc.value_counts(assets.arrow("asset_family")).to_pylist()
+    return sum(entry["counts"] for entry in counts if entry["values"] not in NOT_PROPS)
+
+
+def compute_totals(snapshot) -> dict:
+    kpis = snapshot.kpis
+    return {
+        "total_assets": kpis["total_assets"],
+        "total_variants": kpis["total_variants"],
+        "total_props": count_props(snapshot.assets),
+        "total_cameras": kpis["total_cameras"],
+        "total_materials": kpis["total_materials"],
+    }
+
+
+# Filled in by load() when the page is first shown
+total_assets = 0
+total_variants = 0
+total_props = 0
+total_cameras = 0
+total_materials = 0
+loaded_version = None
+
+
+def load(state: State, visited_only: bool = False):
+    """Show the data currently served by the cache, if not shown already."""
+    snapshot = cache.current
+    if state.loaded_version == snapshot.version or (visited_only and state.loaded_version is None):
+        return
+    for name, value in compute_totals(snapshot).items():
+        state.assign(name, value)
+    state.loaded_version = snapshot.version
+
 
 home_md = Markdown("pages/home/home.md")
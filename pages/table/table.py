@@ -1,29 +1,99 @@
-from taipy.gui import Markdown, State
-from data.cache import metadata, assets, tree_df, kpis, treemap_data
-
-# Table data
-table_data = assets.copy() if assets is not None else None
-columns = [
-    "variant_name",
-    "asset_family",
-    "polycount_fmt",
-    "triangles_fmt",
-    "material_count_fmt",
-    "hierarchy_depth_fmt",
-    "folder_size_fmt",
-    "asset_path",
-] if table_data is not None else []
+import pandas as pd
+from taipy.gui import Markdown, State, navigate
+from data import cache, query
+from data.display import DISPLAY_COLUMNS
+from pages.detail import detail
+
+# Paging, sorting and filtering run on the server (data.query); the table
+# only ever receives the PAGE_SIZE rows on screen.
+PAGE_SIZE = 20
+
+columns = DISPLAY_COLUMNS
+
+# Sort choices shown -> assets column
+SORT_KEYS = {
+    "Variant": "variant_name",
+    "Family": "asset_family",
+    "Polycount": "polycount",
+    "Triangles": "triangles",
+    "Materials": "material_count",
+    "Hierarchy depth": "hierarchy_depth",
+    "Size": "folder_size_mb",
+}
+sort_options = list(SORT_KEYS)
+
+# Filled in by load() when the page is first shown
+table_data = pd.DataFrame(columns=columns)
+table_page = 0
+table_page_label = ""
+table_sort = "Variant"
+table_descending = False
+table_family = query.ALL_FAMILIES
+table_families = [query.ALL_FAMILIES]
+table_search = ""
+loaded_version = None
 
 # Selected asset + variant
-selected_family = table_data.iloc[0]["asset_family"] if table_data is not None and not table_data.empty else ""
-selected_variant = table_data.iloc[0]["variant_name"] if table_data is not None and not table_data.empty else ""
-
-def on_select_row(state: State):
-    """
-    This callback can be wired to a table if you configure row selection.
-    For now, we simply keep selected_family/selected_variant in sync if used.
-    """
-    # Placeholder – you can expand when you enable row selection
-    pass
+selected_family = ""
+selected_variant = ""
+
+
+def _show_page(state: State, page: int, snapshot=None):
+    rows, page, total = query.query_page(
+        SORT_KEYS.get(state.table_sort, "variant_name"),
+        descending=bool(state.table_descending),
+        family=state.table_family,
+        text=state.table_search or "",
+        page=page,
+        page_size=PAGE_SIZE,
+        snapshot=snapshot,
+    )
+    pages = max((total + PAGE_SIZE - 1) // PAGE_SIZE, 1)
+    state.table_page = page
+    state.table_page_label = f"Page {page + 1} of {pages} · {total:,} variants"
+    state.table_data = rows
+
+
+def on_table_query(state: State):
+    """Sort or filter changed: back to the first page."""
+    _show_page(state, 0)
+
+
+def on_table_previous(state: State):
+    _show_page(state, state.table_page - 1)
+
+
+def on_table_next(state: State):
+    _show_page(state, state.table_page + 1)
+
+
+def load(state: State, visited_only: bool = False):
+    """Show the data currently served by the cache, if not shown already."""
+    snapshot = cache.current
+    if state.loaded_version == snapshot.version or (visited_only and state.loaded_version is None):
+        return
+    state.table_families = [query.ALL_FAMILIES] + query.families(snapshot)
+    if state.table_family not in state.table_families:
+        state.table_family = query.ALL_FAMILIES
+    _show_page(state, state.table_page, snapshot)
+    table_data = state.table_data
+    state.selected_family = table_data.iloc[0]["asset_family"] if not table_data.empty else ""
+    state.selected_variant = table_data.iloc[0]["variant_name"] if not table_data.empty else ""
+    state.loaded_version = snapshot.version
+
+
+def on_select_asset(state: State, var_name, payload):
+    """Open the variant whose row was clicked on the detail page."""
+    row = state.table_data.iloc[payload["index"]]
+    if query.find_variant(row["variant_name"]) is None:
+        return  # no longer served
+    state.selected_family = row["asset_family"]
+    state.selected_variant = row["variant_name"]
+
+    page = state[detail.__name__]
+    page.selected_variant = row["variant_name"]
+    page.variant_matches = [row["variant_name"]]
+    page.detail_state = detail.get_asset_detail(row["variant_name"])
+    navigate(state, "Detail")
 
 table_md = Markdown("pages/table/table.md")
@@ -1,11 +1,13 @@
-from taipy.gui import Markdown
-from data.cache import metadata, assets, tree_df, kpis, treemap_data
+from taipy.gui import Markdown, State
+import pandas as pd
 
-# DataFrame with id, parent, label, type, size_mb
-tree_data = tree_df.to_dict("records")
+from data import cache
+from data.data import tree_children, tree_node_path
 
 # --------------------------------------------------
-# CLEAN TREE DATAFRAME
+# LAZY TREE VIEW
+# tree_df is the compact node store (parent, name, is_dir, size_mb, depth).
+# Only the children of the expanded folder are turned into table rows.
 # --------------------------------------------------
 
 def format_size_mb(mb):
@@ -15,16 +17,58 @@ def format_size_mb(mb):
         return f"{mb*1024:.2f} KB"
     return f"{mb:,.2f} MB"
 
-tree_clean_df = tree_df.copy()
 
-# Remove id and parent columns if present
-for col in ["id", "parent"]:
-    if col in tree_clean_df.columns:
-        tree_clean_df = tree_clean_df.drop(columns=[col])
+def build_tree_rows(tree_df, node_id: int) -> pd.DataFrame:
+    """Rows for the direct children of a folder, formatted for display."""
+    if tree_df is None or tree_df.empty:
+        return pd.DataFrame(columns=["id", "name", "type", "size"])
+
+    ids = tree_children(tree_df, node_id)
+    children = tree_df.slice(ids.start, ids.stop)
+    return pd.DataFrame({
+        "id": list(ids),
+        "name": children["name"].astype(str).to_numpy(),
+        "type": ["folder" if d else "file" for d in children["is_dir"]],
+        "size": [format_size_mb(mb) for mb in children["size_mb"]],
+    })
+
+
+# Filled in by load() when the page is first shown
+tree_node = 0
+tree_path = ""
+tree_rows = pd.DataFrame(columns=["id", "name", "type", "size"])
+tree_columns = ["name", "type", "size"]
+loaded_version = None
+
+
+def _show_node(state: State, node_id: int, tree_df=None):
+    if tree_df is None:
+        tree_df = cache.current.tree_df
+    state.tree_node = node_id
+    state.tree_path = tree_node_path(tree_df, node_id)
+    state.tree_rows = build_tree_rows(tree_df, node_id)
+
+
+def on_tree_expand(state: State, var_name, payload):
+    """Expand the folder whose row was clicked."""
+    row = state.tree_rows.iloc[payload["index"]]
+    if row["type"] == "folder":
+        _show_node(state, int(row["id"]))
+
+
+def on_tree_up(state: State):
+    tree_df = cache.current.tree_df
+    if state.tree_node > 0:
+        _show_node(state, int(tree_df["parent"].iat[state.tree_node]), tree_df)
+
+
+def load(state: State, visited_only: bool = False):
+    """Show the data currently served by the cache (from the root), if not shown already."""
+    snapshot = cache.current
+    if state.loaded_version == snapshot.version or (visited_only and state.loaded_version is None):
+        return
+    _show_node(state, 0, snapshot.tree_df)
+    state.loaded_version = snapshot.version
 
-# Format size column
-if "size_mb" in tree_clean_df.columns:
-    tree_clean_df["size"] = tree_clean_df["size_mb"].apply(format_size_mb)
-    tree_clean_df = tree_clean_df.drop(columns=["size_mb"])
 
 tree_md = Markdown("pages/tree/tree.md")
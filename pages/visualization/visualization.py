@@ -1,69 +1,86 @@
-from taipy.gui import Markdown
-
-from data.cache import (
-    assets,
-    treemap_data,
-    treemap_df,
-    hist_tri_df,
-    hist_mat_df,
-    hist_poly_df,
-    scatter_poly_df,
-    bar_df,
-)
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from taipy.gui import Markdown, State
+
+from data import cache, density, histogram, treemap
+from data.display import format_numbers
 from pages.navbar import navbar
 
 
 # --------------------------------------------------
-# FILTER STATE + OPTIONS (selector currently disabled)
+# FAMILY SELECTOR
 # --------------------------------------------------
 
-# if assets is not None and not assets.empty:
-#     family_options = ["All"] + sorted(assets["asset_family"].astype(str).unique())
-# else:
-#     family_options = ["All"]
-#
-# selected_family = "All"
-#
-# def on_family_change(state):
-#     # Rebuild charts based on selected family
-#     state.viz_state = compute_viz_state(state.selected_family)
-#
-# # This will hold all data/properties for the charts
-# viz_state = {}
+# Filled in by load() when the page is first shown
+family_options = ["All"]
+selected_family = "All"
+
+
+def on_family_change(state: State):
+    # Swap in the charts of the selected family (cached, see viz_state)
+    for name, value in viz_state(state.selected_family).items():
+        state.assign(name, value)
 
 
 # --------------------------------------------------
 # LAYOUT CONFIGS
 # --------------------------------------------------
 
-layout_log_y = {"yaxis": {"type": "log"}}
-layout_log_x = {"xaxis": {"type": "log"}}
+# uirevision keeps the zoom when the re-sampled points come in
+scatter_layout = {
+    "xaxis": {"type": "log", "title": "polycount"},
+    "yaxis": {"title": "materials"},
+    "uirevision": "scatter",
+}
 
 
 # --------------------------------------------------
-# MULTI-TRACE HELPERS (kept for future selector reactivation)
+# PER-FAMILY GROUPING (one pass, shared by every chart)
 # --------------------------------------------------
 
-def build_datasets(df, x_col, y_col, text_col):
-    """
-    Build a list of datasets, one per asset family.
-    Each dataset is a dict with x, y, text arrays.
-    """
-    datasets = []
-    families = sorted(df["family"].unique())
-    for fam in families:
-        sub = df[df["family"] == fam]
-        datasets.append({
-            x_col: sub[x_col].tolist(),
-            y_col: sub[y_col].tolist(),
-            text_col: sub[text_col].tolist(),
-        })
-    return datasets, families
+# The chart frames are row-aligned with the snapshot's assets, so the row
+# numbers of each family are computed once per snapshot and used to slice
+# all of them.
+
+def _group_families(snapshot) -> dict:
+    assets = snapshot.assets
+    groups = {}
+    if assets is not None and not assets.empty:
+        family = assets["asset_family"]
+        codes = family.cat.codes.to_numpy()
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(len(family.cat.categories) + 1))
+        for code, name in enumerate(family.cat.categories):
+            if bounds[code + 1] > bounds[code]:
+                groups[str(name)] = order[bounds[code]:bounds[code + 1]]
+    return groups
+
+
+def family_rows(snapshot) -> dict:
+    """{family: row numbers}, families sorted, from one sort of the family codes."""
+    return snapshot.derived("family_rows", _group_families)
 
 
-def build_properties(families, x_col, y_col, text_col, colors):
+def selected_groups(snapshot, family: str) -> dict:
+    """family_rows restricted to the selected family ("All" for every one)."""
+    groups = family_rows(snapshot)
+    if family == "All":
+        return groups
+    return {family: groups[family]} if family in groups else {}
+
+
+# --------------------------------------------------
+# MULTI-TRACE HELPERS
+# --------------------------------------------------
+
+def build_properties(families, x_col, y_col, text_col, colors, all_families):
     """
     Build a Taipy 'properties' dict mapping datasets to traces.
+    Each family keeps its color (its place in `all_families`) whether shown
+    alone or with the others.
     """
     props = {}
     for i, fam in enumerate(families):
@@ -72,7 +89,10 @@ def build_properties(families, x_col, y_col, text_col, colors):
         props[f"y[{idx}]"] = f"{i}/{y_col}"
         props[f"text[{idx}]"] = f"{i}/{text_col}"
     props["name"] = families
-    props["marker_color"] = colors[:len(families)]
+    props["marker_color"] = [
+        colors[all_families.index(fam) % len(colors)] if fam in all_families else colors[0]
+        for fam in families
+    ]
     return props
 
 
@@ -101,80 +121,372 @@ family_colors = [
 ]
 
 
+# --------------------------------------------------
+# HISTOGRAMS (binned on the server, see data.histogram)
+# --------------------------------------------------
+
+HISTOGRAM_BINS = 30
+HISTOGRAM_TOP = 3  # variants listed in the hover text of a bar
+MEMBERS_LIMIT = 200  # variants listed when a bin is clicked
+
+# Chart prefix -> (assets column, unit, bin mode)
+HISTOGRAMS = {
+    "tri": ("triangles", "tris", histogram.LOG),
+    "mat": ("material_count", "mats", histogram.QUANTILE),
+    "poly": ("polycount", "polys", histogram.LOG),
+}
+
+
+def format_compact(n: float) -> str:
+    """Short axis label: 950, 12k, 3.4M."""
+    for factor, suffix in ((1e9, "G"), (1e6, "M"), (1e3, "k")):
+        if n >= factor:
+            return f"{n / factor:.3g}{suffix}"
+    return f"{n:.3g}"
+
+
+def _selection(groups: dict):
+    """Row numbers of the selected families and the group (trace) of each."""
+    if not groups:
+        return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp)
+    rows = np.concatenate(list(groups.values()))
+    trace = np.repeat(np.arange(len(groups)), [len(r) for r in groups.values()])
+    return rows, trace
+
+
+def histogram_state(snapshot, prefix: str, groups: dict) -> dict:
+    """Stacked per-family bar data, properties, layout and bin edges of one histogram."""
+    column, unit, mode = HISTOGRAMS[prefix]
+    rows, trace = _selection(groups)
+    assets = snapshot.assets
+    values = assets[column].to_numpy()[rows].astype(np.float64)
+    edges = histogram.bin_edges(values, mode, HISTOGRAM_BINS)
+    counts, tops = histogram.histogram(values, trace, len(groups), edges, HISTOGRAM_TOP)
+
+    bin_count = len(edges) - 1
+    labels = [f"{format_compact(lo)}–{format_compact(hi)}" for lo, hi in zip(edges[:-1], edges[1:])]
+
+    # Names of every listed member in one read; empty cells get no hover text
+    cells = list(tops.items())
+    listed = np.concatenate([members for _, members in cells]) if cells else np.zeros(0, dtype=np.intp)
+    names = iter(assets["variant_name"].take(rows[listed]).tolist())
+    shown = iter(format_numbers(values[listed]).tolist())
+    hover = np.full((len(groups), bin_count), "", dtype=object)
+    families = list(groups)
+    for (g, b), members in cells:
+        hover[g, b] = f"{families[g]} · {labels[b]} {unit} · {counts[g, b]:,} variants" + "".join(
+            f"<br>{next(names)} ({next(shown)})" for _ in members
+        )
+
+    bins = list(range(bin_count))
+    data = [
+        {"bin": bins, "count": counts[g].tolist(), "hover": hover[g].tolist()}
+        for g in range(len(groups))
+    ]
+
+    props = build_properties(list(groups), "bin", "count", "hover", family_colors, list(family_rows(snapshot)))
+    for i in range(len(groups)):
+        # Hover text as hovertext (label), so it is not also drawn on the bars
+        props[f"label[{i + 1}]"] = props.pop(f"text[{i + 1}]")
+        props[f"options[{i + 1}]"] = {"hovertemplate": "%{hovertext}<extra></extra>"}
+    layout = {
+        "barmode": "stack",
+        "bargap": 0.05,
+        "xaxis": {"tickmode": "array", "tickvals": list(range(bin_count)), "ticktext": labels, "title": unit},
+        "yaxis": {"title": "variants"},
+    }
+    return {
+        f"{prefix}_data": data,
+        f"{prefix}_props": props,
+        f"{prefix}_layout": layout,
+        f"{prefix}_edges": edges.tolist(),
+    }
+
+
+def on_histogram_click(state: State, id: str, payload: dict):
+    """List the variants of the clicked bin (chart id = histogram prefix)."""
+    if id not in HISTOGRAMS or payload.get("x") is None:
+        return
+    column, unit, _ = HISTOGRAMS[id]
+    edges = np.array(getattr(state, f"{id}_edges"))
+    bin_ = int(round(float(payload["x"])))
+    if not 0 <= bin_ < len(edges) - 1:
+        return
+
+    snapshot = cache.current
+    assets = snapshot.assets
+    rows, _ = _selection(selected_groups(snapshot, state.selected_family))
+    values = assets[column].to_numpy()[rows]
+    members = rows[histogram.bin_members(values, edges, bin_)]
+
+    shown = members[:MEMBERS_LIMIT]
+    state.bin_members = pd.DataFrame({
+        "variant": assets["variant_name"].take(shown).to_numpy(),
+        "family": assets["asset_family"].take(shown).astype(str).to_numpy(),
+        unit: format_numbers(assets[column].take(shown)).to_numpy(),
+    })
+    state.bin_members_title = (
+        f"{len(members):,} variants with {format_compact(edges[bin_])}–{format_compact(edges[bin_ + 1])} {unit}"
+        + (f" (largest {MEMBERS_LIMIT} shown)" if len(members) > MEMBERS_LIMIT else "")
+    )
+
+
+# --------------------------------------------------
+# SCATTER (density-aware, see data.density)
+# --------------------------------------------------
+
+def _scatter_hover(assets, rows: np.ndarray) -> list:
+    names = assets["variant_name"].take(rows).to_numpy()
+    polys = format_numbers(assets["polycount"].take(rows)).to_numpy()
+    mats = format_numbers(assets["material_count"].take(rows)).to_numpy()
+    return (names + " — " + polys + " polys — " + mats + " mats").tolist()
+
+
+def scatter_state(snapshot, groups: dict, x_range=None, y_range=None) -> dict:
+    """
+    Polycount vs materials of the selected families, within the given
+    ranges: one trace of individual points per family, plus one trace of
+    aggregated cells when there are more points than density.SCATTER_MAX_POINTS.
+    """
+    rows, trace = _selection(groups)
+    assets = snapshot.assets
+    x = assets["polycount"].to_numpy()[rows]
+    y = assets["material_count"].to_numpy()[rows]
+    visible = density.in_range(x, y, x_range, y_range)
+    rows, trace, x, y = rows[visible], trace[visible], x[visible], y[visible]
+    points, cells = density.sample(x, y)
+
+    families = list(groups)
+    data = []
+    for g in range(len(families)):
+        shown = points[trace[points] == g]
+        data.append({
+            "polycount": x[shown].tolist(),
+            "materials": y[shown].tolist(),
+            "hover": _scatter_hover(assets, rows[shown]),
+        })
+    props = build_properties(families, "polycount", "materials", "hover", family_colors, list(family_rows(snapshot)))
+
+    if len(cells["count"]):
+        i = len(families)
+        counts = cells["count"]
+        data.append({
+            "polycount": cells["x"].tolist(),
+            "materials": cells["y"].tolist(),
+            "count": counts.tolist(),
+            "size": (6 + 14 * np.log1p(counts) / np.log1p(counts.max())).tolist(),
+            "hover": [
+                f"{n:,} variants<br>{format_compact(x0)}–{format_compact(x1)} polys<br>{y0:,.0f}–{y1:,.0f} mats"
+                for n, x0, x1, y0, y1 in zip(
+                    counts.tolist(), cells["x_min"], cells["x_max"], cells["y_min"], cells["y_max"]
+                )
+            ],
+        })
+        props[f"x[{i + 1}]"] = f"{i}/polycount"
+        props[f"y[{i + 1}]"] = f"{i}/materials"
+        props[f"text[{i + 1}]"] = f"{i}/hover"
+        props[f"marker[{i + 1}]"] = {
+            "color": f"{i}/count",
+            "size": f"{i}/size",
+            "symbol": "square",
+            "opacity": 0.7,
+            "colorscale": "Viridis",
+            "showscale": True,
+            "colorbar": {"title": "variants"},
+        }
+        props["name"] = families + [f"Density ({int(counts.sum()):,} variants)"]
+    return {"scatter_data": data, "scatter_props": props}
+
+
+def _axis_range(payload: dict, axis: str):
+    """(low, high) of an axis from Plotly relayout data, None when autoranged."""
+    if payload.get(f"{axis}.autorange"):
+        return None
+    bounds = payload.get(f"{axis}.range")
+    if bounds is None:
+        bounds = (payload.get(f"{axis}.range[0]"), payload.get(f"{axis}.range[1]"))
+    if bounds[0] is None or bounds[1] is None:
+        return None
+    return min(bounds), max(bounds)
+
+
+def on_scatter_range(state: State, id: str, payload: dict):
+    """Re-sample the scatter for the visible range after a zoom or pan."""
+    if "xaxis.autorange" in payload or "yaxis.autorange" in payload:
+        full = viz_state(state.selected_family)
+        state.scatter_data = full["scatter_data"]
+        state.scatter_props = full["scatter_props"]
+        return
+    x_range = _axis_range(payload, "xaxis")
+    y_range = _axis_range(payload, "yaxis")
+    if x_range is None and y_range is None:
+        return
+    if x_range is not None:
+        # The polycount axis is logarithmic: Plotly reports log10 values
+        x_range = (10 ** x_range[0], 10 ** x_range[1])
+
+    snapshot = cache.current
+    groups = selected_groups(snapshot, state.selected_family)
+    for name, value in scatter_state(snapshot, groups, x_range, y_range).items():
+        state.assign(name, value)
+
+
 # --------------------------------------------------
 # DERIVED STATE: DATA + PROPERTIES PER CHART
-# (we compute only the "All" case once, no selector)
 # --------------------------------------------------
 
-def compute_viz_state(selected_family_value: str):
+def compute_viz_state(snapshot, selected_family_value: str):
     """
     Build data+properties for all charts, possibly filtered by family.
     Returns a dict:
-      tri_data, tri_props, mat_data, mat_props, poly_data, poly_props, scatter_data, scatter_props
+      tri_*, mat_*, poly_* (data, props, layout, edges), scatter_data, scatter_props
+    The scatter covers the full range (zoomed views are per client, see
+    on_scatter_range).
     """
-    state = {}
+    groups = selected_groups(snapshot, selected_family_value)
 
-    # ----- TRIANGLES -----
-    if selected_family_value == "All":
-        tri_source = hist_tri_df
-    else:
-        tri_source = hist_tri_df[hist_tri_df["family"] == selected_family_value]
-
-    tri_data, tri_families = build_datasets(tri_source, "variant", "value", "hover")
-    tri_props = build_properties(tri_families, "variant", "value", "hover", family_colors)
-    state["tri_data"] = tri_data
-    state["tri_props"] = tri_props
-
-    # ----- MATERIALS -----
-    if selected_family_value == "All":
-        mat_source = hist_mat_df
-    else:
-        mat_source = hist_mat_df[hist_mat_df["family"] == selected_family_value]
-
-    mat_data, mat_families = build_datasets(mat_source, "variant", "value", "hover")
-    mat_props = build_properties(mat_families, "variant", "value", "hover", family_colors)
-    state["mat_data"] = mat_data
-    state["mat_props"] = mat_props
-
-    # ----- POLYCOUNT -----
-    if selected_family_value == "All":
-        poly_source = hist_poly_df
-    else:
-        poly_source = hist_poly_df[hist_poly_df["family"] == selected_family_value]
-
-    poly_data, poly_families = build_datasets(poly_source, "variant", "value", "hover")
-    poly_props = build_properties(poly_families, "variant", "value", "hover", family_colors)
-    state["poly_data"] = poly_data
-    state["poly_props"] = poly_props
-
-    # ----- SCATTER (POLYCOUNT vs MATERIALS) -----
-    if selected_family_value == "All":
-        scatter_source = scatter_poly_df
-    else:
-        scatter_source = scatter_poly_df[scatter_poly_df["family"] == selected_family_value]
-
-    scatter_data, scatter_families = build_datasets(scatter_source, "polycount", "materials", "hover")
-    scatter_props = build_properties(scatter_families, "polycount", "materials", "hover", family_colors)
-    state["scatter_data"] = scatter_data
-    state["scatter_props"] = scatter_props
+    state = {}
+    for prefix in HISTOGRAMS:
+        state.update(histogram_state(snapshot, prefix, groups))
 
+    state.update(scatter_state(snapshot, groups))
     return state
 
 
-# Compute the "All families" multi-trace data once, at import
-_viz_all = compute_viz_state("All")
-
-tri_data = _viz_all["tri_data"]
-tri_props = _viz_all["tri_props"]
+# Chart state per (cache version, family), computed on first use and shared
+# by every client; the least recently used families are dropped.
+VIZ_CACHE_SIZE = 16
+_viz_states = OrderedDict()
+_viz_lock = threading.Lock()
+
+
+def viz_state(family: str, snapshot=None) -> dict:
+    snapshot = snapshot or cache.current
+    key = (snapshot.version, family)
+    with _viz_lock:
+        state = _viz_states.get(key)
+        if state is not None:
+            _viz_states.move_to_end(key)
+            return state
+    state = compute_viz_state(snapshot, family)
+    with _viz_lock:
+        _viz_states[key] = state
+        while len(_viz_states) > VIZ_CACHE_SIZE:
+            _viz_states.popitem(last=False)
+    return state
 
-mat_data = _viz_all["mat_data"]
-mat_props = _viz_all["mat_props"]
 
-poly_data = _viz_all["poly_data"]
-poly_props = _viz_all["poly_props"]
+# --------------------------------------------------
+# TREEMAP (drill-down, see data.treemap)
+# --------------------------------------------------
 
-scatter_data = _viz_all["scatter_data"]
-scatter_props = _viz_all["scatter_props"]
+# Taipy does not report clicks on treemaps, so drilling below the loaded
+# levels goes through a selector of the shown node's children. Plotly still
+# zooms into the loaded levels on click.
+treemap_options = {
+    "branchvalues": "total",
+    "texttemplate": "%{text}<br>%{value:,.2f} MB",
+    "hovertemplate": "%{text}<br>%{value:,.2f} MB<br>%{percentParent:.1%} of parent<extra></extra>",
+    "pathbar": {"visible": False},
+}
+
+TREEMAP_CACHE_SIZE = 64
+_treemap_views = OrderedDict()
+
+
+def treemap_view(node: str, snapshot=None) -> dict:
+    """Treemap frame, drillable children and path of a node, cached per version."""
+    snapshot = snapshot or cache.current
+    key = (snapshot.version, node)
+    with _viz_lock:
+        view = _treemap_views.get(key)
+        if view is not None:
+            _treemap_views.move_to_end(key)
+            return view
+
+    df = snapshot.treemap_df if node == treemap.ROOT else treemap.frame(treemap.subtree(snapshot.assets, node))
+    below = df[df["parent"] == node]
+    view = {
+        "treemap_df": df,
+        "treemap_children": [
+            (child, label) for child, label in zip(below["id"], below["label"]) if treemap.is_drillable(child)
+        ],
+        "treemap_path": node.replace("/", " / "),
+    }
+    with _viz_lock:
+        _treemap_views[key] = view
+        while len(_treemap_views) > TREEMAP_CACHE_SIZE:
+            _treemap_views.popitem(last=False)
+    return view
+
+
+def show_treemap(state: State, node: str, snapshot=None):
+    snapshot = snapshot or cache.current
+    view = treemap_view(node, snapshot)
+    if node != treemap.ROOT and len(view["treemap_df"]) <= 1:
+        # The node is gone from this version of the data
+        node, view = treemap.ROOT, treemap_view(treemap.ROOT, snapshot)
+    state.treemap_node = node
+    state.treemap_drill = None
+    for name, value in view.items():
+        state.assign(name, value)
+
+
+def on_treemap_drill(state: State):
+    if state.treemap_drill:
+        show_treemap(state, state.treemap_drill)
+
+
+def on_treemap_up(state: State):
+    if state.treemap_node != treemap.ROOT:
+        show_treemap(state, state.treemap_node.rsplit("/", 1)[0])
+
+
+# Filled in by load() when the page is first shown
+tri_data = []
+tri_props = {}
+tri_layout = {}
+tri_edges = []
+
+mat_data = []
+mat_props = {}
+mat_layout = {}
+mat_edges = []
+
+poly_data = []
+poly_props = {}
+poly_layout = {}
+poly_edges = []
+
+bin_members = pd.DataFrame(columns=["variant", "family"])
+bin_members_title = "Click a histogram bar to list its variants"
+
+scatter_data = []
+scatter_props = {}
+
+treemap_df = pd.DataFrame(columns=["id", "label", "parent", "value"])
+treemap_node = treemap.ROOT
+treemap_path = treemap.ROOT
+treemap_children = []
+treemap_drill = None
+
+bar_df = pd.DataFrame(columns=["family", "size", "hover"])
+loaded_version = None
+
+
+def load(state: State, visited_only: bool = False):
+    """Show the data currently served by the cache, if not shown already."""
+    snapshot = cache.current
+    if state.loaded_version == snapshot.version or (visited_only and state.loaded_version is None):
+        return
+    state.family_options = ["All"] + list(family_rows(snapshot))
+    if state.selected_family not in state.family_options:
+        state.selected_family = "All"
+    for name, value in viz_state(state.selected_family, snapshot).items():
+        state.assign(name, value)
+    show_treemap(state, state.treemap_node, snapshot)
+    state.bar_df = snapshot.bar_df
+    state.loaded_version = snapshot.version
 
 
 # --------------------------------------------------
@@ -1,5 +1,242 @@
+import threading
+import weakref
+from collections import OrderedDict
+
+import numpy as np
 import pandas as pd
 
+# Rows above this poly count are "heavy" (heavy_only filter)
+HEAVY_POLY_COUNT = 500_000
+
+# Memory bound of the row selections each FilterIndex keeps
+RESULT_CACHE_BYTES = 32 * 1024 * 1024
+
+# Suggestions: assets are compared with the others of their family
+# (asset_family, or asset_type for frames without families)
+FAMILY_COLUMNS = ("asset_family", "asset_type")
+PERCENTILES = (50, 90, 99)
+ROBUST_Z_LIMIT = 3.5  # modified z-score above which a value is an outlier
+MIN_FAMILY_SIZE = 5  # smaller families are not checked for outliers
+MAX_FINDINGS = 10
+
+# Absolute budgets, checked whatever the families look like
+POLY_BUDGET = 1_000_000  # per asset
+TOTAL_SIZE_BUDGET_MB = 5000  # whole selection
+AVERAGE_POLY_BUDGET = 300_000
+FINDINGS_CACHE_SIZE = 64  # filter signatures whose findings each FilterIndex keeps
+SUGGESTIONS_CACHE_SIZE = 64  # (version, filters) whose suggestions find_suggestions keeps
+
+# apply_filters arguments matching every row
+SELECT_ALL = {
+    "asset_type": "All",
+    "poly_range": (-np.inf, np.inf),
+    "file_range": (-np.inf, np.inf),
+    "scene_filter": "All",
+    "heavy_only": False,
+}
+
+
+class FilterIndex:
+    """
+    Indexes of a metadata frame for apply_filters.
+
+    poly_count and file_size_mb (missing sizes as 0) are kept sorted with
+    their row numbers, so a range is two binary searches and a slice.
+    scene_name and asset_type values each get a bitmap (one bit per row)
+    and their sorted row numbers. A query starts from the smallest of these
+    candidate sets and checks the other predicates on those rows only, so
+    it costs about the size of the result rather than of the frame. Row
+    selections are cached per filter tuple in an LRU bounded to
+    RESULT_CACHE_BYTES, and the suggestion findings of a selection in an
+    LRU of FINDINGS_CACHE_SIZE.
+
+    The frame must not be modified in place once indexed; filter_index
+    rebuilds the index when the frame's length or columns change.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.rows = len(df)
+        self.fingerprint = _fingerprint(df)
+        metrics, self.family_codes, self.family_names = _suggestion_columns(df)
+        self.poly = metrics["poly_count"]
+        self.size = metrics["file_size_mb"]
+        self.materials = metrics.get("material_count")
+        self.poly_order, self.poly_sorted = self._sorted(self.poly)
+        self.size_order, self.size_sorted = self._sorted(self.size)
+        self.scenes = self._bitmaps(df["scene_name"])
+        self.types = self._bitmaps(df["asset_type"])
+
+        self._results = OrderedDict()
+        self._result_bytes = 0
+        self._findings = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _sorted(values: np.ndarray):
+        order = np.argsort(values, kind="stable")
+        return order, values[order]
+
+    def _bitmaps(self, column: pd.Series) -> dict:
+        """
+        value -> (bitmap, sorted row numbers). One sort of the factorized
+        column groups the rows by value; the bitmaps are rows of a single
+        (values, bytes) array, each byte OR-ed from its rows' bits in one
+        reduceat over that order.
+        """
+        codes, uniques = pd.factorize(column)
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+        width = (self.rows + 7) // 8
+        packed = np.zeros((len(uniques), width), dtype=np.uint8)
+
+        rows = order[bounds[0]:]  # missing values (code -1) sort first
+        if len(rows):
+            cell = codes[rows].astype(np.int64) * width + (rows >> 3)
+            starts = np.flatnonzero(np.r_[True, cell[1:] != cell[:-1]])
+            bits = (128 >> (rows & 7)).astype(np.uint8)
+            packed.reshape(-1)[cell[starts]] = np.bitwise_or.reduceat(bits, starts)
+        return {
+            value: (packed[code], order[bounds[code]:bounds[code + 1]])
+            for code, value in enumerate(uniques)
+        }
+
+    @staticmethod
+    def _range(order, sorted_values, low, high) -> np.ndarray:
+        lo = np.searchsorted(sorted_values, low, side="left")
+        hi = np.searchsorted(sorted_values, high, side="right")
+        return order[lo:hi]
+
+    @staticmethod
+    def _has_bit(bitmap: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        return (bitmap[rows >> 3] >> (7 - (rows & 7)) & 1).astype(bool)
+
+    @staticmethod
+    def _key(asset_type, poly_range, file_range, scene_filter, heavy_only) -> tuple:
+        return (asset_type, tuple(poly_range), tuple(file_range), scene_filter, bool(heavy_only))
+
+    def select(self, asset_type, poly_range, file_range, scene_filter, heavy_only) -> np.ndarray:
+        """Row numbers (ascending) matching every predicate."""
+        key = self._key(asset_type, poly_range, file_range, scene_filter, heavy_only)
+        with self._lock:
+            rows = self._results.get(key)
+            if rows is not None:
+                self._results.move_to_end(key)
+                return rows
+
+        poly_min, poly_max = poly_range
+        if heavy_only:
+            poly_min = max(poly_min, np.nextafter(HEAVY_POLY_COUNT, np.inf))
+        file_min, file_max = file_range
+
+        empty = (np.zeros(0, dtype=bool), np.zeros(0, dtype=np.intp))
+        bitmaps = []
+        if scene_filter != "All":
+            bitmaps.append(self.scenes.get(scene_filter, empty))
+        if asset_type != "All":
+            bitmaps.append(self.types.get(asset_type, empty))
+
+        # Candidates: the smallest of the range slices and equality row lists
+        candidates = [
+            ("poly", self._range(self.poly_order, self.poly_sorted, poly_min, poly_max)),
+            ("size", self._range(self.size_order, self.size_sorted, file_min, file_max)),
+        ] + [("bitmap", rows) for _, rows in bitmaps]
+        driver, rows = min(candidates, key=lambda c: len(c[1]))
+
+        if driver != "poly":
+            poly = self.poly[rows]
+            rows = rows[(poly >= poly_min) & (poly <= poly_max)]
+        if driver != "size":
+            size = self.size[rows]
+            rows = rows[(size >= file_min) & (size <= file_max)]
+        for bitmap, _ in bitmaps:
+            if len(bitmap) == 0:
+                rows = rows[:0]
+            else:
+                rows = rows[self._has_bit(bitmap, rows)]
+        rows = np.sort(rows)
+
+        with self._lock:
+            if key not in self._results:
+                self._results[key] = rows
+                self._result_bytes += rows.nbytes
+                while self._result_bytes > RESULT_CACHE_BYTES and len(self._results) > 1:
+                    _, dropped = self._results.popitem(last=False)
+                    self._result_bytes -= dropped.nbytes
+        return rows
+
+    def findings(self, asset_type, poly_range, file_range, scene_filter, heavy_only) -> list:
+        """Ranked findings (see find_issues) of the rows matching the filters, memoized."""
+        key = self._key(asset_type, poly_range, file_range, scene_filter, heavy_only)
+        with self._lock:
+            found = self._findings.get(key)
+            if found is not None:
+                self._findings.move_to_end(key)
+                return found
+
+        rows = self.select(asset_type, poly_range, file_range, scene_filter, heavy_only)
+        metrics = {"poly_count": self.poly[rows], "file_size_mb": self.size[rows]}
+        if self.materials is not None:
+            metrics["material_count"] = self.materials[rows]
+        found = find_issues(metrics, self.family_codes[rows], self.family_names, rows)
+
+        with self._lock:
+            self._findings[key] = found
+            while len(self._findings) > FINDINGS_CACHE_SIZE:
+                self._findings.popitem(last=False)
+        return found
+
+
+def _suggestion_columns(df: pd.DataFrame):
+    """(metrics, family codes, family names) of a frame, as find_issues takes them."""
+    metrics = {
+        "poly_count": df["poly_count"].to_numpy(dtype=np.float64),
+        "file_size_mb": df["file_size_mb"].fillna(0).to_numpy(dtype=np.float64),
+    }
+    if "material_count" in df.columns:
+        metrics["material_count"] = df["material_count"].fillna(0).to_numpy(dtype=np.float64)
+
+    family = next((column for column in FAMILY_COLUMNS if column in df.columns), None)
+    if family is None:
+        return metrics, np.zeros(len(df), dtype=np.intp), ["All"]
+    codes, uniques = pd.factorize(df[family])
+    return metrics, np.where(codes < 0, len(uniques), codes), [str(value) for value in uniques] + ["(none)"]
+
+
+def _fingerprint(df: pd.DataFrame) -> tuple:
+    """
+    Cheap identity of a frame's contents: its length, columns, and where
+    each column's data lives. Replacing a column or adding rows changes it;
+    writing values into a column in place does not.
+    """
+    tokens = []
+    for column in df.columns:
+        values = df[column]
+        if isinstance(values.dtype, np.dtype):
+            tokens.append(values.to_numpy().__array_interface__["data"][0])
+        else:
+            tokens.append(id(values.array))
+    return len(df), tuple(df.columns), tuple(tokens)
+
+
+_indexes = {}  # id(df) -> (weak reference to df, FilterIndex)
+_indexes_lock = threading.Lock()
+
+
+def filter_index(df: pd.DataFrame) -> FilterIndex:
+    """
+    The FilterIndex of a frame, built on first use, rebuilt when the
+    frame's fingerprint changes and dropped with the frame.
+    """
+    key = id(df)
+    with _indexes_lock:
+        entry = _indexes.get(key)
+        if entry is not None and entry[0]() is df and entry[1].fingerprint == _fingerprint(df):
+            return entry[1]
+    index = FilterIndex(df)
+    with _indexes_lock:
+        _indexes[key] = (weakref.ref(df, lambda _, key=key: _indexes.pop(key, None)), index)
+    return index
+
 
 def apply_filters(
     df: pd.DataFrame,
@@ -11,63 +248,285 @@ def apply_filters(
 ) -> pd.DataFrame:
     """
     Apply all filters to the base dataframe and return a new filtered dataframe.
+    Rows are selected through the frame's FilterIndex and taken in one step.
     """
-    result = df.copy()
+    rows = filter_index(df).select(asset_type, poly_range, file_range, scene_filter, heavy_only)
+    return df.take(rows)
+
 
-    # Scene filter
-    if scene_filter != "All":
-        result = result[result["scene_name"] == scene_filter]
+# --------------------------------------------------
+# SUGGESTIONS ENGINE
+# --------------------------------------------------
 
-    # Asset type
-    if asset_type != "All":
-        result = result[result["asset_type"] == asset_type]
+# Metric -> (noun in messages, value format, what to do about outliers,
+# unit the values are compared in: log10(1 + value * unit))
+OUTLIER_METRICS = {
+    "poly_count": ("polycount", "{:,.0f} polys", "Consider LODs or decimation.", 1),
+    "file_size_mb": ("file size", "{:,.1f} MB", "Consider compressing or removing unused data.", 1024 * 1024),
+    "material_count": ("material count", "{:,.0f} materials", "Consider merging materials or a texture atlas.", 1),
+}
 
-    # Poly range
-    poly_min, poly_max = poly_range
-    result = result[result["poly_count"].between(poly_min, poly_max)]
 
-    # File size range
-    file_min, file_max = file_range
-    result = result[result["file_size_mb"].fillna(0).between(file_min, file_max)]
+def _sorted_by_family(values: np.ndarray, codes: np.ndarray) -> np.ndarray:
+    # Small integer codes make the second (stable) sort a radix sort
+    order = np.argsort(values)
+    return values[order[np.argsort(codes[order], kind="stable")]]
 
-    # Heavy only
-    if heavy_only:
-        # You can tune this threshold
-        result = result[result["poly_count"] > 500_000]
 
-    return result
+def _quantiles(sorted_values: np.ndarray, starts: np.ndarray, counts: np.ndarray, q: float) -> np.ndarray:
+    """Per-family quantile (linear interpolation) of values sorted by family then value."""
+    if len(sorted_values) == 0:
+        return np.zeros(len(counts))
+    position = starts + np.maximum(counts - 1, 0) * q
+    low = np.minimum(np.floor(position).astype(np.int64), len(sorted_values) - 1)
+    high = np.minimum(np.ceil(position).astype(np.int64), len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (position - low)
 
 
-def compute_suggestions(df: pd.DataFrame) -> list[str]:
+def family_stats(values: np.ndarray, codes: np.ndarray, family_count: int):
     """
-    Generate simple, readable optimization suggestions based on the current filtered set.
+    Per-family counts and PERCENTILES of `values`, and the robust z-score of
+    every value within its family: 0.6745 * (value - median) / MAD, with the
+    mean absolute deviation standing in when the MAD is 0.
+    Returns (counts, {percentile: per-family values}, z).
     """
-    if df.empty:
+    counts = np.bincount(codes, minlength=family_count)
+    codes = codes.astype(np.min_scalar_type(family_count))
+    starts = np.r_[0, np.cumsum(counts)[:-1]]
+    ordered = _sorted_by_family(values, codes)
+    percentiles = {p: _quantiles(ordered, starts, counts, p / 100) for p in PERCENTILES}
+
+    median = _quantiles(ordered, starts, counts, 0.5)
+    deviation = values - median[codes]
+    mad = _quantiles(_sorted_by_family(np.abs(deviation), codes), starts, counts, 0.5)
+    mean_ad = np.bincount(codes, weights=np.abs(deviation), minlength=family_count) / np.maximum(counts, 1)
+    scale = np.where(mad > 0, mad / 0.6745, mean_ad * 1.2533)[codes]
+    z = np.divide(deviation, scale, out=np.zeros_like(deviation), where=scale > 0)
+    return counts, percentiles, z
+
+
+def _outlier_findings(metric, values, codes, family_names, rows) -> list:
+    # Sizes and counts spread multiplicatively: compare them in log space
+    unit = OUTLIER_METRICS[metric][3]
+    counts, percentiles, z = family_stats(np.log10(1 + np.maximum(values, 0) * unit), codes, len(family_names))
+    flagged = np.flatnonzero((z > ROBUST_Z_LIMIT) & (counts[codes] >= MIN_FAMILY_SIZE))
+    if len(flagged) == 0:
         return []
+    flagged = flagged[np.lexsort((-z[flagged], codes[flagged]))]
+    families = codes[flagged]
+    starts = np.flatnonzero(np.r_[True, families[1:] != families[:-1]])
+    found = []
+    for group in np.split(flagged, starts[1:]):
+        code = int(codes[group[0]])
+        found.append({
+            "kind": "outlier",
+            "metric": metric,
+            "family": family_names[code],
+            "severity": float(z[group[0]]),
+            "rows": rows[group],
+            "values": values[group],
+            "percentiles": {p: float((10 ** percentiles[p][code] - 1) / unit) for p in PERCENTILES},
+        })
+    return found
 
-    suggestions: list[str] = []
 
-    avg_poly = df["poly_count"].mean()
-    max_poly = df["poly_count"].max()
-    total_mb = df["file_size_mb"].sum()
+def _face_findings(polys, sizes, rows) -> list:
+    found = []
+    empty = np.flatnonzero((polys <= 0) & (sizes > 0))
+    if len(empty):
+        empty = empty[np.argsort(-sizes[empty], kind="stable")]
+        found.append({
+            "kind": "no_faces",
+            "metric": "file_size_mb",
+            "severity": np.inf,  # always a defect, listed first
+            "rows": rows[empty],
+            "values": sizes[empty],
+        })
 
-    if max_poly > 1_000_000:
-        heavy_assets = df[df["poly_count"] > 1_000_000]["asset_name"].tolist()
-        suggestions.append(
-            f"{len(heavy_assets)} assets exceed 1M polys. Consider LODs or decimation for: {', '.join(heavy_assets[:5])}..."
-        )
+    # Bytes per face, compared across the whole selection in log space
+    meshes = np.flatnonzero((polys > 0) & (sizes > 0))
+    if len(meshes) >= MIN_FAMILY_SIZE:
+        bytes_per_face = sizes[meshes] * (1024 * 1024) / polys[meshes]
+        single = np.zeros(len(meshes), dtype=np.intp)
+        _, percentiles, z = family_stats(np.log10(bytes_per_face), single, 1)
+        flagged = np.flatnonzero(z > ROBUST_Z_LIMIT)
+        if len(flagged):
+            flagged = flagged[np.argsort(-z[flagged], kind="stable")]
+            found.append({
+                "kind": "bytes_per_face",
+                "metric": "bytes_per_face",
+                "severity": float(z[flagged[0]]),
+                "rows": rows[meshes[flagged]],
+                "values": bytes_per_face[flagged],
+                "percentiles": {p: float(10 ** percentiles[p][0]) for p in PERCENTILES},
+            })
+    return found
 
-    if total_mb > 5000:
-        suggestions.append(
-            f"Total file size is {total_mb:.1f} MB. Consider compressing or removing unused assets."
-        )
 
-    if avg_poly > 300_000:
-        suggestions.append(
-            f"Average poly count per asset is {avg_poly:,.0f}. Review topology or proxy workflows."
+def _budget_findings(polys, sizes, rows) -> list:
+    """
+    Budget overruns. Severity is ROBUST_Z_LIMIT times the ratio to the
+    budget, so a value at the budget ranks like a borderline outlier.
+    """
+    found = []
+    heavy = np.flatnonzero(polys > POLY_BUDGET)
+    if len(heavy):
+        heavy = heavy[np.argsort(-polys[heavy], kind="stable")]
+        found.append({
+            "kind": "poly_budget",
+            "metric": "poly_count",
+            "severity": ROBUST_Z_LIMIT * float(polys[heavy[0]]) / POLY_BUDGET,
+            "rows": rows[heavy],
+            "values": polys[heavy],
+        })
+    total = float(sizes.sum())
+    if total > TOTAL_SIZE_BUDGET_MB:
+        found.append({
+            "kind": "size_budget",
+            "metric": "file_size_mb",
+            "severity": ROBUST_Z_LIMIT * total / TOTAL_SIZE_BUDGET_MB,
+            "rows": rows[:0],
+            "values": np.array([total]),
+        })
+    counted = polys[~np.isnan(polys)]
+    average = float(counted.mean()) if len(counted) else 0.0
+    if average > AVERAGE_POLY_BUDGET:
+        found.append({
+            "kind": "average_poly_budget",
+            "metric": "poly_count",
+            "severity": ROBUST_Z_LIMIT * average / AVERAGE_POLY_BUDGET,
+            "rows": rows[:0],
+            "values": np.array([average]),
+        })
+    return found
+
+
+def find_issues(metrics: dict, codes: np.ndarray, family_names: list, rows: np.ndarray) -> list:
+    """
+    Findings for a selection of assets, most severe first (at most
+    MAX_FINDINGS). `metrics` maps OUTLIER_METRICS columns to the values of
+    the selected rows, `codes` gives their family (index in `family_names`)
+    and `rows` their row numbers in the frame. Each finding is a dict with
+    kind, metric, severity (robust z-score, in log space), rows and values
+    (worst first), plus family and percentiles where they apply. Budget
+    overruns (POLY_BUDGET, TOTAL_SIZE_BUDGET_MB, AVERAGE_POLY_BUDGET) are
+    ranked with them.
+    """
+    found = _budget_findings(metrics["poly_count"], metrics["file_size_mb"], rows)
+    for metric, values in metrics.items():
+        found.extend(_outlier_findings(metric, values, codes, family_names, rows))
+    found.extend(_face_findings(metrics["poly_count"], metrics["file_size_mb"], rows))
+    found.sort(key=lambda finding: (-finding["severity"], -len(finding["rows"])))
+    return found[:MAX_FINDINGS]
+
+
+def _examples(df: pd.DataFrame, finding: dict, fmt: str, shown: int = 5) -> str:
+    names = df["asset_name"].take(finding["rows"][:shown]).tolist()
+    text = ", ".join(f"{name} ({fmt.format(value)})" for name, value in zip(names, finding["values"][:shown].tolist()))
+    more = len(finding["rows"]) - shown
+    return text + (f" and {more:,} more" if more > 0 else "")
+
+
+def describe_finding(df: pd.DataFrame, finding: dict) -> str:
+    """One readable, actionable line for a finding of find_issues."""
+    count = len(finding["rows"])
+    assets = f"{count:,} asset{'s' if count != 1 else ''}"
+    if finding["kind"] == "outlier":
+        noun, fmt, action, _ = OUTLIER_METRICS[finding["metric"]]
+        p = finding["percentiles"]
+        return (
+            f"{finding['family']}: {assets} far above the family's {noun} "
+            f"(median {fmt.format(p[50])}, p90 {fmt.format(p[90])}): "
+            f"{_examples(df, finding, fmt)}. {action}"
+        )
+    if finding["kind"] == "poly_budget":
+        return (
+            f"{assets} over {POLY_BUDGET:,} polys: {_examples(df, finding, '{:,.0f} polys')}. "
+            "Consider LODs or decimation."
+        )
+    if finding["kind"] == "size_budget":
+        return (
+            f"Total file size is {finding['values'][0]:,.1f} MB. "
+            "Consider compressing or removing unused assets."
         )
+    if finding["kind"] == "average_poly_budget":
+        return (
+            f"Average poly count per asset is {finding['values'][0]:,.0f}. "
+            "Review topology or proxy workflows."
+        )
+    if finding["kind"] == "no_faces":
+        return f"{assets} with no faces but stored data: {_examples(df, finding, '{:,.1f} MB')}. Remove them or check the export."
+    p = finding["percentiles"]
+    return (
+        f"{assets} with far more bytes per face than the rest of the selection "
+        f"(median {p[50]:,.0f} B/face): {_examples(df, finding, '{:,.0f} B/face')}. "
+        "Check for unused attributes, duplicated data or embedded textures."
+    )
+
+
+_suggestions = OrderedDict()  # (version, filter key) -> findings with their messages
+_suggestions_lock = threading.Lock()
+
+
+def _filter_key(filters: dict):
+    """FilterIndex key of keyword apply_filters arguments, None without any."""
+    if not filters:
+        return None
+    unknown = set(filters) - set(SELECT_ALL)
+    if unknown:
+        raise TypeError(f"unknown filters: {', '.join(sorted(unknown))}")
+    return FilterIndex._key(**{**SELECT_ALL, **filters})
+
+
+def find_suggestions(df: pd.DataFrame, version=None, **filters) -> list[dict]:
+    """
+    Ranked findings for the rows of `df` matching the filters (keyword
+    apply_filters arguments; the omitted ones match everything), each with
+    its "message". With filters, findings are memoized per frame and filter
+    signature by the frame's FilterIndex, so pass the unfiltered frame. With
+    none, they are computed over the whole frame without building an index.
+
+    `version` names the contents of `df` (e.g. the serving Snapshot.version;
+    a new version must come with new contents). Given one, the findings and
+    their messages are memoized per version and filters, the unfiltered
+    frame included, and returned as they are: do not modify them.
+    """
+    if df.empty:
+        return []
+    key = _filter_key(filters)
+    if version is not None:
+        with _suggestions_lock:
+            found = _suggestions.get((version, key))
+            if found is not None:
+                _suggestions.move_to_end((version, key))
+                return found
+
+    if key is not None:
+        found = filter_index(df).findings(*key)
+    else:
+        metrics, codes, family_names = _suggestion_columns(df)
+        found = find_issues(metrics, codes, family_names, np.arange(len(df)))
+    found = [dict(finding, message=describe_finding(df, finding)) for finding in found]
+
+    if version is not None:
+        with _suggestions_lock:
+            _suggestions[(version, key)] = found
+            while len(_suggestions) > SUGGESTIONS_CACHE_SIZE:
+                _suggestions.popitem(last=False)
+    return found
+
 
+def compute_suggestions(df: pd.DataFrame, version=None, **filters) -> list[str]:
+    """
+    Generate readable optimization suggestions, most important first, for
+    `df` or, given apply_filters arguments, for its rows matching them.
+    Pass the unfiltered frame with the filters rather than a filtered copy:
+    a copy is a new frame every time, so nothing could be reused. With a
+    `version`, suggestions are memoized (see find_suggestions).
+    """
+    if df.empty:
+        return []
+    suggestions = [finding["message"] for finding in find_suggestions(df, version, **filters)]
     if not suggestions:
         suggestions.append("Current selection looks reasonable. No major issues detected.")
-
     return suggestions
@@ -0,0 +1,157 @@
+"""
+Startup timing for the dashboard.
+
+install() puts an import hook in front of the application packages that
+records, for every module, its self and cumulative import time nested the
+way `python -X importtime` reports them. timed_import() and mark() cover
+third-party packages and the phases of main.py. Time to first page is the
+time until the server is ready plus the time the first page takes to
+build its data; on a warm cache it should stay under
+STARTUP_BUDGET_SECONDS.
+"""
+import importlib
+import importlib.abc
+import os
+import sys
+import time
+
+START = time.perf_counter()
+
+STARTUP_BUDGET_SECONDS = float(os.environ.get("MOANA_STARTUP_BUDGET", "3.0"))
+
+# Top-level packages whose modules are timed one by one
+TIMED_PACKAGES = ("data", "pages", "processing")
+
+# (module, depth, self seconds, cumulative seconds), children first
+imports = []
+# (phase, seconds since START)
+phases = []
+ready_seconds = None
+first_page = None  # (page name, seconds to build it)
+
+_stack = []  # time spent in child imports, one slot per module being imported
+
+
+class _TimedLoader(importlib.abc.Loader):
+    """Wraps a loader and records how long executing the module takes."""
+
+    def __init__(self, loader):
+        self.loader = loader
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        depth = len(_stack)
+        _stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            self.loader.exec_module(module)
+        finally:
+            cumulative = time.perf_counter() - start
+            children = _stack.pop()
+            if _stack:
+                _stack[-1] += cumulative
+            imports.append((module.__name__, depth, cumulative - children, cumulative))
+
+    def __getattr__(self, name):
+        return getattr(self.loader, name)
+
+
+class _TimingFinder(importlib.abc.MetaPathFinder):
+    def find_spec(self, name, path, target=None):
+        if name.partition(".")[0] not in TIMED_PACKAGES:
+            return None
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = _TimedLoader(spec.loader)
+                return spec
+        return None
+
+
+def install():
+    """Time application modules imported from now on."""
+    if not any(isinstance(f, _TimingFinder) for f in sys.meta_path):
+        sys.meta_path.insert(0, _TimingFinder())
+
+
+def timed_import(name: str):
+    """Import a (third-party) module and record it as one top-level entry."""
+    start = time.perf_counter()
+    module = importlib.import_module(name)
+    seconds = time.perf_counter() - start
+    imports.append((name, 0, seconds, seconds))
+    return module
+
+
+def mark(phase: str):
+    phases.append((phase, time.perf_counter() - START))
+
+
+def mark_ready():
+    """The server is about to start serving."""
+    global ready_seconds
+    ready_seconds = time.perf_counter() - START
+    mark("ready")
+
+
+def record_first_page(page_name: str, seconds: float):
+    """Record the first page built; later pages are ignored."""
+    global first_page
+    if first_page is not None or ready_seconds is None:
+        return
+    first_page = (page_name, seconds)
+    print(f"[startup] {summary()}")
+    if time_to_first_page() > STARTUP_BUDGET_SECONDS:
+        print("[startup] Over budget; slowest imports:")
+        print_report(top=10)
+
+
+def time_to_first_page():
+    if ready_seconds is None:
+        return None
+    return ready_seconds + (first_page[1] if first_page else 0.0)
+
+
+def summary() -> str:
+    if ready_seconds is None:
+        return "Starting"
+    text = f"Ready in {ready_seconds:.2f}s"
+    if first_page is not None:
+        name, seconds = first_page
+        total = time_to_first_page()
+        status = "within" if total <= STARTUP_BUDGET_SECONDS else "over"
+        text += (
+            f", first page ({name}) built in {seconds:.2f}s: "
+            f"{total:.2f}s to first page, {status} the {STARTUP_BUDGET_SECONDS:.1f}s budget"
+        )
+    return text
+
+
+def import_rows(top: int = None) -> dict:
+    """Import times as table columns, slowest self time first when `top` is given."""
+    rows = imports if top is None else sorted(imports, key=lambda r: r[2], reverse=True)[:top]
+    return {
+        "module": ["  " * depth + name for name, depth, _, _ in rows],
+        "self_ms": [round(s * 1000, 1) for _, _, s, _ in rows],
+        "cumulative_ms": [round(c * 1000, 1) for _, _, _, c in rows],
+    }
+
+
+def phase_rows() -> dict:
+    return {
+        "phase": [name for name, _ in phases],
+        "seconds": [round(s, 3) for _, s in phases],
+    }
+
+
+def print_report(top: int = None):
+    """Print import times in the `python -X importtime` layout."""
+    print("import time: self [us] | cumulative | imported package")
+    rows = imports if top is None else sorted(imports, key=lambda r: r[2], reverse=True)[:top]
+    for name, depth, self_s, cumulative in rows:
+        print(f"import time: {self_s * 1e6:9.0f} | {cumulative * 1e6:10.0f} | {'  ' * depth}{name}")
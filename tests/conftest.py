@@ -0,0 +1,85 @@
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import pytest
+
+FAMILIES = {"isCoral": 3, "osOcean": 2}
+
+_session_dir = None
+
+
+def pytest_configure(config):
+    # data.cache opens (or builds) a generation when first imported, which
+    # happens while test modules are collected: point data.data at an empty
+    # directory first, so nothing is written into the repository.
+    global _session_dir
+    _session_dir = tempfile.mkdtemp(prefix="moana-tests-")
+    from data import data, geometry
+
+    geometry.STORE_PATH = os.path.join(_session_dir, "geometry.sqlite")
+    data.MOANA_ROOT = Path(_session_dir) / "island"
+    data.JSON_ROOT = data.MOANA_ROOT / "json"
+    data.OBJ_ROOT = data.MOANA_ROOT / "obj"
+    for name in ("CACHE_DIR", "EXPORTS_DIR"):
+        setattr(data, name, os.path.join(_session_dir, name.lower()))
+        os.makedirs(getattr(data, name))
+
+
+def pytest_unconfigure(config):
+    if _session_dir is not None:
+        shutil.rmtree(_session_dir, ignore_errors=True)
+
+
+def write_variant(root, family, variant, faces):
+    obj = root / "obj" / family
+    obj.mkdir(parents=True, exist_ok=True)
+    lines = ["v 0 0 0", "v 1 0 0", "v 0 1 0", "usemtl m0"] + ["f 1 2 3"] * faces
+    (obj / f"{variant}.obj").write_text("\n".join(lines) + "\n")
+    (obj / f"{variant}.mtl").write_text("newmtl m0\nnewmtl m1\n")
+    (obj / f"{variant}.hier").write_text("g root\n")
+
+
+@pytest.fixture
+def island(tmp_path):
+    """A small Moana-shaped dataset: json/<family>/<family>.json and obj/<family>/<variant>.*"""
+    root = tmp_path / "island"
+    for family, variants in FAMILIES.items():
+        for i in range(variants):
+            write_variant(root, family, f"{family}_var{i}", faces=10 * (i + 1))
+        json_dir = root / "json" / family
+        json_dir.mkdir(parents=True)
+        (json_dir / f"{family}.json").write_text(json.dumps({
+            "name": family,
+            "geomObjFile": f"obj/{family}/{family}_var0.obj",
+        }))
+    (root / "json" / "cameras").mkdir()
+    (root / "json" / "cameras" / "shotCam.json").write_text(json.dumps({"fov": 30}))
+    return root
+
+
+@pytest.fixture
+def cache_env(island, tmp_path, monkeypatch):
+    """data.data pointed at the `island` dataset, with its cache and exports under tmp_path."""
+    from data import data, geometry
+
+    monkeypatch.setattr(geometry, "STORE_PATH", str(tmp_path / "geometry.sqlite"))
+    monkeypatch.setattr(data, "MOANA_ROOT", island)
+    monkeypatch.setattr(data, "JSON_ROOT", island / "json")
+    monkeypatch.setattr(data, "OBJ_ROOT", island / "obj")
+    for name, directory in (("CACHE_DIR", "cache"), ("EXPORTS_DIR", "exports")):
+        os.makedirs(tmp_path / directory)
+        monkeypatch.setattr(data, name, str(tmp_path / directory))
+    return data
+
+
+@pytest.fixture
+def served(cache_env):
+    """data.cache serving a fresh build of the `island` dataset."""
+    generation, _ = cache_env.revalidate()
+    from data import cache
+
+    cache._install(generation)
+    return cache
@@ -0,0 +1,41 @@
+import pytest
+
+from data import cache, query
+
+
+def test_bar_df_skips_families_without_assets(served):
+    assets = served.current.assets.to_pandas()
+    families = assets["asset_family"].cat.add_categories(["unused"])
+    snapshot = cache.Snapshot(version="test", assets=assets.assign(asset_family=families))
+
+    bar_df = snapshot.bar_df
+    assert "unused" not in set(bar_df["family"])
+    assert bar_df["size"].notna().all()
+    assert list(bar_df["size"]) == sorted(bar_df["size"], reverse=True)
+    assert snapshot.bar_df is bar_df  # built once per snapshot
+
+
+def test_snapshots_are_read_only(served):
+    snapshot = served.current
+    with pytest.raises(AttributeError):
+        snapshot.assets = None
+    with pytest.raises(TypeError):
+        cache.Snapshot(assets=None, colour="blue")
+
+
+def test_install_publishes_a_whole_snapshot(served, cache_env, island):
+    before = served.current
+    first, last = before.assets["variant_name"].iat[0], before.assets["variant_name"].iat[-1]
+    row = query.find_variant(last, before)
+    for path in island.glob(f"obj/*/{first}.*"):
+        path.unlink()  # the rows after it move up
+    generation, _ = cache_env.revalidate()
+    served._install(generation)
+
+    after = served.current
+    assert after is not before and after.version == generation != before.version
+    assert len(after.assets) == len(before.assets) - 1
+    # Rows from the old snapshot still resolve against it
+    assert query.asset_detail(row, before)["variant_name"] == last
+    assert query.find_variant(last, after) == row - 1
+    assert query.asset_detail(query.find_variant(last), after)["variant_name"] == last
@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data import density, histogram, treemap
+
+
+# ---------------------------------------------------------
+# Histograms
+# ---------------------------------------------------------
+
+@pytest.mark.parametrize("mode", [histogram.LOG, histogram.QUANTILE])
+def test_histogram_counts_match_numpy(mode):
+    rng = np.random.default_rng(0)
+    values = np.r_[0, rng.lognormal(8, 2, 2000)]
+    groups = rng.integers(0, 4, len(values))
+    edges = histogram.bin_edges(values, mode, 30)
+    assert edges[0] <= values.min() and edges[-1] >= values.max()
+
+    counts, tops = histogram.histogram(values, groups, 4, edges, top=3)
+    for group in range(4):
+        expected, _ = np.histogram(values[groups == group], bins=edges)
+        np.testing.assert_array_equal(counts[group], expected)
+
+    bins = histogram.assign_bins(values, edges)
+    for (group, bin_), positions in tops.items():
+        members = np.flatnonzero((groups == group) & (bins == bin_))
+        largest = np.sort(values[members])[::-1][:3]
+        np.testing.assert_array_equal(values[positions], largest)
+    assert sum(map(len, tops.values())) == np.minimum(counts, 3).sum()
+
+
+def test_bin_members_are_the_bin_largest_first():
+    values = np.array([5.0, 50.0, 7.0, 500.0, 6.0])
+    edges = np.array([0.0, 10.0, 100.0, 1000.0])
+    assert histogram.bin_members(values, edges, 0).tolist() == [2, 4, 0]
+    assert histogram.bin_members(values, edges, 2).tolist() == [3]
+
+
+def test_bin_edges_of_degenerate_values():
+    assert len(histogram.bin_edges([], histogram.LOG)) == 2
+    edges = histogram.bin_edges([3.0, 3.0], histogram.QUANTILE)
+    assert len(edges) == 2 and histogram.assign_bins([3.0], edges).tolist() == [0]
+    with pytest.raises(ValueError):
+        histogram.bin_edges([1.0], "linear")
+
+
+# ---------------------------------------------------------
+# Scatter density sampling
+# ---------------------------------------------------------
+
+def test_small_scatters_are_drawn_as_they_are():
+    points, cells = density.sample(np.arange(10), np.arange(10), max_points=10)
+    assert points.tolist() == list(range(10))
+    assert len(cells["count"]) == 0
+
+
+def test_sampling_keeps_every_point_once():
+    rng = np.random.default_rng(1)
+    x = np.r_[rng.lognormal(5, 0.2, 5000), [1e7, 2e7]]
+    y = np.r_[rng.lognormal(2, 0.2, 5000), [1, 2]]
+    points, cells = density.sample(x, y, max_points=500, grid=(16, 16))
+
+    assert len(points) <= 500
+    assert {5000, 5001} <= set(points.tolist())  # the outliers stay markers
+    assert len(points) + cells["count"].sum() == len(x)
+    assert (cells["x_min"] <= cells["x"]).all() and (cells["x"] <= cells["x_max"] * (1 + 1e-9)).all()
+    assert (cells["y_min"] <= cells["y_max"]).all()
+
+    rest = np.setdiff1d(np.arange(len(x)), points)
+    assert cells["x_min"].min() == x[rest].min()
+    assert cells["y_max"].max() == y[rest].max()
+
+
+def test_in_range_bounds_both_axes():
+    x = np.array([1.0, 5.0, 9.0])
+    y = np.array([1.0, 5.0, 9.0])
+    assert density.in_range(x, y, (0, 6), None).tolist() == [True, True, False]
+    assert density.in_range(x, y, (0, 6), (2, 10)).tolist() == [False, True, False]
+
+
+# ---------------------------------------------------------
+# Treemap
+# ---------------------------------------------------------
+
+def assets_frame():
+    families = ["isA"] * 3 + ["isB"] * 25 + ["isC"]
+    return pd.DataFrame({
+        "asset_family": pd.Categorical(families, categories=["isA", "isB", "isC", "isUnused"]),
+        "variant_name": [f"v{i}" for i in range(len(families))],
+        "folder_size_mb": np.arange(1, len(families) + 1, dtype=np.float64),
+        "obj_size_mb": np.arange(1, len(families) + 1, dtype=np.float64) * 0.75,
+        "mtl_size_mb": np.arange(1, len(families) + 1, dtype=np.float64) * 0.25,
+        "hier_size_mb": 0.0,
+    })
+
+
+def test_family_totals_are_sums():
+    assets = assets_frame()
+    families = treemap.children(assets, treemap.ROOT)
+    expected = assets.groupby("asset_family", observed=True)["folder_size_mb"].sum()
+    assert [label for _, label, _ in families] == ["isB", "isC", "isA"]
+    assert {label: value for _, label, value in families} == expected.to_dict()
+
+
+def test_variants_are_pruned_to_the_top_with_an_other_node():
+    assets = assets_frame()
+    variants = treemap.children(assets, "Moana/isB", top=5)
+    assert len(variants) == 6
+    assert [label for _, label, _ in variants[:5]] == ["v27", "v26", "v25", "v24", "v23"]
+    other_id, other_label, other_value = variants[-1]
+    assert other_id == "Moana/isB/" + treemap.OTHER and other_label == "Other (20 variants)"
+    family_total = assets["folder_size_mb"][assets["asset_family"] == "isB"].sum()
+    assert sum(value for _, _, value in variants) == pytest.approx(family_total)
+    assert not treemap.is_drillable(other_id)
+
+
+def test_files_of_a_variant():
+    files = treemap.children(assets_frame(), "Moana/isA/v1")
+    assert files == [("Moana/isA/v1/OBJ", "v1.obj", 1.5), ("Moana/isA/v1/MTL", "v1.mtl", 0.5)]
+    assert treemap.children(assets_frame(), "Moana/isA/missing") == []
+
+
+def test_subtree_parents_cover_their_children():
+    tree = treemap.subtree(assets_frame(), treemap.ROOT, depth=2, top=5)
+    assert tree["ids"][0] == treemap.ROOT
+    assert len(set(tree["ids"])) == len(tree["ids"])
+    values = dict(zip(tree["ids"], tree["values"]))
+    sums = {}
+    for node, parent in zip(tree["ids"][1:], tree["parents"][1:]):
+        assert parent in values
+        sums[parent] = sums.get(parent, 0.0) + values[node]
+    for parent, total in sums.items():
+        assert values[parent] >= total
+        assert values[parent] == pytest.approx(total)
+    assert values[treemap.ROOT] == pytest.approx(assets_frame()["folder_size_mb"].sum())
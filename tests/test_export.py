@@ -0,0 +1,81 @@
+import json
+
+from data import export
+
+
+def write_json(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    return path
+
+
+def export_island(island, exports_dir):
+    exports_dir.mkdir(exist_ok=True)
+    index = export.write_exports(exports_dir, None, None, island, island / "json", island / "obj")
+    return json.loads((exports_dir / "maya_metadata.json").read_text()), index
+
+
+def test_exports_are_valid_json_and_indexed(island, tmp_path):
+    consolidated, index = export_island(island, tmp_path / "exports")
+
+    assert consolidated["cameras"] == {"shotCam": {"fov": 30}}
+    assert consolidated["lights"] == {}
+    assert set(consolidated["elements"]) == {"isCoral", "osOcean"}
+    blob = consolidated["elements"]["isCoral"]
+    element = export.read_entry(tmp_path / "exports", {"files": index}, blob, "sections", "element")
+    assert element["name"] == "isCoral"
+
+
+def test_malformed_members_are_skipped(island, tmp_path):
+    write_json(island / "json" / "cameras" / "broken.json", '{"fov": ')
+    write_json(island / "json" / "lights" / "lights.json", "[1, 2")
+    write_json(island / "json" / "isCoral" / "isCoral_xgArch.json", '{"a": [1, 2]')
+    element = island / "json" / "isCoral" / "isCoral.json"
+    element.write_text(json.dumps({
+        "name": "isCoral",
+        "instancedPrimitiveJsonFiles": {"xgArch": {"jsonFile": "json/isCoral/isCoral_xgArch.json"}},
+    }))
+
+    consolidated, _ = export_island(island, tmp_path / "exports")
+
+    assert consolidated["cameras"] == {"shotCam": {"fov": 30}}
+    assert consolidated["lights"] == {}
+    assert consolidated["primitives"] == {}
+
+
+def test_large_members_are_checked_by_the_scanner(island, tmp_path, monkeypatch):
+    monkeypatch.setattr(export, "PARSE_CHECK_BYTES", 0)
+    write_json(island / "json" / "cameras" / "truncated.json", '{"fov": [1, 2, "]"')
+
+    consolidated, _ = export_island(island, tmp_path / "exports")
+
+    assert consolidated["cameras"] == {"shotCam": {"fov": 30}}
+
+
+def test_fixed_member_is_exported_on_the_next_build(island, tmp_path):
+    primitive = write_json(island / "json" / "isCoral" / "isCoral_xgArch.json", "[1, 2")
+    (island / "json" / "isCoral" / "isCoral.json").write_text(json.dumps({
+        "name": "isCoral",
+        "instancedPrimitiveJsonFiles": {"xgArch": {"jsonFile": "json/isCoral/isCoral_xgArch.json"}},
+    }))
+    exports_dir = tmp_path / "exports"
+    assert export_island(island, exports_dir)[0]["primitives"] == {}
+
+    primitive.write_text("[1, 2, 3]")
+    consolidated, _ = export_island(island, exports_dir)
+    assert set(consolidated["primitives"]) == {"isCoral/xgArch"}
+
+
+def test_missing_primitive_appearing_rewrites_the_blob(island, tmp_path):
+    (island / "json" / "isCoral" / "isCoral.json").write_text(json.dumps({
+        "name": "isCoral",
+        "instancedPrimitiveJsonFiles": {"xgArch": {"jsonFile": "json/isCoral/isCoral_xgArch.json"}},
+    }))
+    exports_dir = tmp_path / "exports"
+    first, _ = export_island(island, exports_dir)
+    assert first["primitives"] == {}
+
+    write_json(island / "json" / "isCoral" / "isCoral_xgArch.json", "[1, 2, 3]")
+    second, _ = export_island(island, exports_dir)
+    assert set(second["primitives"]) == {"isCoral/xgArch"}
+    assert second["elements"]["isCoral"] != first["elements"]["isCoral"]
@@ -0,0 +1,74 @@
+import os
+
+from conftest import write_variant
+
+
+def generations(data):
+    return sorted(name for name in os.listdir(data.CACHE_DIR) if name.startswith(data.GENERATION_PREFIX))
+
+
+def test_build_commits_a_generation(cache_env):
+    data = cache_env
+    generation, fresh = data.revalidate()
+
+    assert fresh
+    assert data.current_generation() == generation
+    assert generations(data) == [os.path.basename(generation)]
+    metadata, assets, tree_df, kpis, treemap_data = data.open_generation(generation)
+    assert len(assets) == 5
+
+
+def test_unchanged_dataset_is_not_rebuilt(cache_env):
+    data = cache_env
+    generation, _ = data.revalidate()
+    assert data.revalidate() == (generation, True)
+
+
+def test_file_rewritten_in_place_is_rebuilt(cache_env, island):
+    data = cache_env
+    first, _ = data.revalidate()
+    write_variant(island, "isCoral", "isCoral_var0", faces=500)
+    second, _ = data.revalidate()
+
+    assert second != first
+    assets = data.open_generation(second)[1]
+    row = (assets["variant_name"] == "isCoral_var0").to_numpy()
+    assert assets["polycount"][row].tolist() == [500]
+
+
+def test_rebuild_keeps_the_generation_it_replaces(cache_env, island):
+    data = cache_env
+    first, _ = data.revalidate()
+    write_variant(island, "isCoral", "isCoral_new", faces=5)
+    second, _ = data.revalidate()
+
+    assert second != first
+    assert data.current_generation() == second
+    assert generations(data) == sorted(map(os.path.basename, (first, second)))
+    # Readers of the previous generation can still open it
+    assert len(data.open_generation(first)[1]) == 5
+    assert len(data.open_generation(second)[1]) == 6
+
+    write_variant(island, "osOcean", "osOcean_new", faces=5)
+    third, _ = data.revalidate()
+    assert generations(data) == sorted(map(os.path.basename, (second, third)))
+
+
+def test_uncommitted_generation_is_pruned(cache_env, island):
+    data = cache_env
+    first, _ = data.revalidate()
+    orphan = data._new_generation()  # a build killed before its commit
+    write_variant(island, "isCoral", "isCoral_new", faces=5)
+    second, _ = data.revalidate()
+
+    assert data.current_generation() == second
+    assert not os.path.exists(orphan)
+    assert os.path.isdir(first)
+
+
+def test_clear_cache_removes_every_generation(cache_env):
+    data = cache_env
+    data.revalidate()
+    data.clear_cache()
+    assert data.current_generation() is None
+    assert generations(data) == []
@@ -0,0 +1,19 @@
+import threading
+
+import pytest
+
+from data import ingest
+
+
+def test_process_pools_spawn_while_other_threads_run(monkeypatch):
+    monkeypatch.setattr(threading, "active_count", lambda: 1)
+    assert ingest.pool_context() is None
+    monkeypatch.setattr(threading, "active_count", lambda: 3)
+    assert ingest.pool_context().get_start_method() == "spawn"
+
+
+@pytest.mark.parametrize("mode", ingest.INGEST_MODES)
+def test_every_batch_runs_once(mode):
+    batches = ingest.make_batches(["a", "bb", "ccc", "dddd"], [1, 2, 3, 4], target_bytes=4)
+    assert batches == [["dddd"], ["ccc", "bb"], ["a"]]
+    assert sorted(ingest.run_batches(len, batches, mode, workers=2)) == [1, 1, 2]
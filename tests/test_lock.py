@@ -0,0 +1,58 @@
+import os
+
+import pytest
+
+from data.lock import FileLock, atomic_path
+
+
+def test_lock_is_exclusive_until_released(tmp_path):
+    path = tmp_path / "build.lock"
+    first, second = FileLock(path), FileLock(path)
+
+    assert first.acquire(blocking=False)
+    assert first.locked
+    assert not second.acquire(blocking=False)
+    assert not second.locked
+
+    first.release()
+    assert not first.locked
+    assert second.acquire(blocking=False)
+    second.release()
+
+
+def test_lock_wait_times_out(tmp_path, monkeypatch):
+    monkeypatch.setattr(FileLock, "POLL_SECONDS", 0.01)
+    path = tmp_path / "build.lock"
+    with FileLock(path) as held:
+        assert held.locked
+        assert not FileLock(path).acquire(timeout=0.05)
+    assert FileLock(path).acquire(timeout=0.05)
+
+
+def test_release_without_acquire_is_harmless(tmp_path):
+    lock = FileLock(tmp_path / "build.lock")
+    lock.release()
+    assert not lock.locked
+
+
+def test_atomic_path_replaces_the_target(tmp_path):
+    target = tmp_path / "CURRENT"
+    target.write_text("old")
+    with atomic_path(target) as tmp:
+        with open(tmp, "w") as f:
+            f.write("new")
+        assert target.read_text() == "old"
+    assert target.read_text() == "new"
+    assert os.listdir(tmp_path) == ["CURRENT"]
+
+
+def test_atomic_path_keeps_the_target_on_error(tmp_path):
+    target = tmp_path / "CURRENT"
+    target.write_text("old")
+    with pytest.raises(RuntimeError):
+        with atomic_path(target) as tmp:
+            with open(tmp, "w") as f:
+                f.write("partial")
+            raise RuntimeError("build failed")
+    assert target.read_text() == "old"
+    assert os.listdir(tmp_path) == ["CURRENT"]
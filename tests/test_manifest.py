@@ -0,0 +1,107 @@
+import os
+
+import pytest
+
+from data import manifest
+
+from conftest import write_variant
+
+OLD_NS = 1_000_000_000_000_000_000  # 2001: older than any walk
+
+
+def age(root):
+    """Give every directory under root an old mtime, so walks trust it."""
+    for d, _, _ in os.walk(root):
+        os.utime(d, ns=(OLD_NS, OLD_NS))
+
+
+def rescan(tmp_path, roots, scan, **kwargs):
+    files, hashes, mtimes = scan
+    manifest.save(files, hashes, tmp_path / "files.feather", tmp_path / "dirs.feather", mtimes)
+    previous = manifest.load_previous(tmp_path / "files.feather", tmp_path / "dirs.feather")
+    return manifest.scan_tree(roots, previous=previous, **kwargs)
+
+
+@pytest.mark.parametrize("split_depth", [0, 1, 2, 5])
+def test_split_walk_matches_serial_walk(island, monkeypatch, split_depth):
+    serial = manifest.scan_tree([island], workers=1)
+    monkeypatch.setattr(manifest, "SPLIT_DEPTH", split_depth)
+    files, hashes, _ = manifest.scan_tree([island], workers=8)
+
+    assert (files, hashes) == serial[:2]
+    assert files[(island / "obj" / "isCoral").as_posix()]["isCoral_var0.obj"][0] > 0
+
+
+def test_changes_are_found_top_down(island, tmp_path):
+    roots = [island]
+    before = manifest.scan_tree(roots)
+    write_variant(island, "isCoral", "isCoral_new", faces=1)
+    (island / "obj" / "osOcean" / "osOcean_var1.mtl").write_text("newmtl changed\n")
+    after = manifest.scan_tree(roots)
+
+    dirty = manifest.changed_dirs(before[1], after[1], roots)
+    assert (island / "json").as_posix() not in dirty
+    added, modified, removed = manifest.diff(before[0], after[0], dirty)
+    obj = (island / "obj").as_posix()
+    assert added == {f"{obj}/isCoral/isCoral_new.{ext}" for ext in ("obj", "mtl", "hier")}
+    assert modified == {f"{obj}/osOcean/osOcean_var1.mtl"}
+    assert removed == set()
+
+
+def test_in_place_edit_is_detected(island, tmp_path):
+    age(island)
+    roots = [island]
+    before = manifest.scan_tree(roots)
+    coral = (island / "obj" / "isCoral").as_posix()
+
+    # Rewriting and touching files leaves the directory mtime alone
+    write_variant(island, "isCoral", "isCoral_var0", faces=500)
+    os.utime(island / "obj" / "osOcean" / "osOcean_var1.mtl", ns=(OLD_NS, OLD_NS + 1))
+    age(island)
+    after = rescan(tmp_path, roots, before)
+
+    dirty = manifest.changed_dirs(before[1], after[1], roots)
+    _, modified, _ = manifest.diff(before[0], after[0], dirty)
+    assert f"{coral}/isCoral_var0.obj" in modified
+    assert (island / "obj" / "osOcean" / "osOcean_var1.mtl").as_posix() in modified
+
+
+def test_trusted_directories_reuse_their_entries(island, tmp_path, monkeypatch):
+    monkeypatch.setattr(manifest, "TRUST_DIR_MTIME", True)
+    age(island)
+    roots = [island]
+    files, hashes, mtimes = manifest.scan_tree(roots)
+    coral = (island / "obj" / "isCoral").as_posix()
+    assert coral in mtimes
+
+    # A recorded entry that no longer matches the file is kept while the
+    # directory's mtime is unchanged: the file is not stat'ed again.
+    files[coral]["isCoral_var0.obj"] = (1, 1)
+    files2, hashes2, _ = rescan(tmp_path, roots, (files, hashes, mtimes))
+    assert files2[coral]["isCoral_var0.obj"] == (1, 1)
+
+    # Once the directory changes, its files are stat'ed again.
+    write_variant(island, "isCoral", "isCoral_new", faces=1)
+    files3, _, mtimes3 = rescan(tmp_path, roots, (files, hashes, mtimes))
+    assert files3[coral]["isCoral_var0.obj"] != (1, 1)
+    assert "isCoral_new.obj" in files3[coral]
+    assert coral not in mtimes3  # just modified: not trusted next time
+
+
+def test_dir_mtimes_are_not_trusted_by_default(island, tmp_path):
+    assert not manifest.TRUST_DIR_MTIME
+    age(island)
+    roots = [island]
+    files, hashes, mtimes = manifest.scan_tree(roots)
+    coral = (island / "obj" / "isCoral").as_posix()
+    files[coral]["isCoral_var0.obj"] = (1, 1)
+
+    files2, _, _ = rescan(tmp_path, roots, (files, hashes, mtimes))
+    assert files2[coral]["isCoral_var0.obj"] != (1, 1)
+
+
+def test_manifest_without_mtimes_is_walked_in_full(island, tmp_path):
+    files, hashes, _ = manifest.scan_tree([island])
+    manifest.save(files, hashes, tmp_path / "files.feather", tmp_path / "dirs.feather")
+    assert manifest.load_previous(tmp_path / "files.feather", tmp_path / "dirs.feather") == {}
+    assert manifest.load_hashes(tmp_path / "dirs.feather") == hashes
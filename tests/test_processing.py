@@ -0,0 +1,159 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import processing
+
+
+def metadata_frame(poly_count, file_size_mb, asset_type="main", scene_name="s1"):
+    n = len(poly_count)
+    return pd.DataFrame({
+        "asset_name": [f"asset{i}" for i in range(n)],
+        "asset_type": asset_type,
+        "scene_name": scene_name,
+        "poly_count": poly_count,
+        "file_size_mb": file_size_mb,
+    })
+
+
+def test_heavy_everywhere_selection_is_flagged():
+    # Every asset looks alike (no outliers), but all are over budget
+    df = metadata_frame([5_000_000] * 50, [9000.0] * 50)
+    suggestions = processing.compute_suggestions(df)
+
+    assert "Current selection looks reasonable. No major issues detected." not in suggestions
+    assert any("50 assets over 1,000,000 polys" in s for s in suggestions)
+    assert any("Total file size is 450,000.0 MB" in s for s in suggestions)
+    assert any("Average poly count per asset is 5,000,000" in s for s in suggestions)
+
+
+def test_light_selection_looks_reasonable():
+    df = metadata_frame([10_000] * 20, [1.0] * 20)
+    assert processing.compute_suggestions(df) == [
+        "Current selection looks reasonable. No major issues detected."
+    ]
+
+
+def test_empty_selection_has_no_suggestions():
+    assert processing.compute_suggestions(metadata_frame([], [])) == []
+
+
+@pytest.mark.parametrize("poly_count, file_size_mb, expected", [
+    # The absolute checks of the original suggestions, at and past each limit
+    ([1_000_000] * 3, [1.0] * 3, ["Average poly count per asset is 1,000,000"]),
+    ([1_000] * 10, [600.0] * 10, ["Total file size is 6,000.0 MB"]),
+    ([1_000] * 10, [500.0] * 10, ["Current selection looks reasonable"]),
+    ([400_000] * 10, [1.0] * 10, ["Average poly count per asset is 400,000"]),
+    ([300_000] * 10, [1.0] * 10, ["Current selection looks reasonable"]),
+])
+def test_baseline_budget_cases(poly_count, file_size_mb, expected):
+    suggestions = processing.compute_suggestions(metadata_frame(poly_count, file_size_mb))
+    assert len(suggestions) == len(expected)
+    for message, start in zip(suggestions, expected):
+        assert message.startswith(start)
+
+
+def test_single_heavy_asset_is_named():
+    df = metadata_frame([2_000_000] + [1_000] * 99, [1.0] * 100)
+    suggestions = processing.compute_suggestions(df)
+    assert any(s.startswith("1 asset over 1,000,000 polys: asset0") for s in suggestions)
+
+
+def test_budget_and_outlier_findings_are_ranked_together():
+    rng = np.random.default_rng(0)
+    polys = rng.lognormal(10, 0.3, 200).astype(np.int64)
+    polys[0] = 2_000_000  # over budget, and an outlier of its family
+    sizes = polys * 60 / 2**20
+    findings = processing.find_suggestions(metadata_frame(polys, sizes))
+
+    kinds = [finding["kind"] for finding in findings]
+    assert "poly_budget" in kinds and "outlier" in kinds
+    severities = [finding["severity"] for finding in findings]
+    assert severities == sorted(severities, reverse=True)
+    budget = findings[kinds.index("poly_budget")]
+    assert budget["rows"].tolist() == [0]
+
+
+def test_unfiltered_suggestions_build_no_index():
+    df = metadata_frame([1_000] * 20, [1.0] * 20)
+    processing.compute_suggestions(df)
+    assert id(df) not in processing._indexes
+
+
+def test_filtered_suggestions_reuse_the_frame_index():
+    df = metadata_frame([1_000] * 19 + [2_000_000], [1.0] * 20)
+    first = processing.compute_suggestions(df, poly_range=(0, 5_000_000))
+    index = processing.filter_index(df)
+    assert processing.compute_suggestions(df, poly_range=(0, 5_000_000)) == first
+    assert processing.filter_index(df) is index
+    assert len(index._findings) == 1
+    assert any("1 asset over 1,000,000 polys" in message for message in first)
+
+
+
+def test_suggestions_are_memoized_per_version_and_filters(monkeypatch):
+    df = metadata_frame([1_000] * 19 + [2_000_000], [1.0] * 20)
+    unfiltered = processing.find_suggestions(df, version="v1")
+    filtered = processing.find_suggestions(df, version="v1", poly_range=(0, 5_000_000))
+    assert id(df) in processing._indexes  # only the filtered call builds one
+
+    def fail(*args):
+        raise AssertionError("recomputed")
+
+    monkeypatch.setattr(processing, "find_issues", fail)
+    monkeypatch.setattr(processing, "describe_finding", fail)
+    assert processing.find_suggestions(df, version="v1") is unfiltered
+    assert processing.find_suggestions(df, version="v1", poly_range=[0, 5_000_000], heavy_only=0) is filtered
+    assert processing.compute_suggestions(df, version="v1") == [f["message"] for f in unfiltered]
+    monkeypatch.undo()
+
+    df["poly_count"] = [1_000] * 20  # new contents need a new version
+    assert processing.find_suggestions(df, version="v1") is unfiltered
+    assert processing.compute_suggestions(df, version="v2") == [
+        "Current selection looks reasonable. No major issues detected."
+    ]
+
+def test_bitmaps_match_the_rows_of_each_value():
+    rng = np.random.default_rng(0)
+    scenes = rng.choice(["a", "b", "c", None], size=1001)
+    df = metadata_frame(rng.integers(0, 10_000, 1001), rng.random(1001), scene_name=scenes)
+    index = processing.FilterIndex(df)
+
+    assert set(index.scenes) == {"a", "b", "c"}
+    for value, (bitmap, rows) in index.scenes.items():
+        expected = np.flatnonzero(scenes == value)
+        np.testing.assert_array_equal(rows, expected)
+        np.testing.assert_array_equal(np.packbits(scenes == value), bitmap)
+
+
+def test_selection_matches_a_boolean_mask():
+    rng = np.random.default_rng(1)
+    df = metadata_frame(
+        rng.integers(0, 2_000_000, 500),
+        rng.random(500) * 100,
+        asset_type=rng.choice(["main", "prop"], 500),
+        scene_name=rng.choice(["s1", "s2", "s3"], 500),
+    )
+    filtered = processing.apply_filters(df, "prop", (1000, 1_500_000), (10, 90), "s2", True)
+    mask = (
+        (df["asset_type"] == "prop")
+        & df["poly_count"].between(1000, 1_500_000)
+        & (df["poly_count"] > processing.HEAVY_POLY_COUNT)
+        & df["file_size_mb"].between(10, 90)
+        & (df["scene_name"] == "s2")
+    )
+    pd.testing.assert_frame_equal(filtered, df[mask])
+
+
+def test_index_is_rebuilt_when_the_frame_changes():
+    df = metadata_frame([1_000] * 10, [1.0] * 10)
+    index = processing.filter_index(df)
+    assert processing.filter_index(df) is index
+
+    df["poly_count"] = [2_000_000] * 10
+    rebuilt = processing.filter_index(df)
+    assert rebuilt is not index
+    assert len(processing.apply_filters(df, "All", (1_000_000, 3_000_000), (0, 10), "All", False)) == 10
+
+    df.loc[10] = df.loc[0]
+    assert processing.filter_index(df) is not rebuilt
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from data import cache, query
+from data.data import build_variant_search, common_prefix_lengths, key_bytes
+
+from conftest import write_variant
+
+VARIANTS = {
+    "isBayCedarA1": ["isBayCedarA1_bonsaiA", "isBayCedarA1_bonsaiB", "isBayCedarA1"],
+    "isCoral": ["isCoral_var0", "isCoral_var1"],
+}
+
+
+@pytest.fixture
+def variants(island, served, cache_env):
+    for family, names in VARIANTS.items():
+        for i, name in enumerate(names):
+            write_variant(island, family, name, faces=i + 1)
+    generation, _ = cache_env.revalidate()
+    served._install(generation)
+    return served
+
+
+def test_prefix_and_word_matches(variants):
+    assert query.search_variants("isbay")[:3] == ["isBayCedarA1", "isBayCedarA1_bonsaiA", "isBayCedarA1_bonsaiB"]
+    assert query.search_variants("bonsai") == ["isBayCedarA1_bonsaiA", "isBayCedarA1_bonsaiB"]
+    assert query.search_variants("Cedar", limit=1) == ["isBayCedarA1"]
+
+
+def test_typos_find_the_variant(variants):
+    assert query.search_variants("bonzai") == ["isBayCedarA1_bonsaiA", "isBayCedarA1_bonsaiB"]
+    assert query.search_variants("cedra")[0] == "isBayCedarA1"
+    assert query.search_variants("iscoarl_var1")[0] == "isCoral_var1"
+
+
+def test_short_text_without_a_match_is_shortened(variants):
+    assert query.search_variants("isq") == query.search_variants("is")
+    assert query.search_variants("qqq") == []
+
+
+def test_prefix_distances():
+    keys = pa.array(["cedara1", "cedr", "ceder", "xyz", ""])
+    heads = key_bytes(keys, np.arange(len(keys)), 7)
+    distances = query._prefix_distances(b"cedar", heads)
+    np.testing.assert_array_equal(distances, [0, 1, 1, 5, 5])
+
+
+@pytest.mark.parametrize("text", ["iscroalb1", "isplama3_xg", "cabagge_0001"])
+def test_fuzzy_entries_match_a_full_scan(text):
+    names = query.synthetic_variant_names(3000)
+    index = build_variant_search(pd.DataFrame({"variant_name": names}))
+    keys = pa.array(index["key"])
+    np.testing.assert_array_equal(index["lcp"], common_prefix_lengths(keys))
+
+    snapshot = cache.Snapshot(version="test")
+    starts = query._key_starts(snapshot, index, keys, len(text) + query.FUZZY_MAX_EDITS)
+    closest, shared = query._closest_key(keys, text, query.bisect.bisect_left(query._Keys(keys), text))
+    positions, distances = query._fuzzy_entries(keys, starts, text, closest, shared)
+    reference = query._reference_matches(keys, text)
+    assert 0 < len(positions) and set(positions.tolist()) <= reference
+    assert len(positions) == min(len(reference), query.FUZZY_RESULTS)
+    assert (np.diff(distances) >= 0).all()
+
+def test_find_variant(variants):
+    row = query.find_variant("isCoral_var1")
+    assert variants.current.assets["variant_name"].iat[row] == "isCoral_var1"
+    assert query.find_variant("isCoral_var9") is None
+
+
+def test_pages_and_filters(variants):
+    rows, page, total = query.query_page("polycount", family="isCoral", page=5, page_size=2)
+    assert total == 3 and page == 1 and len(rows) == 1  # clamped to the last page
+
+    names = variants.current.assets["variant_name"]
+    ascending = query.matching_rows("polycount", text="bonsai")
+    assert [names.iat[row] for row in ascending] == ["isBayCedarA1_bonsaiA", "isBayCedarA1_bonsaiB"]
+    polys = variants.current.assets["polycount"].to_numpy()[query.sort_order("polycount")]
+    assert (np.diff(polys) >= 0).all()
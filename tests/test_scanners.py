@@ -0,0 +1,142 @@
+import json
+
+import pytest
+
+from data.json_scan import scan_json_counts
+from data.obj_scan import RECORD_PREFIXES, _scan_obj_stats_lines, scan_obj_stats
+
+CHUNK_SIZES = [1, 2, 3, 7, 64, 1 << 20]
+
+
+# ---------------------------------------------------------
+# OBJ scanner
+# ---------------------------------------------------------
+
+OBJ_TEXT = (
+    "# comment with f 1 2 3\n"
+    "o body\n"
+    "g group1\n"
+    "usemtl skin\n"
+    "v 0 0 0\n"
+    "v 1 0 0\n"
+    "v 1 1 0\n"
+    "v 0 1 0\n"
+    "vt 0 0\n"
+    "vn 0 0 1\n"
+    "f 1 2 3\n"
+    "f 1/1/1 2/1/1 3/1/1 4/1/1\n"
+    "f\t1 2 3 4 5\n"
+    "f  1   2 3  \r\n"
+    "fo 1 2 3\n"
+    "usemtl_x\n"
+    "\n"
+    "f 1 2 3 4"
+)
+
+
+def _naive_faces(text: str) -> dict:
+    """Arity of every face line, by splitting each line on whitespace."""
+    arity = {}
+    for line in text.splitlines():
+        if line.startswith(("f ", "f\t")):
+            n = len(line.split()) - 1
+            arity[str(n)] = arity.get(str(n), 0) + 1
+    return arity
+
+
+@pytest.mark.parametrize("block_size", CHUNK_SIZES)
+def test_obj_counts_match_the_line_parser(tmp_path, block_size):
+    path = tmp_path / "mesh.obj"
+    path.write_bytes(OBJ_TEXT.encode())
+
+    stats = scan_obj_stats(path, block_size=block_size)
+    reference = _scan_obj_stats_lines(path)
+    for key in list(RECORD_PREFIXES) + ["triangle_count"]:
+        assert stats[key] == reference[key], key
+
+    arity = _naive_faces(OBJ_TEXT)
+    assert stats["arity_hist"] == arity
+    assert stats["face_count"] == sum(arity.values())
+    assert stats["bytes"] == len(OBJ_TEXT)
+
+
+def test_obj_counts_of_an_empty_file(tmp_path):
+    path = tmp_path / "empty.obj"
+    path.write_bytes(b"")
+    stats = scan_obj_stats(path)
+    assert stats["face_count"] == stats["triangle_count"] == stats["v"] == 0
+    assert stats["arity_hist"] == {}
+
+
+# ---------------------------------------------------------
+# JSON scanner
+# ---------------------------------------------------------
+
+def _reference_counts(text: str) -> dict:
+    value = json.loads(text)
+    if isinstance(value, dict):
+        keys = {
+            key: len(item) if isinstance(item, (dict, list)) else None
+            for key, item in value.items()
+        }
+        return {"type": "object", "length": len(value), "keys": keys}
+    if isinstance(value, list):
+        return {"type": "array", "length": len(value), "keys": {}}
+    return {"type": "scalar", "length": 0, "keys": {}}
+
+
+JSON_CASES = [
+    '{"a": [1, 2, 3], "b": {"x": 1, "y": [2, 3]}, "c": 4, "d": "text"}',
+    '{"empty": [], "blank": {}, "spaced": [ ], "nested": [[], [[]], {}]}',
+    '{"q\\"uote": ["a\\"b", "c\\\\", "\\\\\\""], "brackets": ["[{", "}]", ",:"]}',
+    '{"\\\\": [1], "x\\\\\\\\": {"k": "v\\\\"}, "u": "\\u005c"}',
+    '  {\n\t"a" :\n [ 1 ,2 ] ,\r\n "b":null }  ',
+    '[1, [2, 3], {"a": 1}, "x,y", []]',
+    "[]",
+    "{}",
+    '"just a string"',
+    "42",
+]
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+@pytest.mark.parametrize("text", JSON_CASES)
+def test_json_counts_match_json_load(tmp_path, text, chunk_size):
+    path = tmp_path / "element.json"
+    path.write_text(text)
+
+    counts = scan_json_counts(path, chunk_size=chunk_size)
+    assert counts.pop("complete") is True
+    assert counts == _reference_counts(text)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 1 << 20])
+@pytest.mark.parametrize("text", [
+    '{"a": [1, 2',
+    '{"a": "unterminated',
+    '{"a": {"b": [1]}',
+    "[[1], [2]",
+])
+def test_json_truncation_is_reported(tmp_path, text, chunk_size):
+    path = tmp_path / "truncated.json"
+    path.write_text(text)
+    assert scan_json_counts(path, chunk_size=chunk_size)["complete"] is False
+
+
+
+def test_json_counts_across_long_whitespace_runs(tmp_path):
+    path = tmp_path / "spaced.json"
+    text = " " * 300_000 + '{"a": [' + " " * 300_000 + '1, 2], "b": {' + "\n" * 300_000 + "}}"
+    path.write_text(text)
+    counts = scan_json_counts(path)
+    assert counts.pop("complete") is True
+    assert counts == _reference_counts(text)
+
+def test_json_counts_of_a_generated_primitive_file(tmp_path):
+    path = tmp_path / "primitive.json"
+    entries = {f"obj/isCoral/archive{a}.obj": {f"inst_{i}": [0.5] * 16 for i in range(a * 7)} for a in range(5)}
+    path.write_text(json.dumps(entries))
+
+    counts = scan_json_counts(path, chunk_size=4096)
+    assert counts["complete"] is True
+    assert counts["keys"] == {key: len(value) for key, value in entries.items()}